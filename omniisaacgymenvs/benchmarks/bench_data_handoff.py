@@ -0,0 +1,100 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from omniisaacgymenvs.envs.data_handoff import RLDataHandoff
+
+
+def clone_process_data(obs, rew, states, resets, extras, clip_obs, rl_device):
+    """ The _process_data VecEnvRLGames used before RLDataHandoff. """
+    obs = torch.clamp(obs, -clip_obs, clip_obs).to(rl_device).clone()
+    rew = rew.to(rl_device).clone()
+    states = torch.clamp(states, -clip_obs, clip_obs).to(rl_device).clone()
+    resets = resets.to(rl_device).clone()
+    extras = extras.copy()
+    return obs, rew, states, resets, extras
+
+
+def handoff_process_data(handoff, obs, rew, states, resets, extras, clip_obs):
+    """ The _process_data of VecEnvRLGames. """
+    obs = handoff.clamp("obs", obs, clip_obs)
+    rew = handoff.to_rl_device("rew", rew)
+    if states.shape[-1] > 0:
+        states = handoff.clamp("states", states, clip_obs)
+    resets = handoff.to_rl_device("resets", resets)
+    return obs, rew, states, resets, extras
+
+
+def step_us(process_data, device, num_steps):
+    process_data()
+    times = np.zeros(num_steps)
+    for i in range(num_steps):
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        start = time.perf_counter()
+        process_data()
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        times[i] = time.perf_counter() - start
+    return np.median(times) * 1e6
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_data_handoff.py --sim_device cuda:0 --rl_device cuda:0
+    parser = argparse.ArgumentParser(description="Per-step cost of handing task outputs to the RL device")
+    parser.add_argument("--num_envs", type=int, nargs="+", default=[512, 4096, 16384])
+    parser.add_argument("--num_obs", type=int, default=4, help="4 matches Cartpole")
+    parser.add_argument("--num_states", type=int, default=0)
+    parser.add_argument("--sim_device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--rl_device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--num_steps", type=int, default=1000)
+    args = parser.parse_args()
+
+    sim_device = torch.device(args.sim_device)
+    rl_device = torch.device(args.rl_device)
+    sync_device = rl_device if rl_device.type == "cuda" else sim_device
+    clip_obs = 5.0
+    print("{:>10} {:>12} {:>12} {:>10}".format("num_envs", "clone us", "handoff us", "speedup"))
+    for num_envs in args.num_envs:
+        obs = torch.randn((num_envs, args.num_obs), device=sim_device) * 10.0
+        rew = torch.randn(num_envs, device=sim_device)
+        states = torch.randn((num_envs, args.num_states), device=sim_device) * 10.0
+        resets = torch.zeros(num_envs, dtype=torch.long, device=sim_device)
+        extras = {}
+        handoff = RLDataHandoff(rl_device)
+
+        old = step_us(lambda: clone_process_data(obs, rew, states, resets, extras, clip_obs, rl_device), sync_device, args.num_steps)
+        new = step_us(lambda: handoff_process_data(handoff, obs, rew, states, resets, extras, clip_obs), sync_device, args.num_steps)
+        print("{:>10} {:>12.1f} {:>12.1f} {:>9.1f}x".format(num_envs, old, new, old / new))
@@ -0,0 +1,90 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from omniisaacgymenvs.tasks.utils.lidar_utils import BatchedLidarReader
+
+
+class FakeLidarInterface:
+    """ Serves fixed random depth data shaped like the range sensor interface's, (ranges_count, 1) float32 per lidar. """
+
+    def __init__(self, lidar_paths, ranges_count, seed=0):
+        rng = np.random.default_rng(seed)
+        self._depths = {path: rng.uniform(0.0, 10.0, (ranges_count, 1)).astype(np.float32) for path in lidar_paths}
+
+    def get_linear_depth_data(self, path):
+        return self._depths[path]
+
+
+def per_env_read(lidar_interface, lidar_paths, ranges_count, device):
+    """ The readout JetbotTask.get_observations used before BatchedLidarReader, one upload per env. """
+    ranges = torch.zeros((len(lidar_paths), ranges_count)).to(device)
+    for i in range(len(lidar_paths)):
+        np_ranges = lidar_interface.get_linear_depth_data(lidar_paths[i]).squeeze()
+        ranges[i] = torch.tensor(np_ranges)
+    return ranges
+
+
+def steps_per_second(read, device, duration):
+    read()
+    num_steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        read()
+        num_steps += 1
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    return num_steps / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_lidar_reader.py --device cuda:0 --num_envs 256 1024 4096
+    parser = argparse.ArgumentParser(description="Compare the per-env and batched lidar readouts")
+    parser.add_argument("--num_envs", type=int, nargs="+", default=[64, 256, 1024, 4096])
+    parser.add_argument("--ranges_count", type=int, default=360)
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds to time each configuration for")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    print("{:>10} {:>16} {:>16} {:>10}".format("num_envs", "per-env steps/s", "batched steps/s", "speedup"))
+    for num_envs in args.num_envs:
+        lidar_paths = ["/World/envs/env_{}/jetbot_with_lidar/chassis/Lidar/Lidar".format(i) for i in range(num_envs)]
+        lidar_interface = FakeLidarInterface(lidar_paths, args.ranges_count)
+        reader = BatchedLidarReader(lidar_interface, lidar_paths, args.ranges_count, device)
+
+        old = steps_per_second(lambda: per_env_read(lidar_interface, lidar_paths, args.ranges_count, device), device, args.duration)
+        new = steps_per_second(reader.read, device, args.duration)
+        print("{:>10} {:>16.1f} {:>16.1f} {:>9.1f}x".format(num_envs, old, new, new / old))
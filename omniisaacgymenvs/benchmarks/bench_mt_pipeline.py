@@ -0,0 +1,125 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import threading
+import time
+
+import torch
+
+from omniisaacgymenvs.envs.mt_pipeline import StepPipeline
+
+
+class StandInSim(threading.Thread):
+    """ Pure Python simulation side of a StepPipeline, to time the threading without Isaac Sim.
+
+        Every step consumes the actions, advances a damped random walk per env, optionally sleeps
+        ``step_time`` seconds to mimic physics, and sends obs, rew, reset, states and extras like a task would.
+    """
+
+    def __init__(self, pipeline, num_envs, num_observations, device="cpu", step_time=0.0, max_episode_length=100):
+        super().__init__(daemon=True)
+        self._pipeline = pipeline
+        self._step_time = step_time
+        self._max_episode_length = max_episode_length
+        self.obs_buf = torch.zeros((num_envs, num_observations), device=device)
+        self.states_buf = torch.zeros((num_envs, 0), device=device)
+        self.rew_buf = torch.zeros(num_envs, device=device)
+        self.reset_buf = torch.ones(num_envs, device=device, dtype=torch.long)
+        self.progress_buf = torch.zeros(num_envs, device=device, dtype=torch.long)
+        self.num_steps = 0
+
+    def run(self):
+        while True:
+            try:
+                actions = self._pipeline.get_actions()
+            except TimeoutError:
+                break
+            if actions is None:
+                break
+
+            reset = self.reset_buf.bool()
+            self.obs_buf.masked_fill_(reset.unsqueeze(-1), 0)
+            self.progress_buf.masked_fill_(reset, 0)
+            self.obs_buf.mul_(0.9).add_(0.1 * torch.randn_like(self.obs_buf))
+            self.obs_buf[:, :actions.shape[1]] += 0.1 * actions.to(self.obs_buf.device)
+            torch.norm(self.obs_buf, dim=1, out=self.rew_buf).neg_()
+            self.progress_buf += 1
+            self.reset_buf.copy_(self.progress_buf >= self._max_episode_length)
+            if self._step_time > 0:
+                time.sleep(self._step_time)
+
+            self.num_steps += 1
+            self._pipeline.send_data({
+                "obs": self.obs_buf,
+                "rew": self.rew_buf,
+                "reset": self.reset_buf,
+                "states": self.states_buf,
+                "extras": {},
+            })
+
+
+def benchmark_stand_in(num_envs=4096, num_observations=64, num_actions=8, num_steps=1000, device="cpu", step_time=0.0):
+    """ Runs the learner side of a StepPipeline against a StandInSim and returns the achieved steps per second. """
+    pipeline = StepPipeline(device)
+    sim = StandInSim(pipeline, num_envs, num_observations, device=device, step_time=step_time)
+    sim.start()
+
+    actions = torch.zeros((num_envs, num_actions), device=device)
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        pipeline.send_actions(actions)
+        data = pipeline.get_data()
+        actions = torch.tanh(data["obs"][:, :num_actions])
+    if torch.device(device).type == "cuda":
+        torch.cuda.synchronize()
+    elapsed = time.perf_counter() - start
+
+    pipeline.stop()
+    sim.join()
+    return num_steps / elapsed
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_mt_pipeline.py --device cuda:0 --step_time 0.002
+    parser = argparse.ArgumentParser(description="Steps per second of the MT step pipeline against a stand-in sim")
+    parser.add_argument("--num_envs", type=int, nargs="+", default=[512, 4096, 16384])
+    parser.add_argument("--num_observations", type=int, default=64)
+    parser.add_argument("--num_actions", type=int, default=8)
+    parser.add_argument("--num_steps", type=int, default=1000)
+    parser.add_argument("--step_time", type=float, default=0.0, help="seconds of simulated physics per step")
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    print("{:>10} {:>12}".format("num_envs", "steps/s"))
+    for num_envs in args.num_envs:
+        steps_per_second = benchmark_stand_in(num_envs, args.num_observations, args.num_actions, args.num_steps,
+            device=args.device, step_time=args.step_time)
+        print("{:>10} {:>12.1f}".format(num_envs, steps_per_second))
@@ -0,0 +1,100 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import math
+import time
+
+import numpy as np
+import torch
+
+from omniisaacgymenvs.tasks.shared.navigation import compute_heading_and_goal_distance
+
+
+def per_env_heading_and_goal_distance(positions, rotations, target_positions, device):
+    """ The observation path JetbotTask used before the navigation kernels: a Python yaw per env and a re-upload.
+
+        The yaw is computed with the same formula quat_to_euler_angles uses, on one quaternion at a time.
+    """
+    yaws = []
+    for rot in rotations:
+        w, x, y, z = rot.tolist()
+        yaws.append(math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z)))
+    yaws = torch.tensor(yaws).to(device)
+
+    goal_angles = torch.atan2(target_positions[:, 1] - positions[:, 1], target_positions[:, 0] - positions[:, 0])
+    headings = goal_angles - yaws
+    headings = torch.where(headings > math.pi, headings - 2 * math.pi, headings)
+    headings = torch.where(headings < -math.pi, headings + 2 * math.pi, headings)
+    goal_distances = torch.linalg.norm(positions - target_positions, dim=1).to(device)
+    return headings, goal_distances
+
+
+def random_poses(num_envs, device, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    positions = torch.rand((num_envs, 3), generator=generator) * 10.0
+    target_positions = torch.rand((num_envs, 3), generator=generator) * 10.0
+    rotations = torch.randn((num_envs, 4), generator=generator)
+    rotations /= torch.linalg.norm(rotations, dim=1, keepdim=True)
+    return positions.to(device), rotations.to(device), target_positions.to(device)
+
+
+def time_ms(fn, device, repeats):
+    fn()
+    times = np.zeros(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        times[i] = time.perf_counter() - start
+    return np.median(times) * 1000.0
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_navigation.py --num_envs 1024 4096 16384
+    parser = argparse.ArgumentParser(description="Compare the per-env and batched heading observations")
+    parser.add_argument("--num_envs", type=int, nargs="+", default=[1024, 2048, 4096, 8192, 16384])
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    print("{:>10} {:>14} {:>14} {:>10} {:>14}".format("num_envs", "per-env ms", "batched ms", "speedup", "max abs diff"))
+    for num_envs in args.num_envs:
+        positions, rotations, target_positions = random_poses(num_envs, device)
+        old = time_ms(lambda: per_env_heading_and_goal_distance(positions, rotations, target_positions, device), device, args.repeats)
+        new = time_ms(lambda: compute_heading_and_goal_distance(positions, rotations, target_positions), device, args.repeats)
+
+        old_headings, _ = per_env_heading_and_goal_distance(positions, rotations, target_positions, device)
+        new_headings, _ = compute_heading_and_goal_distance(positions, rotations, target_positions)
+        # headings at +-pi may wrap to opposite ends in the two paths
+        diff = torch.remainder(old_headings - new_headings + math.pi, 2 * math.pi).sub(math.pi).abs().max().item()
+        print("{:>10} {:>14.3f} {:>14.3f} {:>9.1f}x {:>14.2e}".format(num_envs, old, new, old / new, diff))
@@ -0,0 +1,157 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from omniisaacgymenvs.utils.domain_randomization.noise import NoiseGenerator
+
+
+# observations randomization entries as they appear in a task's domain_randomization config
+DR_PARAMS = {
+    "on_reset": {"operation": "additive", "distribution": "gaussian", "distribution_parameters": [0, 0.02]},
+    "on_interval": {"frequency_interval": 1, "operation": "additive", "distribution": "gaussian",
+                    "distribution_parameters": [0, 0.002]},
+}
+
+
+class IndexNoise():
+    """ The observations randomization Randomizer used before NoiseGenerator: nonzero index lists, string
+        comparisons and freshly allocated noise on every step. Gaussian and uniform only. """
+
+    def __init__(self, dr_params, num_envs, dimension, device):
+        self._dr_params = dr_params
+        self._device = device
+        self._counter = torch.zeros(num_envs, dtype=torch.int, device=device)
+        self._correlated_noise = torch.zeros((num_envs, dimension), device=device)
+
+    def _noise(self, distribution, distribution_parameters, size):
+        if distribution == "gaussian" or distribution == "normal":
+            return torch.normal(mean=distribution_parameters[0], std=distribution_parameters[1], size=size, device=self._device)
+        return (distribution_parameters[1] - distribution_parameters[0]) * torch.rand(size, device=self._device) + distribution_parameters[0]
+
+    def apply(self, observations, reset_buf):
+        env_ids = reset_buf.nonzero(as_tuple=False).squeeze(-1)
+        self._counter[env_ids] = 0
+        self._counter += 1
+
+        if "on_reset" in self._dr_params.keys():
+            params = self._dr_params["on_reset"]
+            if len(env_ids) > 0:
+                self._correlated_noise[env_ids] = self._noise(
+                    params["distribution"], params["distribution_parameters"], (len(env_ids), observations.shape[1]))
+            if params["operation"] == "additive":
+                observations += self._correlated_noise
+            elif params["operation"] == "scaling":
+                observations *= self._correlated_noise
+
+        if "on_interval" in self._dr_params.keys():
+            params = self._dr_params["on_interval"]
+            randomize_ids = (self._counter >= params["frequency_interval"]).nonzero(as_tuple=False).squeeze(-1)
+            self._counter[randomize_ids] = 0
+            noise = self._noise(params["distribution"], params["distribution_parameters"], (len(randomize_ids), observations.shape[1]))
+            if params["operation"] == "additive":
+                observations[randomize_ids] += noise
+            elif params["operation"] == "scaling":
+                observations[randomize_ids] *= noise
+        return observations
+
+
+class MaskNoise():
+    """ The observations randomization path of Randomizer, built on NoiseGenerator. """
+
+    def __init__(self, dr_params, num_envs, dimension, device, pool_size):
+        self._generators = {
+            event: NoiseGenerator(params["distribution"], params["operation"], params["distribution_parameters"],
+                num_envs, dimension, device, pool_size=pool_size)
+            for event, params in dr_params.items()
+        }
+        self._frequency_interval = dr_params["on_interval"]["frequency_interval"]
+        self._counter = torch.zeros(num_envs, dtype=torch.int, device=device)
+        self._reset_mask = torch.zeros(num_envs, dtype=torch.bool, device=device)
+        self._interval_mask = torch.zeros(num_envs, dtype=torch.bool, device=device)
+
+    def apply(self, observations, reset_buf):
+        self._reset_mask.copy_(reset_buf)
+        self._counter.masked_fill_(self._reset_mask, 0)
+        self._counter += 1
+        self._generators["on_reset"].apply_correlated(observations, self._reset_mask)
+        torch.ge(self._counter, self._frequency_interval, out=self._interval_mask)
+        self._counter.masked_fill_(self._interval_mask, 0)
+        self._generators["on_interval"].apply(observations, self._interval_mask)
+        return observations
+
+
+def step_ms(apply, observations, reset_bufs, device, num_steps):
+    """ Median time in milliseconds of one randomization step, cycling through the given reset buffers. """
+    for reset_buf in reset_bufs:
+        apply(observations, reset_buf)
+    times = np.zeros(num_steps)
+    for i in range(num_steps):
+        reset_buf = reset_bufs[i % len(reset_bufs)]
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        start = time.perf_counter()
+        apply(observations, reset_buf)
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        times[i] = time.perf_counter() - start
+    return np.median(times) * 1000.0
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_noise.py --device cuda:0 --num_envs 4096 16384
+    parser = argparse.ArgumentParser(description="Per-step overhead of observations randomization")
+    parser.add_argument("--num_envs", type=int, nargs="+", default=[4096, 16384])
+    parser.add_argument("--num_obs", type=int, default=48)
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--pool_size", type=int, default=64, help="noise_pool_size of the pooled configuration")
+    parser.add_argument("--reset_fraction", type=float, default=0.01, help="fraction of envs reset every step")
+    parser.add_argument("--num_steps", type=int, default=200)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    print("{:>10} {:>12} {:>12} {:>12} {:>12}".format("num_envs", "no DR ms", "index ms", "mask ms", "pooled ms"))
+    for num_envs in args.num_envs:
+        generator = torch.Generator().manual_seed(0)
+        reset_bufs = [(torch.rand(num_envs, generator=generator) < args.reset_fraction).long().to(device) for _ in range(16)]
+        observations = torch.zeros((num_envs, args.num_obs), device=device)
+
+        configurations = [
+            lambda obs, reset_buf: obs,
+            IndexNoise(DR_PARAMS, num_envs, args.num_obs, device).apply,
+            MaskNoise(DR_PARAMS, num_envs, args.num_obs, device, pool_size=0).apply,
+            MaskNoise(DR_PARAMS, num_envs, args.num_obs, device, pool_size=args.pool_size).apply,
+        ]
+        times = [step_ms(apply, observations, reset_bufs, device, args.num_steps) for apply in configurations]
+        print("{:>10} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f}".format(num_envs, *times))
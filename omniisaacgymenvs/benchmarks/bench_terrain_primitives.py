@@ -0,0 +1,83 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import timeit
+
+import numpy as np
+
+from omniisaacgymenvs.utils.terrain_utils.terrain_utils import (
+    SubTerrain,
+    discrete_obstacles_terrain,
+    pyramid_stairs_terrain,
+    stairs_terrain,
+    stepping_stones_terrain,
+)
+
+
+# the arguments the curriculum in AnymalTerrainGenerator uses at the hardest difficulty
+PRIMITIVES = {
+    "discrete_obstacles": lambda terrain: discrete_obstacles_terrain(terrain, 0.175, 1., 2., 40, platform_size=3.),
+    "stepping_stones": lambda terrain: stepping_stones_terrain(terrain, stone_size=0.2, stone_distance=0.1, max_height=0., platform_size=3.),
+    "stairs": lambda terrain: stairs_terrain(terrain, step_width=0.31, step_height=0.225),
+    "pyramid_stairs": lambda terrain: pyramid_stairs_terrain(terrain, step_width=0.31, step_height=0.225, platform_size=3.),
+}
+
+
+def time_primitive(generate, tile_size, horizontal_scale, repeats):
+    """ Returns the best and median time in milliseconds to generate one tile of tile_size x tile_size meters. """
+
+    num_cells = int(tile_size / horizontal_scale)
+
+    def run():
+        terrain = SubTerrain(width=num_cells, length=num_cells, vertical_scale=0.005, horizontal_scale=horizontal_scale)
+        generate(terrain)
+
+    run()
+    times = np.array(timeit.repeat(run, number=1, repeat=repeats)) * 1000.0
+    return times.min(), np.median(times)
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_terrain_primitives.py --tile_sizes 8 16 32
+    parser = argparse.ArgumentParser(description="Time the terrain primitives across tile sizes")
+    parser.add_argument("--tile_sizes", type=float, nargs="+", default=[4.0, 8.0, 16.0, 32.0], help="tile side [meters]")
+    parser.add_argument("--horizontal_scale", type=float, default=0.1, help="height field resolution [meters]")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    print("{:<20} {:>10} {:>10} {:>10} {:>10}".format("primitive", "tile m", "cells", "min ms", "p50 ms"))
+    for name, generate in PRIMITIVES.items():
+        for tile_size in args.tile_sizes:
+            best, median = time_primitive(generate, tile_size, args.horizontal_scale, args.repeats)
+            num_cells = int(tile_size / args.horizontal_scale)
+            print("{:<20} {:>10.1f} {:>10} {:>10.3f} {:>10.3f}".format(
+                name, tile_size, "{}x{}".format(num_cells, num_cells), best, median))
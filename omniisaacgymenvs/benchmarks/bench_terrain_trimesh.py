@@ -0,0 +1,131 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import shutil
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from omniisaacgymenvs.utils.terrain_utils.terrain_utils import convert_heightfield_to_trimesh
+
+
+def loop_convert_heightfield_to_trimesh(height_field_raw, horizontal_scale, vertical_scale, slope_threshold=None):
+    """ The row loop convert_heightfield_to_trimesh used before it was vectorized. """
+    hf = height_field_raw
+    num_rows = hf.shape[0]
+    num_cols = hf.shape[1]
+
+    y = np.linspace(0, (num_cols-1)*horizontal_scale, num_cols)
+    x = np.linspace(0, (num_rows-1)*horizontal_scale, num_rows)
+    yy, xx = np.meshgrid(y, x)
+
+    if slope_threshold is not None:
+
+        slope_threshold *= horizontal_scale / vertical_scale
+        move_x = np.zeros((num_rows, num_cols))
+        move_y = np.zeros((num_rows, num_cols))
+        move_corners = np.zeros((num_rows, num_cols))
+        move_x[:num_rows-1, :] += (hf[1:num_rows, :] - hf[:num_rows-1, :] > slope_threshold)
+        move_x[1:num_rows, :] -= (hf[:num_rows-1, :] - hf[1:num_rows, :] > slope_threshold)
+        move_y[:, :num_cols-1] += (hf[:, 1:num_cols] - hf[:, :num_cols-1] > slope_threshold)
+        move_y[:, 1:num_cols] -= (hf[:, :num_cols-1] - hf[:, 1:num_cols] > slope_threshold)
+        move_corners[:num_rows-1, :num_cols-1] += (hf[1:num_rows, 1:num_cols] - hf[:num_rows-1, :num_cols-1] > slope_threshold)
+        move_corners[1:num_rows, 1:num_cols] -= (hf[:num_rows-1, :num_cols-1] - hf[1:num_rows, 1:num_cols] > slope_threshold)
+        xx += (move_x + move_corners*(move_x == 0)) * horizontal_scale
+        yy += (move_y + move_corners*(move_y == 0)) * horizontal_scale
+
+    vertices = np.zeros((num_rows*num_cols, 3), dtype=np.float32)
+    vertices[:, 0] = xx.flatten()
+    vertices[:, 1] = yy.flatten()
+    vertices[:, 2] = hf.flatten() * vertical_scale
+    triangles = -np.ones((2*(num_rows-1)*(num_cols-1), 3), dtype=np.uint32)
+    for i in range(num_rows - 1):
+        ind0 = np.arange(0, num_cols-1) + i*num_cols
+        ind1 = ind0 + 1
+        ind2 = ind0 + num_cols
+        ind3 = ind2 + 1
+        start = 2*i*(num_cols-1)
+        stop = start + 2*(num_cols-1)
+        triangles[start:stop:2, 0] = ind0
+        triangles[start:stop:2, 1] = ind3
+        triangles[start:stop:2, 2] = ind1
+        triangles[start+1:stop:2, 0] = ind0
+        triangles[start+1:stop:2, 1] = ind2
+        triangles[start+1:stop:2, 2] = ind3
+
+    return vertices, triangles
+
+
+def stairs_height_field(num_rows, num_cols):
+    """ Steps in both directions with some noise, so that the slope correction moves vertices. """
+    rng = np.random.default_rng(0)
+    steps = np.add.outer(np.arange(num_rows) // 8, np.arange(num_cols) // 8) % 16 * 40
+    return (steps + rng.integers(-5, 5, size=(num_rows, num_cols))).astype(np.int16)
+
+
+def measure(convert, repeats):
+    """ Returns the best time in milliseconds and the peak traced memory in MB of convert(). """
+    convert()
+    best = min(timeit.repeat(convert, number=1, repeat=repeats)) * 1000.0
+    tracemalloc.start()
+    convert()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+
+if __name__ == '__main__':
+    # e.g. python benchmarks/bench_terrain_trimesh.py --sizes 1000 2000
+    parser = argparse.ArgumentParser(description="Time the height field to triangle mesh conversion across map sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000], help="height field side [cells]")
+    parser.add_argument("--slope_threshold", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="bench_trimesh-")
+    print("{:>10} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "cells", "loop ms", "loop MB", "vec ms", "vec MB", "memmap ms", "memmap MB"))
+    try:
+        for size in args.sizes:
+            height_field = stairs_height_field(size, size)
+            results = [
+                measure(lambda: loop_convert_heightfield_to_trimesh(height_field, 0.1, 0.005, args.slope_threshold), args.repeats),
+                measure(lambda: convert_heightfield_to_trimesh(height_field, 0.1, 0.005, args.slope_threshold), args.repeats),
+                # arrays written to output_dir are memory-mapped, so their pages do not count as traced memory
+                measure(lambda: convert_heightfield_to_trimesh(height_field, 0.1, 0.005, args.slope_threshold,
+                    output_dir=output_dir), args.repeats),
+            ]
+            print("{:>10} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+                "{}x{}".format(size, size), *[value for result in results for value in result]))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
@@ -0,0 +1,67 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import torch
+
+
+class RLDataHandoff():
+    """ Hands task outputs over to the RL device without per-step allocations.
+
+        Clamped tensors are written into persistent buffers on the RL device with a single clamp kernel when
+        the task already runs on that device, and with one copy followed by an in-place clamp otherwise.
+        Tensors that need no clamping are passed through untouched when the devices match. The returned
+        buffers are overwritten on the next step.
+
+    Args:
+        rl_device (str): device of the RL algorithm.
+    """
+
+    def __init__(self, rl_device):
+        self._rl_device = torch.device(rl_device)
+        self._buffers = {}
+
+    def _buffer(self, name, tensor):
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != tensor.shape or buffer.dtype != tensor.dtype:
+            buffer = torch.empty(tensor.shape, dtype=tensor.dtype, device=self._rl_device)
+            self._buffers[name] = buffer
+        return buffer
+
+    def clamp(self, name, tensor, clip):
+        buffer = self._buffer(name, tensor)
+        if tensor.device == buffer.device:
+            return torch.clamp(tensor, -clip, clip, out=buffer)
+        buffer.copy_(tensor)
+        return buffer.clamp_(-clip, clip)
+
+    def to_rl_device(self, name, tensor):
+        if tensor.device == self._rl_device:
+            return tensor
+        return self._buffer(name, tensor).copy_(tensor)
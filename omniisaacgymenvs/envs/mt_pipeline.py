@@ -0,0 +1,120 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import threading
+
+import torch
+
+
+class StepPipeline():
+    """ Double-buffered handoff of actions and step data between a learner thread and a simulation thread.
+
+        The simulation thread copies the outputs of every step into one of two persistent slots on the RL
+        device and flips the slots, so the learner can keep using the data of the previous step without
+        cloning it while the next step is being written. Threads are synchronized with events instead of
+        queues. On CUDA, every slot carries a fence recorded after its copies, which the learner waits on
+        device-side before reading.
+
+    Args:
+        device (str): RL device the step data is copied to.
+        timeout (float): seconds the learner waits for step data before giving up.
+        actions_timeout (float, optional): seconds the simulation waits for actions before giving up. Waits
+            indefinitely by default, since the learner stops sending actions for as long as a training epoch takes.
+    """
+
+    def __init__(self, device, timeout=30, actions_timeout=None):
+        self._device = torch.device(device)
+        self._timeout = timeout
+        self._actions_timeout = actions_timeout
+        self._actions = None
+        self._actions_ready = threading.Event()
+        self._data_ready = threading.Event()
+        self._slots = [dict(), dict()]
+        self._fences = [None, None]
+        if self._device.type == "cuda":
+            self._fences = [torch.cuda.Event(), torch.cuda.Event()]
+        self._write_slot = 0
+        self._read_slot = 1
+        self.stopped = False
+
+    # learner thread
+
+    def send_actions(self, actions):
+        self._actions = actions
+        self._actions_ready.set()
+
+    def get_data(self):
+        """ Waits for the next step and returns its data, or None once the pipeline has been stopped.
+            The returned tensors stay valid until the data of the step after next has been written. """
+        if not self._data_ready.wait(self._timeout):
+            raise TimeoutError("Getting states: timeout occurred.")
+        self._data_ready.clear()
+        if self.stopped:
+            return None
+        fence = self._fences[self._read_slot]
+        if fence is not None:
+            fence.wait()
+        return self._slots[self._read_slot]
+
+    # simulation thread
+
+    def get_actions(self):
+        """ Waits for the next actions and returns them, or None once the pipeline has been stopped. """
+        if not self._actions_ready.wait(self._actions_timeout):
+            raise TimeoutError("Getting actions: timeout occurred.")
+        self._actions_ready.clear()
+        if self.stopped:
+            return None
+        return self._actions
+
+    def send_data(self, data):
+        slot = self._slots[self._write_slot]
+        non_blocking = self._device.type == "cuda"
+        for key, value in data.items():
+            if isinstance(value, torch.Tensor):
+                buffer = slot.get(key)
+                if buffer is None or buffer.shape != value.shape or buffer.dtype != value.dtype:
+                    buffer = torch.empty(value.shape, dtype=value.dtype, device=self._device)
+                    slot[key] = buffer
+                buffer.copy_(value, non_blocking=non_blocking)
+            else:
+                slot[key] = value
+        fence = self._fences[self._write_slot]
+        if fence is not None:
+            fence.record()
+
+        self._read_slot = self._write_slot
+        self._write_slot = 1 - self._write_slot
+        self._data_ready.set()
+
+    def stop(self):
+        self.stopped = True
+        self._actions_ready.set()
+        self._data_ready.set()
@@ -0,0 +1,131 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import time
+
+import numpy as np
+
+
+class _WaitSeries():
+    """ Windowed histogram of the wait times of one blocking call. Only updated from a single thread. """
+
+    # 1 us to 100 s, log spaced
+    BUCKET_LIMITS = np.logspace(-6, 2, 33)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bucket_counts = np.zeros(len(self.BUCKET_LIMITS), dtype=np.int64)
+        self.num = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.bucket_counts[min(np.searchsorted(self.BUCKET_LIMITS, seconds), len(self.BUCKET_LIMITS) - 1)] += 1
+        self.num += 1
+        self.sum += seconds
+        self.sum_squares += seconds * seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+
+class ThreadStallStats():
+    """ Records how long the learner and simulation threads of the multi-threaded workflow block on each other.
+
+        The learner side times send_actions and get_data, the simulation side times get_actions and send_data.
+        Wait times are collected into windowed histograms, the round trip from sending actions to receiving the
+        resulting data is kept for the last ``history`` steps, and the utilization of each side over the window
+        is the share of wall time it did not spend waiting. ``write`` exports everything to a tensorboard
+        SummaryWriter and starts a new window. Every series is only updated by the thread owning the call, so
+        no locking is done and a window read concurrently may be off by a step.
+
+    Args:
+        history (int): number of steps whose timestamps are kept.
+    """
+
+    LEARNER_CALLS = ("send_actions", "get_data")
+    SIM_CALLS = ("get_actions", "send_data")
+
+    def __init__(self, history=1024):
+        self._series = {name: _WaitSeries() for name in self.LEARNER_CALLS + self.SIM_CALLS}
+        # send_actions start and get_data end of the last steps
+        self._timestamps = np.zeros((history, 2))
+        self._num_steps = 0
+        self._window_start = time.perf_counter()
+
+    def record(self, name, start, end):
+        """ Records a call that blocked from start to end, both taken from time.perf_counter(). """
+        self._series[name].add(end - start)
+        if name == "send_actions":
+            self._timestamps[self._num_steps % len(self._timestamps), 0] = start
+        elif name == "get_data":
+            self._timestamps[self._num_steps % len(self._timestamps), 1] = end
+            self._num_steps += 1
+
+    def round_trip_times(self):
+        """ Returns the time from sending actions to receiving the resulting data for the last steps. """
+        num = min(self._num_steps, len(self._timestamps))
+        return self._timestamps[:num, 1] - self._timestamps[:num, 0]
+
+    def utilization(self):
+        """ Returns the share of wall time the learner and simulation sides did not spend waiting in this window. """
+        wall_time = max(time.perf_counter() - self._window_start, 1e-9)
+        learner_wait = sum(self._series[name].sum for name in self.LEARNER_CALLS)
+        sim_wait = sum(self._series[name].sum for name in self.SIM_CALLS)
+        return max(0.0, 1.0 - learner_wait / wall_time), max(0.0, 1.0 - sim_wait / wall_time)
+
+    def write(self, writer, step):
+        learner_utilization, sim_utilization = self.utilization()
+        writer.add_scalar("mt/learner_utilization", learner_utilization, step)
+        writer.add_scalar("mt/sim_utilization", sim_utilization, step)
+        round_trip_times = self.round_trip_times()
+        if len(round_trip_times) > 0:
+            writer.add_scalar("mt/round_trip_time", float(np.mean(round_trip_times)), step)
+
+        for name, series in self._series.items():
+            if series.num == 0:
+                continue
+            writer.add_scalar(f"mt/wait_{name}", series.sum / series.num, step)
+            writer.add_histogram_raw(
+                f"mt/wait_{name}",
+                min=series.min,
+                max=series.max,
+                num=series.num,
+                sum=series.sum,
+                sum_squares=series.sum_squares,
+                bucket_limits=_WaitSeries.BUCKET_LIMITS.tolist(),
+                bucket_counts=series.bucket_counts.tolist(),
+                global_step=step,
+            )
+            series.reset()
+        self._window_start = time.perf_counter()
@@ -34,69 +34,118 @@ import numpy as np
 
 from datetime import datetime
 
+from omniisaacgymenvs.envs.data_handoff import RLDataHandoff
+from omniisaacgymenvs.utils.metrics_util import MetricsBuffer, WandbSink
+
 
 # VecEnv Wrapper for RL training
 class VecEnvRLGames(VecEnvBase):
 
     def _process_data(self):
-        self._obs = torch.clamp(self._obs, -self._task.clip_obs, self._task.clip_obs).to(self._task.rl_device).clone()
-        self._rew = self._rew.to(self._task.rl_device).clone()
-        self._states = torch.clamp(self._states, -self._task.clip_obs, self._task.clip_obs).to(self._task.rl_device).clone()
-        self._resets = self._resets.to(self._task.rl_device).clone()
-        self._extras = self._extras.copy()
+        self._obs = self._handoff.clamp("obs", self._obs, self._task.clip_obs)
+        self._rew = self._handoff.to_rl_device("rew", self._rew)
+        if self.num_states > 0:
+            self._states = self._handoff.clamp("states", self._states, self._task.clip_obs)
+        self._resets = self._handoff.to_rl_device("resets", self._resets)
 
     def set_task(
-        self, task, backend="numpy", sim_params=None, init_sim=True, wandb=None
+        self, task, backend="numpy", sim_params=None, init_sim=True, wandb=None, metrics_sinks=None
     ) -> None:
         super().set_task(task, backend, sim_params, init_sim)
 
         self.num_states = self._task.num_states
         self.state_space = self._task.state_space
+        self._handoff = RLDataHandoff(self._task.rl_device)
+        # reused by every reset, step never modifies the actions it is given
+        self._zero_actions = torch.zeros((self.num_envs*self._task.num_agents, self._task.num_actions), device=self._task.rl_device)
         self.wandb = wandb
 
+        # extras are accumulated on device and flushed to the sinks every metrics_flush_steps steps
+        sinks = list(metrics_sinks) if metrics_sinks is not None else []
+        if wandb is not None:
+            sinks.append(WandbSink(wandb))
+        self.metrics = None
+        if len(sinks) > 0:
+            self.metrics = MetricsBuffer(
+                sinks,
+                device=self._task.rl_device,
+                flush_steps=self._task._cfg.get("metrics_flush_steps", 100),
+                flush_seconds=self._task._cfg.get("metrics_flush_seconds", None),
+            )
+
     def step(self, actions):
+        profiler = self._task.profiler
+
+        # randomization and clipping work on a copy, the caller's actions are left untouched
+        actions = actions.clone()
         if self._task.randomize_actions:
-            actions = self._task._dr_randomizer.apply_actions_randomization(actions=actions, reset_buf=self._task.reset_buf)
+            with profiler.phase("apply_actions_randomization"):
+                actions = self._task._dr_randomizer.apply_actions_randomization(actions=actions, reset_buf=self._task.reset_buf)
 
-        actions = torch.clamp(actions, -self._task.clip_actions, self._task.clip_actions).to(self._task.device).clone()
+        actions = actions.clamp_(-self._task.clip_actions, self._task.clip_actions).to(self._task.device)
 
-        self._task.pre_physics_step(actions)
+        with profiler.phase("pre_physics_step"):
+            self._task.pre_physics_step(actions)
         
-        for _ in range(self._task.control_frequency_inv):
-            self._world.step(render=self._render)
-            self.sim_frame_count += 1
+        with profiler.phase("world_step"):
+            for _ in range(self._task.control_frequency_inv):
+                self._world.step(render=self._render)
+                self.sim_frame_count += 1
 
-        self._obs, self._rew, self._resets, self._extras = self._task.post_physics_step()
+        with profiler.phase("post_physics_step"):
+            self._obs, self._rew, self._resets, self._extras = self._task.post_physics_step()
 
-        if self.wandb is not None:
-            for key, value in self._extras.items():
-                self.wandb.log({"rewards": {key: value}})
+        if self._task._dr_randomizer.adr is not None:
+            self._task._dr_randomizer.adr.step(self._rew, self._resets, self._extras)
 
-        if self._task.randomize_observations:
-            self._obs = self._task._dr_randomizer.apply_observations_randomization(
-                observations=self._obs.to(device=self._task.rl_device), reset_buf=self._task.reset_buf)
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                self.metrics.add(self._extras)
+                self.metrics.step()
 
-        self._states = self._task.get_states()
-        self._process_data()
+        if self._task.randomize_observations:
+            with profiler.phase("apply_observations_randomization"):
+                self._obs = self._task._dr_randomizer.apply_observations_randomization(
+                    observations=self._obs.to(device=self._task.rl_device), reset_buf=self._task.reset_buf)
+
+        with profiler.phase("process_data"):
+            self._states = self._task.get_states()
+            if self._task.num_agents > 1:
+                self._rew, self._resets = self._gather_agent_data()
+            self._process_data()
         
         obs_dict = {"obs": self._obs, "states": self._states}
-
-        if self._task.num_agents > 1:
-            self._rew = self._rew.repeat(self._task.num_agents)
-            self._resets = self._resets.repeat(self._task.num_agents)
+        profiler.step()
 
         return obs_dict, self._rew, self._resets, self._extras
 
+    def _gather_agent_data(self):
+        """ Returns rewards and resets laid out per agent in the task's preallocated agent buffers. Unless the
+            task writes them per agent itself, the env level ones are copied to every agent, which costs one
+            copy per step but no allocation. rl_games needs them flat, which an expand view cannot provide. """
+        num_agents = self._task.num_agents
+        if not self._task.per_agent_rewards:
+            self._task.agent_rew_buf.view(num_agents, -1).copy_(self._rew.expand(num_agents, -1))
+        if not self._task.per_agent_resets:
+            self._task.agent_reset_buf.view(num_agents, -1).copy_(self._resets.expand(num_agents, -1))
+        return self._task.agent_rew_buf, self._task.agent_reset_buf
+
     def reset(self):
         """ Resets the task and applies default zero actions to recompute observations and states. """
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{now}] Running RL reset")
 
         self._task.reset()
-        actions = torch.zeros((self.num_envs*self._task._num_agents, self._task.num_actions), device=self._task.rl_device)
-        obs_dict, _, _, _ = self.step(actions)
+        obs_dict, _, _, _ = self.step(self._zero_actions)
 
         return obs_dict
     
     def get_number_of_agents(self):
         return self._task.num_agents
+
+    def close(self):
+        """ Flushes the metrics accumulated since the last flush and closes their sinks before closing the app. """
+        if getattr(self, "metrics", None) is not None:
+            self.metrics.close()
+            self.metrics = None
+        super().close()
@@ -31,6 +31,10 @@ from omni.isaac.gym.vec_env import VecEnvMT
 from omni.isaac.gym.vec_env import TaskStopException
 
 from .vec_env_rlgames import VecEnvRLGames
+from .mt_pipeline import StepPipeline
+from .mt_stats import ThreadStallStats
+
+import time
 
 import torch
 import numpy as np
@@ -39,7 +43,72 @@ import numpy as np
 # VecEnv Wrapper for RL training
 class VecEnvRLGamesMT(VecEnvRLGames, VecEnvMT):
 
+    _pipeline = None
+
+    def initialize(self, action_queue, data_queue, timeout=30, pipeline=False):
+        """ Sets up the handoff between the simulation and RL threads. With pipeline=True the queues are bypassed
+            in favour of a double-buffered StepPipeline, and step data is no longer cloned. """
+        super().initialize(action_queue, data_queue, timeout)
+        self._pipeline = StepPipeline(self._task.rl_device, timeout) if pipeline else None
+        self.stall_stats = ThreadStallStats()
+
+    def send_actions(self, actions, block=True):
+        start = time.perf_counter()
+        if self._pipeline is None:
+            super().send_actions(actions, block)
+        else:
+            self._pipeline.send_actions(actions)
+        self.stall_stats.record("send_actions", start, time.perf_counter())
+
+    def get_actions(self, block=True):
+        start = time.perf_counter()
+        if self._pipeline is None:
+            actions = super().get_actions(block)
+        else:
+            if self._stop:
+                raise TaskStopException()
+            actions = self._pipeline.get_actions()
+            if actions is None:
+                raise TaskStopException()
+        self.stall_stats.record("get_actions", start, time.perf_counter())
+        return actions
+
+    def send_data(self, data, block=True):
+        start = time.perf_counter()
+        if self._pipeline is None:
+            super().send_data(data, block)
+        else:
+            self._pipeline.send_data(data)
+        self.stall_stats.record("send_data", start, time.perf_counter())
+
+    def get_data(self, block=True):
+        start = time.perf_counter()
+        if self._pipeline is None:
+            data = super().get_data(block)
+        else:
+            data = self._pipeline.get_data()
+            if data is None:
+                raise TaskStopException()
+            self._parse_data(data)
+        self.stall_stats.record("get_data", start, time.perf_counter())
+        return data
+
+    def clear_queues(self):
+        super().clear_queues()
+        # the trainer clears the queues when it stops, which also has to release threads waiting on the pipeline
+        if self._pipeline is not None:
+            self._pipeline.stop()
+
     def _parse_data(self, data):
+        if self._pipeline is not None:
+            # pipeline slots are already on the rl device and stay valid for another step
+            self._obs = data["obs"]
+            self._rew = data["rew"]
+            self._states = data["states"].clamp_(-self._task.clip_obs, self._task.clip_obs)
+            self._resets = data["reset"]
+            self._extras = data["extras"]
+            return
+
         self._obs = data["obs"].clone()
         self._rew = data["rew"].to(self._task.rl_device).clone()
         self._states = torch.clamp(data["states"], -self._task.clip_obs, self._task.clip_obs).to(self._task.rl_device).clone()
@@ -50,21 +119,33 @@ class VecEnvRLGamesMT(VecEnvRLGames, VecEnvMT):
         if self._stop:
             raise TaskStopException()
 
+        profiler = self._task.profiler
+
+        # randomization and clipping work on a copy, the caller's actions are left untouched
+        actions = actions.clone()
         if self._task.randomize_actions:
-            actions = self._task._dr_randomizer.apply_actions_randomization(actions=actions, reset_buf=self._task.reset_buf)
+            with profiler.phase("apply_actions_randomization"):
+                actions = self._task._dr_randomizer.apply_actions_randomization(actions=actions, reset_buf=self._task.reset_buf)
+
+        actions = actions.clamp_(-self._task.clip_actions, self._task.clip_actions).to(self._task.device)
 
-        actions = torch.clamp(actions, -self._task.clip_actions, self._task.clip_actions).to(self._task.device).clone()
+        # the physics phases are timed on the simulation thread, this covers the wait for them
+        with profiler.phase("send_actions_get_data"):
+            self.send_actions(actions)
+            data = self.get_data()
 
-        self.send_actions(actions)
-        data = self.get_data()
+        if self._task._dr_randomizer.adr is not None:
+            self._task._dr_randomizer.adr.step(self._rew, self._resets, self._extras)
 
         if self._task.randomize_observations:
-            self._obs = self._task._dr_randomizer.apply_observations_randomization(observations=self._obs.to(self._task.rl_device), reset_buf=self._task.reset_buf)
+            with profiler.phase("apply_observations_randomization"):
+                self._obs = self._task._dr_randomizer.apply_observations_randomization(observations=self._obs.to(self._task.rl_device), reset_buf=self._task.reset_buf)
         
         self._obs = torch.clamp(self._obs, -self._task.clip_obs, self._task.clip_obs).to(self._task.rl_device)
         
         obs_dict = {}
         obs_dict["obs"] = self._obs
         obs_dict["states"] = self._states
+        profiler.step()
 
         return obs_dict, self._rew, self._resets, self._extras
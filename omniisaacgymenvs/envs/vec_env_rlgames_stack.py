@@ -33,19 +33,20 @@ import torch
 import numpy as np
 
 from datetime import datetime
-from collections import deque
 from gym.spaces import Box
 
+from omniisaacgymenvs.envs.data_handoff import RLDataHandoff
+
 
 # VecEnv Wrapper for RL training with stacking frames
 class VecEnvRLGamesStack(VecEnvBase):
 
     def _process_data(self):
-        self._obs = torch.clamp(self._obs, -self._task.clip_obs, self._task.clip_obs).to(self._task.rl_device).clone()
-        self._rew = self._rew.to(self._task.rl_device).clone()
-        self._states = torch.clamp(self._states, -self._task.clip_obs, self._task.clip_obs).to(self._task.rl_device).clone()
-        self._resets = self._resets.to(self._task.rl_device).clone()
-        self._extras = self._extras.copy()
+        self._obs = self._handoff.clamp("obs", self._obs, self._task.clip_obs)
+        self._rew = self._handoff.to_rl_device("rew", self._rew)
+        if self.num_states > 0:
+            self._states = self._handoff.clamp("states", self._states, self._task.clip_obs)
+        self._resets = self._handoff.to_rl_device("resets", self._resets)
 
     def set_task(
         self, task, backend="numpy", sim_params=None, init_sim=True
@@ -54,11 +55,11 @@ class VecEnvRLGamesStack(VecEnvBase):
 
         self.num_states = self._task.num_states
         self.state_space = self._task.state_space
+        self._handoff = RLDataHandoff(self._task.rl_device)
 
         # how many frames to stack
         self.num_stack = 4
-        empty_frames = np.zeros((self.num_stack, self.num_envs, self.observation_space.shape[0]))
-        self.frames = deque(empty_frames, maxlen=self.num_stack)
+        self._init_frame_buffers()
 
         low = np.repeat(self.observation_space.low[np.newaxis, ...], self.num_stack, axis=0)
         high = np.repeat(
@@ -68,96 +69,96 @@ class VecEnvRLGamesStack(VecEnvBase):
             low=low, high=high, dtype=self.observation_space.dtype
         )
         print("self.observation_space.shape", self.observation_space.shape)
-        #self.observation_space.shape = (self.num_stack, self.observation_space.shape[0])
+
+    def _init_frame_buffers(self):
+        """ Preallocates the frame ring buffer on the RL device.
+
+            Frames are written into slot ``self._frame_idx`` of a (num_envs, num_stack, obs_dim) buffer,
+            so appending a frame overwrites a single slot instead of shifting the whole stack.
+            ``self._frame_order[i]`` holds the slot indices from oldest to newest when slot i
+            holds the newest frame, which lets the ordered stack be produced with one gather.
+        """
+        device = self._task.rl_device
+        num_obs = self.observation_space.shape[0]
+
+        self._frames = torch.zeros((self.num_envs, self.num_stack, num_obs), device=device, dtype=torch.float)
+        # scratch buffer swapped with self._frames when refilling the stacks of reset envs
+        self._frames_scratch = torch.zeros_like(self._frames)
+        self._stacked_obs = torch.zeros_like(self._frames)
+        self._stack_resets = torch.zeros((self.num_envs, 1, 1), device=device, dtype=torch.bool)
+
+        slots = torch.arange(self.num_stack, device=device)
+        self._frame_order = torch.stack([torch.roll(slots, -(i + 1)) for i in range(self.num_stack)])
+        self._frame_idx = self.num_stack - 1
+
+    def _push_frame(self, obs):
+        """ Writes the newest observation into the ring buffer and returns the stacked observations.
+
+            Envs flagged in ``self._stack_resets`` started a new episode during this step,
+            so their whole stack is refilled with the new observation.
+
+        Args:
+            obs (torch.Tensor): Observations of shape (num_envs, obs_dim) on the RL device.
+
+        Returns:
+            stacked_obs(torch.Tensor): Stacked observations of shape (num_envs, num_stack, obs_dim), oldest frame first.
+        """
+        self._frame_idx = (self._frame_idx + 1) % self.num_stack
+        self._frames[:, self._frame_idx] = obs
+
+        torch.where(self._stack_resets, obs.unsqueeze(1), self._frames, out=self._frames_scratch)
+        self._frames, self._frames_scratch = self._frames_scratch, self._frames
+
+        torch.index_select(self._frames, 1, self._frame_order[self._frame_idx], out=self._stacked_obs)
+        return self._stacked_obs
 
     def step(self, actions):
+        profiler = self._task.profiler
+
         actions = torch.clamp(actions, -self._task.clip_actions, self._task.clip_actions).to(self._task.device).clone()
 
         if self._task.randomize_actions:
-            actions = self._task._dr_randomizer.apply_actions_randomization(actions=actions, reset_buf=self._task.reset_buf)
+            with profiler.phase("apply_actions_randomization"):
+                actions = self._task._dr_randomizer.apply_actions_randomization(actions=actions, reset_buf=self._task.reset_buf)
 
-        self._task.pre_physics_step(actions)
-        
-        for _ in range(self._task.control_frequency_inv):
-            self._world.step(render=self._render)
-            self.sim_frame_count += 1
-
-        self._obs, self._rew, self._resets, self._extras = self._task.post_physics_step()
+        # envs flagged here are reset in pre_physics_step, so their stacks have to be refilled after this step
+        self._stack_resets.view(-1).copy_(self._task.reset_buf)
 
-        if self._task.randomize_observations:
-            self._obs = self._task._dr_randomizer.apply_observations_randomization(observations=self._obs, reset_buf=self._task.reset_buf)
+        with profiler.phase("pre_physics_step"):
+            self._task.pre_physics_step(actions)
+        
+        with profiler.phase("world_step"):
+            for _ in range(self._task.control_frequency_inv):
+                self._world.step(render=self._render)
+                self.sim_frame_count += 1
 
-        self._states = self._task.get_states()
-        self._process_data()
+        with profiler.phase("post_physics_step"):
+            self._obs, self._rew, self._resets, self._extras = self._task.post_physics_step()
 
+        if self._task._dr_randomizer.adr is not None:
+            self._task._dr_randomizer.adr.step(self._rew, self._resets, self._extras)
 
-        self.frames.append(self._obs.cpu().numpy())
-        
-        #print("obs", self._obs, self._obs.shape)
-        #print("squeeze", self._obs.squeeze(), self._obs.squeeze().shape)
-        #print("frames", np.array(self.frames), np.array(self.frames).shape)
-        
-        # swap axes and put into tensor
-        tens = torch.tensor(np.swapaxes(self.frames, 0, 1), device=self._task.device)
+        if self._task.randomize_observations:
+            with profiler.phase("apply_observations_randomization"):
+                self._obs = self._task._dr_randomizer.apply_observations_randomization(observations=self._obs, reset_buf=self._task.reset_buf)
 
-        #print("tens", tens, tens.shape)
-        #input()
-        
-        obs_dict = {"obs": tens, "states": self._states}
+        with profiler.phase("process_data"):
+            self._states = self._task.get_states()
+            self._process_data()
+            obs_dict = {"obs": self._push_frame(self._obs), "states": self._states}
+        profiler.step()
 
         return obs_dict, self._rew, self._resets, self._extras
 
     def reset(self):
-        """ Resets the task and applies default zero actions to recompute observations and states. """
+        """ Resets the task and applies default zero actions to recompute observations and states.
+            All envs are flagged for reset, so every frame stack is filled with the first observation.
+        """
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{now}] Running RL reset")
 
         self._task.reset()
-        actions = torch.zeros((self.num_envs, self._task.num_actions), device=self._task.device)
+        actions = torch.zeros((self.num_envs, self._task.num_actions), device=self._task.rl_device)
         obs_dict, _, _, _ = self.step(actions)
 
-        # TODO need to handle the resets so that when some env resets, only its stack changes, not every envs stack 
-        # it works when its done wrong though but may not work later in some cases so would be safer to fix it now
-        # work in progress code :
-        # frames_np = np.array(self.frames)
-        # obs_np = self._obs.cpu().numpy()
-        
-
-        # #frames_np[:, resets_np] = obs_np[resets_np]
-        # print(frames_np, frames_np.shape)
-        # print(obs_np, obs_np.shape)
-        #print(resets.cpu().numpy())
-        #print(resets_np, resets_np.shape)
-        # print(obs_np[resets_np], obs_np[resets_np].shape)
-        # print(frames_np[:, resets_np], frames_np[:, resets_np].shape)
-        # print(np.repeat(np.expand_dims(obs_np[resets_np], axis=0), 4, axis=0), np.repeat(np.expand_dims(obs_np[resets_np], axis=0), 4, axis=0).shape)
-        # # print(self._obs, self._obs.shape)
-        
-        # input()
-        # frames_np[:, resets_np] = np.repeat(np.expand_dims(obs_np[resets_np], axis=0), 4, axis=0)
-        # print(frames_np, frames_np.shape)
-        # input()
-
-
-        #frames_np[:, resets_np]
-        
-        # #[self.frames.append(obs_dict["obs"].squeeze().cpu().numpy()) for _ in range(self.num_stack)]
-        # # swap axes and put into tensor
-        # if self._num_envs == 1:
-        #     frames_np = np.expand_dims(self.frames, 0)
-        # else:
-        #     frames_np = np.swapaxes(self.frames, 0, 1)
-        # tens = torch.tensor(frames_np, device=self._task.device)#.unsqueeze(0)
-        
-        for _ in range(self.num_stack):
-            self.frames.append(self._obs.cpu().numpy())
-        
-        # swap axes and put into tensor
-        tens = torch.tensor(np.swapaxes(self.frames, 0, 1), device=self._task.device)
-
-        #print("tens", tens, tens.shape)
-
-        #input()
-        
-        obs_dict["obs"] = tens
         return obs_dict
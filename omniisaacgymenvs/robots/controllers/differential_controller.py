@@ -75,6 +75,32 @@ class DifferentialController(BaseController):
         )
         return torch.tensor(joint_velocities)
 
+    def forward_batch(self, commands: torch.Tensor) -> torch.Tensor:
+        """Batched version of forward that stays on the device of the commands
+
+        Args:
+            commands (torch.Tensor): linear and angular speed commands of shape (N, 2)
+
+        Returns:
+            torch.Tensor: left and right wheel joint velocities of shape (N, 2)
+        """
+        if commands.dim() != 2 or commands.shape[1] != 2:
+            raise Exception("commands should be of shape (N, 2)")
+
+        # limit vehical speed
+        linear_speed = torch.clamp(commands[:, 0], -self.max_linear_speed, self.max_linear_speed)
+        angular_speed = torch.clamp(commands[:, 1], -self.max_angular_speed, self.max_angular_speed)
+
+        # calculate wheel speed
+        joint_velocities = torch.stack(
+            (
+                ((2 * linear_speed) - (angular_speed * self.wheel_base)) / (2 * self.wheel_radius),
+                ((2 * linear_speed) + (angular_speed * self.wheel_base)) / (2 * self.wheel_radius),
+            ),
+            dim=1,
+        )
+        return torch.clamp(joint_velocities, -self.max_wheel_speed, self.max_wheel_speed)
+
     def reset(self) -> None:
         """[summary]
         """
@@ -0,0 +1,107 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+from omniisaacgymenvs.utils.hydra_cfg.hydra_utils import *
+from omniisaacgymenvs.utils.hydra_cfg.reformat import omegaconf_to_dict
+from omniisaacgymenvs.utils.config_utils.path_utils import retrieve_checkpoint_path
+from omniisaacgymenvs.utils.onnx_eval import (
+    OnnxPolicyEvaluator,
+    checkpoint_outputs,
+    compare_outputs,
+    load_observations,
+    synthetic_observations,
+)
+
+import hydra
+from omegaconf import DictConfig
+
+from gym import spaces
+from rl_games.torch_runner import Runner
+
+import numpy as np
+
+
+def create_reference_player(cfg, evaluator):
+    """ Restores the rl_games checkpoint without an environment, using the spaces of the exported model. """
+
+    rlg_config_dict = omegaconf_to_dict(cfg.train)
+    rlg_config_dict["params"]["config"]["env_info"] = {
+        "observation_space": spaces.Box(-np.inf, np.inf, evaluator.obs_shape),
+        "action_space": spaces.Box(-1.0, 1.0, (evaluator.action_dim,)),
+        "agents": 1,
+        "value_size": 1,
+    }
+    runner = Runner()
+    runner.load(rlg_config_dict)
+    agent = runner.create_player()
+    agent.restore(cfg.checkpoint)
+    return agent
+
+
+@hydra.main(config_name="config", config_path="../cfg")
+def parse_hydra_configs(cfg: DictConfig):
+    # e.g. PYTHON_PATH scripts/rlgames_onnx_eval.py task=MobileFranka onnx_model=mobilefranka.onnx checkpoint=...
+    if not cfg.onnx_model:
+        print("Set onnx_model to the exported policy to evaluate")
+        quit()
+
+    evaluator = OnnxPolicyEvaluator(cfg.onnx_model)
+    if cfg.onnx_eval_dataset:
+        obs = load_observations(cfg.onnx_eval_dataset, evaluator.obs_shape)
+    else:
+        obs = synthetic_observations(cfg.onnx_eval_num_samples, evaluator.obs_shape, seed=max(cfg.seed, 0))
+    print("Evaluating {} on {} observations of shape {}".format(cfg.onnx_model, len(obs), evaluator.obs_shape))
+    if evaluator.fixed_batch_size is not None:
+        print("The model was exported with a fixed batch size of {}, re-export it for batched evaluation".format(
+            evaluator.fixed_batch_size))
+
+    print("{:>10} {:>10} {:>14} {:>10} {:>10} {:>10}".format(
+        "batch", "batches", "samples/s", "mean ms", "p50 ms", "p99 ms"))
+    for stats in evaluator.benchmark(obs, cfg.onnx_eval_batch_sizes):
+        print("{batch_size:>10} {num_batches:>10} {samples_per_sec:>14.0f} {mean_ms:>10.3f} {p50_ms:>10.3f} "
+              "{p99_ms:>10.3f}".format(**stats))
+
+    if cfg.checkpoint:
+        cfg.checkpoint = retrieve_checkpoint_path(cfg.checkpoint)
+        if cfg.checkpoint is None:
+            quit()
+        agent = create_reference_player(cfg, evaluator)
+        batch_size = max(cfg.onnx_eval_batch_sizes)
+        outputs, _ = evaluator.run(obs, batch_size)
+        reference_outputs = checkpoint_outputs(agent.model, obs, batch_size, agent.device)
+        report = compare_outputs(outputs, reference_outputs, evaluator.output_names, atol=cfg.onnx_eval_atol)
+        for output in report:
+            print("{:<10} max abs diff {:.3e} {}".format(
+                output["name"], output["max_abs_diff"], "ok" if output["ok"] else "MISMATCH"))
+        if not all(output["ok"] for output in report):
+            quit(1)
+
+
+if __name__ == '__main__':
+    parse_hydra_configs()
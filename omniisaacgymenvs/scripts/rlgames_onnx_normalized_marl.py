@@ -32,6 +32,7 @@ from omniisaacgymenvs.utils.hydra_cfg.reformat import omegaconf_to_dict, print_d
 from omniisaacgymenvs.utils.rlgames.rlgames_utils import RLGPUAlgoObserver, RLGPUEnv
 from omniisaacgymenvs.utils.task_util import initialize_task
 from omniisaacgymenvs.utils.config_utils.path_utils import retrieve_checkpoint_path
+from omniisaacgymenvs.utils.onnx_eval import ModelWrapper
 from omniisaacgymenvs.envs.vec_env_rlgames import VecEnvRLGames
 
 import hydra
@@ -50,27 +51,6 @@ import numpy as np
 from matplotlib import pyplot as plt
 
 
-class ModelWrapper(torch.nn.Module):
-    '''
-    Main idea is to ignore outputs which we don't need from model
-    '''
-    def __init__(self, model):
-        torch.nn.Module.__init__(self)
-        self._model = model
-        
-        
-    def forward(self,input_dict):
-        input_dict['obs'] = self._model.norm_obs(input_dict['obs'])
-        '''
-        just model export doesn't work. Looks like onnx issue with torch distributions
-        thats why we are exporting only neural network
-        '''
-        #print(input_dict)
-        #output_dict = self._model.a2c_network(input_dict)
-        #input_dict['is_train'] = False
-        #return output_dict['logits'], output_dict['values']
-        return self._model.a2c_network(input_dict)
-
 class RLGTrainer():
     def __init__(self, cfg, cfg_dict):
         self.cfg = cfg
@@ -119,7 +99,8 @@ class RLGTrainer():
         
         export_file = "mobilefranka.onnx"
 
-        torch.onnx.export(traced, *adapter.flattened_inputs, export_file, verbose=True, input_names=['obs'], output_names=['mu', 'log_std', 'value'])
+        torch.onnx.export(traced, *adapter.flattened_inputs, export_file, verbose=True, input_names=['obs'], output_names=['mu', 'log_std', 'value'],
+                          dynamic_axes={'obs': {0: 'batch'}, 'mu': {0: 'batch'}, 'log_std': {0: 'batch'}, 'value': {0: 'batch'}})
 
         onnx_model = onnx.load(export_file)
 
@@ -135,10 +135,11 @@ def parse_hydra_configs(cfg: DictConfig):
     rlg_trainer.launch_rlg_hydra(env)
     rlg_trainer.run()
 
+    # closing the env flushes the last metrics, which still go to wandb
+    env.close()
+
     if cfg.wandb_activate:
         wandb.finish()
-    
-    env.close()
 
 
 if __name__ == '__main__':
@@ -135,10 +135,11 @@ class Trainer(TrainerMT):
         self.action_queue = queue.Queue(1)
         self.data_queue = queue.Queue(1)
 
+        pipeline = self.trainer.cfg_dict.get("mt_pipeline", False)
         if "mt_timeout" in self.trainer.cfg_dict:
-            self.env.initialize(self.action_queue, self.data_queue, self.trainer.cfg_dict["mt_timeout"])
+            self.env.initialize(self.action_queue, self.data_queue, self.trainer.cfg_dict["mt_timeout"], pipeline=pipeline)
         else:
-            self.env.initialize(self.action_queue, self.data_queue)
+            self.env.initialize(self.action_queue, self.data_queue, pipeline=pipeline)
         self.ppo_thread = PPOTrainer(self.env, self.task, self.trainer)
         self.ppo_thread.daemon = True
         self.ppo_thread.start()
@@ -30,6 +30,7 @@ from omniisaacgymenvs.tasks.base.rl_task import RLTask
 from omniisaacgymenvs.robots.articulations.anymal import Anymal
 from omniisaacgymenvs.robots.articulations.views.anymal_view import AnymalView
 from omniisaacgymenvs.tasks.utils.anymal_terrain_generator import *
+from omniisaacgymenvs.tasks.utils.height_sampler import HeightSampler
 from omniisaacgymenvs.utils.terrain_utils.terrain_utils import *
 
 from omni.isaac.core.utils.prims import get_prim_at_path
@@ -182,12 +183,19 @@ class AnymalTerrainTask(RLTask):
         return points
     
     def _create_trimesh(self):
-        self.terrain = Terrain(self._task_cfg["env"]["terrain"], num_robots=self.num_envs)
+        self.terrain = Terrain(self._task_cfg["env"]["terrain"], num_robots=self.num_envs, seed=self._cfg.get("seed"))
         vertices = self.terrain.vertices
         triangles = self.terrain.triangles
         position = torch.tensor([-self.terrain.border_size , -self.terrain.border_size , 0.0])
         add_terrain_to_stage(stage=self._stage, vertices=vertices, triangles=triangles, position=position)  
         self.height_samples = torch.tensor(self.terrain.heightsamples).view(self.terrain.tot_rows, self.terrain.tot_cols).to(self.device)
+        self.height_sampler = HeightSampler(
+            self.height_samples,
+            self.terrain.horizontal_scale,
+            self.terrain.vertical_scale,
+            self.terrain.border_size,
+            bilinear=self._task_cfg["env"]["terrain"].get("bilinearHeightSampling", False),
+        )
 
     def set_up_scene(self, scene) -> None:
         self._stage = get_current_stage()
@@ -433,53 +441,24 @@ class AnymalTerrainTask(RLTask):
                                     ),dim=-1)
     
     def get_ground_heights_below_knees(self):
-        points = self.knee_pos.reshape(self.num_envs, 4, 3)
-        points += self.terrain.border_size
-        points = (points/self.terrain.horizontal_scale).long()
-        px = points[:, :, 0].view(-1)
-        py = points[:, :, 1].view(-1)
-        px = torch.clip(px, 0, self.height_samples.shape[0]-2)
-        py = torch.clip(py, 0, self.height_samples.shape[1]-2)
-
-        heights1 = self.height_samples[px, py]
-        heights2 = self.height_samples[px+1, py+1]
-        heights = torch.min(heights1, heights2)
-        return heights.view(self.num_envs, -1) * self.terrain.vertical_scale
+        return self.height_sampler.sample(self.knee_pos).view(self.num_envs, -1)
     
     def get_ground_heights_below_base(self):
-        points = self.base_pos.reshape(self.num_envs, 1, 3)
-        points += self.terrain.border_size
-        points = (points/self.terrain.horizontal_scale).long()
-        px = points[:, :, 0].view(-1)
-        py = points[:, :, 1].view(-1)
-        px = torch.clip(px, 0, self.height_samples.shape[0]-2)
-        py = torch.clip(py, 0, self.height_samples.shape[1]-2)
-
-        heights1 = self.height_samples[px, py]
-        heights2 = self.height_samples[px+1, py+1]
-        heights = torch.min(heights1, heights2)
-        return heights.view(self.num_envs, -1) * self.terrain.vertical_scale
+        return self.height_sampler.sample(self.base_pos).view(self.num_envs, -1)
                                     
     def get_heights(self, env_ids=None):
         if env_ids:
             points = quat_apply_yaw(self.base_quat[env_ids].repeat(1, self.num_height_points), self.height_points[env_ids]) + (self.base_pos[env_ids, 0:3]).unsqueeze(1)
         else:
             points = quat_apply_yaw(self.base_quat.repeat(1, self.num_height_points), self.height_points) + (self.base_pos[:, 0:3]).unsqueeze(1)
- 
-        points += self.terrain.border_size
-        points = (points/self.terrain.horizontal_scale).long()
-        px = points[:, :, 0].view(-1)
-        py = points[:, :, 1].view(-1)
-        px = torch.clip(px, 0, self.height_samples.shape[0]-2)
-        py = torch.clip(py, 0, self.height_samples.shape[1]-2)
 
-        heights1 = self.height_samples[px, py]
-
-        heights2 = self.height_samples[px+1, py+1]
-        heights = torch.min(heights1, heights2)
-
-        return heights.view(self.num_envs, -1) * self.terrain.vertical_scale
+        return self.height_sampler.sample(points).view(points.shape[0], -1)
 
+    def get_all_heights(self):
+        """ Height scan, knee and base ground heights from a single batched lookup. """
+        points = quat_apply_yaw(self.base_quat.repeat(1, self.num_height_points), self.height_points) + (self.base_pos[:, 0:3]).unsqueeze(1)
+        scan_heights, knee_heights, base_heights = self.height_sampler.sample_many(points, self.knee_pos, self.base_pos)
+        return scan_heights, knee_heights.view(self.num_envs, -1), base_heights.view(self.num_envs, -1)
 
 
 @torch.jit.script
@@ -37,6 +37,7 @@ from omni.isaac.core.utils.prims import define_prim
 from omni.isaac.cloner import GridCloner
 from omniisaacgymenvs.tasks.utils.usd_utils import create_distant_light
 from omniisaacgymenvs.utils.domain_randomization.randomize import Randomizer
+from omniisaacgymenvs.utils.step_profiler import StepProfiler
 import omni.kit
 from omni.kit.viewport.utility.camera_state import ViewportCameraState
 from omni.kit.viewport.utility import get_viewport_from_window_name
@@ -64,6 +65,12 @@ class RLTask(BaseTask):
         self.test = self._cfg["test"]
         self._device = self._cfg["sim_device"]
         self._dr_randomizer = Randomizer(self._sim_config)
+        self.profiler = StepProfiler(
+            name,
+            enabled=self._cfg.get("profile", False),
+            window=self._cfg.get("profile_window", 100),
+            cuda_events=self._cfg.get("profile_cuda_events", False),
+        )
         print("Task Device:", self._device)
 
         self.randomize_actions = False
@@ -83,6 +90,12 @@ class RLTask(BaseTask):
             self._num_agents = 1  # used for multi-agent environments
         if not hasattr(self, "_num_states"):
             self._num_states = 0
+        # multi-agent tasks writing their own per-agent rewards/resets into agent_rew_buf/agent_reset_buf set these,
+        # otherwise the env level rew_buf/reset_buf are broadcast to all agents
+        if not hasattr(self, "per_agent_rewards"):
+            self.per_agent_rewards = False
+        if not hasattr(self, "per_agent_resets"):
+            self.per_agent_resets = False
 
         # initialize data spaces (defaults to gym.Box)
         if not hasattr(self, "action_space"):
@@ -107,6 +120,10 @@ class RLTask(BaseTask):
         self.rew_buf = torch.zeros(self._num_envs, device=self._device, dtype=torch.float)
         self.reset_buf = torch.ones(self._num_envs, device=self._device, dtype=torch.long)
         self.progress_buf = torch.zeros(self._num_envs, device=self._device, dtype=torch.long)
+        if self._num_agents > 1:
+            # agent-major layout, matching obs_buf
+            self.agent_rew_buf = torch.zeros(self._num_envs*self._num_agents, device=self._device, dtype=torch.float)
+            self.agent_reset_buf = torch.ones(self._num_envs*self._num_agents, device=self._device, dtype=torch.long)
         self.extras = {}
 
     def set_up_scene(self, scene, replicate_physics=True) -> None:
@@ -248,10 +265,15 @@ class RLTask(BaseTask):
         self.progress_buf[:] += 1
 
         if self._env._world.is_playing():
-            self.get_observations()
-            self.get_states()
-            self.calculate_metrics()
-            self.is_done()
-            self.get_extras()
+            with self.profiler.phase("get_observations"):
+                self.get_observations()
+            with self.profiler.phase("get_states"):
+                self.get_states()
+            with self.profiler.phase("calculate_metrics"):
+                self.calculate_metrics()
+            with self.profiler.phase("is_done"):
+                self.is_done()
+            with self.profiler.phase("get_extras"):
+                self.get_extras()
 
         return self.obs_buf, self.rew_buf, self.reset_buf, self.extras
@@ -30,6 +30,8 @@
 from fileinput import close
 from omniisaacgymenvs.tasks.base.rl_task import RLTask
 from omniisaacgymenvs.robots.controllers.differential_controller import DifferentialController
+from omniisaacgymenvs.tasks.shared.navigation import compute_heading_and_goal_distance
+from omniisaacgymenvs.tasks.utils.lidar_utils import BatchedLidarReader
 
 from omni.isaac.core.articulations import ArticulationView
 from omni.isaac.core.prims import GeometryPrimView
@@ -37,7 +39,6 @@ from omni.isaac.core.utils.prims import get_prim_at_path
 from omni.isaac.core.utils.stage import add_reference_to_stage
 from omni.isaac.core.utils.types import ArticulationActions
 from omni.isaac.range_sensor import _range_sensor
-from omni.isaac.core.utils.rotations import quat_to_euler_angles
 import omni.kit.commands
 from pxr import Gf
 
@@ -145,31 +146,11 @@ class JetbotTask(RLTask):
     # part of this could use jit
     def get_observations(self) -> dict:
         """Return lidar ranges and polar coordinates as observations to RL agent."""
-        self.ranges = torch.zeros((self._num_envs, self.ranges_count)).to(self._device)
-
-        for i in range(self._num_envs):
-            np_ranges = self.lidarInterface.get_linear_depth_data(self._lidarpaths[i]).squeeze()
-            self.ranges[i] = torch.tensor(np_ranges)
-        
-        #print(self.ranges.shape)
+        self.ranges = self._lidar_reader.read()
 
         self.positions, self.rotations = self._jetbots.get_world_poses()
         self.target_positions, _ = self._targets.get_world_poses()
-        yaws = []
-        for rot in self.rotations:
-            yaws.append(quat_to_euler_angles(rot)[2])
-        yaws = torch.tensor(yaws).to(self._device)
-
-        #print("position", self.position)
-        #print("yaw", yaws)
-        #print("target pos", self.target_pos)
-        goal_angles = torch.atan2(self.target_positions[:,1] - self.positions[:,1], self.target_positions[:,0] - self.positions[:,0])
-
-        self.headings = goal_angles - yaws
-        self.headings = torch.where(self.headings > math.pi, self.headings - 2 * math.pi, self.headings)
-        self.headings = torch.where(self.headings < -math.pi, self.headings + 2 * math.pi, self.headings)
-
-        self.goal_distances = torch.linalg.norm(self.positions - self.target_positions, dim=1).to(self._device)
+        self.headings, self.goal_distances = compute_heading_and_goal_distance(self.positions, self.rotations, self.target_positions)
 
         to_target = self.target_positions - self.positions
         to_target[:, 2] = 0.0
@@ -198,10 +179,8 @@ class JetbotTask(RLTask):
         indices = torch.arange(self._jetbots.count, dtype=torch.int32, device=self._device)
         # self._cartpoles.set_joint_efforts(forces, indices=indices)
         
-        controls = torch.zeros((self._num_envs, 2))
-        #print(actions)
-        for i in range(self._num_envs):
-            controls[i] = self._diff_controller.forward([0.4*actions[i][0].item()+0.05, actions[i][1].item()])
+        commands = torch.stack((0.4 * actions[:, 0] + 0.05, actions[:, 1]), dim=1)
+        controls = self._diff_controller.forward_batch(commands)
 
         #self._jetbots.apply_action(ArticulationActions(joint_velocities=controls))
         #joint_velocities = torch.tensor([[1.0, 1.0], [1.0, 1.0], [1.0, 1.0], [1.0, 1.0]]) * 10
@@ -246,6 +225,7 @@ class JetbotTask(RLTask):
         self.lidarInterface = _range_sensor.acquire_lidar_sensor_interface()
         jetbot_paths = self._jetbots.prim_paths
         self._lidarpaths = [path + "/chassis/Lidar/Lidar" for path in jetbot_paths]
+        self._lidar_reader = BatchedLidarReader(self.lidarInterface, self._lidarpaths, self.ranges_count, self._device)
 
         # get some initial poses
         self.initial_root_pos, self.initial_root_rot = self._jetbots.get_world_poses()
@@ -8,6 +8,8 @@
 #
 
 from omniisaacgymenvs.tasks.base.rl_task import RLTask
+from omniisaacgymenvs.tasks.shared.navigation import quat_to_yaw
+from omniisaacgymenvs.tasks.utils.obs_layout import ObservationLayout
 from omniisaacgymenvs.robots.articulations.franka import Franka
 from omniisaacgymenvs.robots.articulations.mobile_franka import MobileFranka
 from omniisaacgymenvs.robots.articulations.cabinet import Cabinet
@@ -21,7 +23,6 @@ from omni.isaac.core.utils.prims import get_prim_at_path
 from omni.isaac.core.utils.stage import get_current_stage
 from omni.isaac.core.utils.torch.transformations import *
 #from omni.isaac.core.utils.rotations import euler_angles_to_quat, quat_to_euler_angles
-from omni.isaac.core.utils.torch.rotations import get_euler_xyz
 from omni.isaac.core.prims import GeometryPrimView
 
 
@@ -71,7 +72,16 @@ class MobileFrankaTask(RLTask):
         control_frequency = 120.0 / self._task_cfg["env"]["controlFrequencyInv"] # 30
         self.dt = 1/control_frequency
 
-        self._num_observations = 32 - 3 - 2 #23
+        # base velocities are left out of the observations
+        self.obs_layout = ObservationLayout([
+            ("base_pos_xy", 2),
+            ("base_yaw", 1),
+            ("arm_dof_pos", 9),
+            ("arm_dof_vel", 9),
+            ("lfinger_pos", 3),
+            ("target_pos", 3),
+        ])
+        self._num_observations = self.obs_layout.size
         self._num_actions = 11
         self._num_agents = 1
 
@@ -176,130 +186,38 @@ class MobileFrankaTask(RLTask):
         )
 
         self.target_positions = torch.zeros((self._num_envs, 3), device=self._device)
+        self.franka_lfinger_pos = torch.zeros((self._num_envs, 3), device=self._device)
+        self.to_target = torch.zeros((self._num_envs, 3), device=self._device)
 
         self.actions = torch.zeros((self._num_envs, self.num_actions), device=self._device)
 
     def get_observations(self) -> dict:
-        hand_pos, hand_rot = self._mobilefrankas._hands.get_world_poses(clone=False)
-        hand_pos = hand_pos - self._env_pos
-        # #drawer_pos, drawer_rot = self._cabinets._drawers.get_world_poses(clone=False)
+        layout = self.obs_layout
+
         franka_dof_pos = self._mobilefrankas.get_joint_positions(clone=False)
         franka_dof_vel = self._mobilefrankas.get_joint_velocities(clone=False)
-        # #self.cabinet_dof_pos = self._cabinets.get_joint_positions(clone=False)
-        # #self.cabinet_dof_vel = self._cabinets.get_joint_velocities(clone=False)
         self.franka_dof_pos = franka_dof_pos
 
         base_pos, base_rot = self._mobilefrankas._base.get_world_poses(clone=False)
-        base_pos = base_pos - self._env_pos 
-        base_pos_xy = base_pos[:, :2]
+        torch.sub(base_pos[:, :2], self._env_pos[:, :2], out=layout.view(self.obs_buf, "base_pos_xy"))
 
         # yaw is in range 0-2pi do I want it to be -pi to pi
-        roll, pitch, base_yaw = get_euler_xyz(base_rot)
-        base_yaw = base_yaw.unsqueeze(1)
-        #print("base_rot, base_yaw", base_rot, base_yaw)
-        # for rot in base_rot:
-        #     base_rot_z.append(quat_to_euler_angles(rot)[2])
-        # base_rot_z = torch.tensor(base_rot_z).unsqueeze(1).to(self._device)
-        
-        base_vel = self._mobilefrankas._base.get_velocities(clone=False)
-        base_vel_xy = base_vel[:, :2]
-        base_angvel_z = base_vel[:, -1].unsqueeze(1)
-
-        # print("base_pos_xy", base_pos_xy)
-        # print("hand_pos", hand_pos)
-        # print("base_vel_xy", base_vel_xy)
-        # print("self._env_pos", self._env_pos)
-        # input()
-
-
-        # # self.franka_grasp_rot, self.franka_grasp_pos, self.drawer_grasp_rot, self.drawer_grasp_pos = self.compute_grasp_transforms(
-        # #     hand_rot,
-        # #     hand_pos,
-        # #     self.franka_local_grasp_rot,
-        # #     self.franka_local_grasp_pos,
-        # #     drawer_rot,
-        # #     drawer_pos,
-        # #     self.drawer_local_grasp_rot,
-        # #     self.drawer_local_grasp_pos,
-        # # )
-
-        self.franka_lfinger_pos, self.franka_lfinger_rot = self._mobilefrankas._lfingers.get_world_poses(clone=False)
-        self.franka_lfinger_pos = self.franka_lfinger_pos - self._env_pos
-        # #self.franka_rfinger_pos, self.franka_rfinger_rot = self._frankas._lfingers.get_world_poses(clone=False)
-        
-        # panda arm joint positions scaled
-        arm_dof_pos_scaled = (
-            2.0
-            * (franka_dof_pos[:, 3:] - self.franka_dof_lower_limits[3:])
-            / (self.franka_dof_upper_limits[3:] - self.franka_dof_lower_limits[3:])
-            - 1.0
-        )
-
-        # #print("franka_dof_pos", franka_dof_pos)
-        # #print("dof_pos_scaled[0]", dof_pos_scaled[0].cpu().numpy())
-        # #print("self.franka_dof_upper_limits", self.franka_dof_upper_limits)
-        # #print("self.franka_dof_lower_limits", self.franka_dof_lower_limits)
-        # #print(self.dof_vel_scale)
-
-        self.to_target = self.target_positions - self.franka_lfinger_pos
-
-        obs = torch.hstack((
-            base_pos_xy, 
-            base_yaw, 
-            arm_dof_pos_scaled,
-            #base_vel_xy, 
-            #base_angvel_z, 
-            franka_dof_vel[:, 3:] * self.dof_vel_scale,
-            self.franka_lfinger_pos,
-            self.target_positions
-        )).to(dtype=torch.float32)
+        torch.remainder(quat_to_yaw(base_rot), 2 * math.pi, out=layout.view(self.obs_buf, "base_yaw").squeeze(1))
 
-        #print("obs", obs)
-        #input()
+        # panda arm joint positions scaled to [-1, 1]
+        arm_dof_pos_scaled = layout.view(self.obs_buf, "arm_dof_pos")
+        torch.sub(franka_dof_pos[:, 3:], self._arm_dof_lower_limits, out=arm_dof_pos_scaled)
+        arm_dof_pos_scaled.mul_(self._arm_dof_pos_scale).sub_(1.0)
 
-        self.obs_buf = obs
+        torch.mul(franka_dof_vel[:, 3:], self.dof_vel_scale, out=layout.view(self.obs_buf, "arm_dof_vel"))
 
-        #input()
+        lfinger_pos, _ = self._mobilefrankas._lfingers.get_world_poses(clone=False)
+        torch.sub(lfinger_pos, self._env_pos, out=self.franka_lfinger_pos)
+        torch.sub(self.target_positions, self.franka_lfinger_pos, out=self.to_target)
 
-        #print(self.obs_buf)
-        #print(self.obs_buf.shape)
-        #input()
+        layout.view(self.obs_buf, "lfinger_pos").copy_(self.franka_lfinger_pos)
+        layout.view(self.obs_buf, "target_pos").copy_(self.target_positions)
 
-        #print("rotation", rot)
-        #print("angular vel", franka_dof_vel[0][2])
-
-        #print(dof_pos_scaled[0], dof_pos_scaled.shape)
-
-
-        # prop_pos = self._props.get_world_poses(clone=False)[0]
-        # #print("prop_pos", prop_pos)
-        #print("hand_pos", hand_pos)
-
-        # use prop pos as target
-        # self.to_target = prop_pos - hand_pos
-
-        # use goal pos as target
-        #print(self.default_prop_pos)
-        #self.to_target = self.default_prop_pos - self.franka_rfinger_pos
-        #print("to_target", self.to_target)
-        
-        # self.obs_buf = torch.cat(
-        #     (
-        #         dof_pos_scaled,
-        #         franka_dof_vel * self.dof_vel_scale,
-        #         #self.to_target,
-        #         #self.cabinet_dof_pos[:, 3].unsqueeze(-1),
-        #         #self.cabinet_dof_vel[:, 3].unsqueeze(-1),
-        #     ),
-        #     dim=-1,
-        # )
-
-        #print("dof_pos_scaled", dof_pos_scaled, dof_pos_scaled.shape)
-        #print("franka_dof_vel", franka_dof_vel, franka_dof_vel.shape)
-        #print("to_target", to_target, to_target.shape)
-        #print("self.cabinet_dof_pos[:, 3].unsqueeze(-1)", self.cabinet_dof_pos[:, 3].unsqueeze(-1), self.cabinet_dof_pos[:, 3].unsqueeze(-1).shape)
-        #print("self.cabinet_dof_vel[:, 3].unsqueeze(-1)", self.cabinet_dof_vel[:, 3].unsqueeze(-1), self.cabinet_dof_vel[:, 3].unsqueeze(-1).shape)
-        
         observations = {
             self._mobilefrankas.name: {
                 "obs_buf": self.obs_buf
@@ -417,6 +335,10 @@ class MobileFrankaTask(RLTask):
         self.franka_dof_lower_limits = dof_limits[0, :, 0].to(device=self._device)
         self.franka_dof_upper_limits = dof_limits[0, :, 1].to(device=self._device)
 
+        # constants for scaling the arm joint positions in the observations
+        self._arm_dof_lower_limits = self.franka_dof_lower_limits[3:].clone()
+        self._arm_dof_pos_scale = 2.0 / (self.franka_dof_upper_limits[3:] - self.franka_dof_lower_limits[3:])
+
         # control the joint speeds with these
         self.franka_dof_speed_scales = torch.ones_like(self.franka_dof_lower_limits)
         self.franka_dof_speed_scales[self._mobilefrankas.gripper_indices] = 0.1
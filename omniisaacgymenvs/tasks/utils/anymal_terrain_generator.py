@@ -30,12 +30,114 @@ import numpy as np
 import torch
 import math
 
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from multiprocessing import shared_memory
+
 from omniisaacgymenvs.utils.terrain_utils.terrain_utils import *
 
 
+class TerrainCache:
+    """ On-disk cache of generated terrains.
+
+        Every entry is a directory named after a hash of the terrain config, the number of robots
+        and the seed. It holds the height field, mesh and env origins as .npy files, so the mesh
+        can be memory-mapped on load. The least recently used entries are evicted once the cache
+        grows past max_size_mb.
+    """
+
+    # keys that only configure the cache itself and must not change the entry key
+    IGNORED_CFG_KEYS = ("cacheDir", "cacheMaxSizeMB", "generationWorkers")
+    VERSION = 2
+
+    def __init__(self, cache_dir, max_size_mb=2048) -> None:
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, cfg, num_robots, seed):
+        terrain_cfg = {k: v for k, v in cfg.items() if k not in self.IGNORED_CFG_KEYS}
+        desc = json.dumps(
+            {"version": self.VERSION, "terrain": terrain_cfg, "num_robots": num_robots, "seed": seed},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(desc.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """ Returns the cached arrays of an entry, or None if it is not in the cache. """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry_dir):
+            return None
+        try:
+            arrays = {
+                "height_field_raw": np.load(os.path.join(entry_dir, "height_field_raw.npy")),
+                "vertices": np.load(os.path.join(entry_dir, "vertices.npy"), mmap_mode="r"),
+                "triangles": np.load(os.path.join(entry_dir, "triangles.npy"), mmap_mode="r"),
+                "env_origins": np.load(os.path.join(entry_dir, "env_origins.npy")),
+            }
+        except (OSError, ValueError):
+            print(f"Terrain cache entry {key} is unreadable, regenerating it")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        # mark the entry as recently used
+        os.utime(entry_dir)
+        return arrays
+
+    def store(self, key, build_fn):
+        """ Builds an entry with build_fn(output_dir) and moves it into the cache.
+
+            build_fn may write some of the arrays to output_dir itself and returns a dict with
+            the arrays that still have to be saved. Entries larger than max_size_bytes are not
+            stored, as they would evict every other entry and then themselves.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir)
+        arrays = build_fn(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, name + ".npy"), array)
+        size = self._dir_size(tmp_dir)
+        if size > self.max_size_bytes:
+            print(f"Terrain {key} takes {size / 2**20:.0f} MB, more than cacheMaxSizeMB "
+                  f"({self.max_size_bytes / 2**20:.0f} MB), not caching it")
+            # arrays build_fn memory-mapped from output_dir stay valid after their files are removed
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        try:
+            os.rename(tmp_dir, os.path.join(self.cache_dir, key))
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """ Removes the least recently used entries until the cache fits into max_size_bytes. """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            size = self._dir_size(entry_dir)
+            entries.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    @staticmethod
+    def _dir_size(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
 # terrain generator
 class Terrain:
-    def __init__(self, cfg, num_robots) -> None:
+    def __init__(self, cfg, num_robots, seed=None) -> None:
         self.horizontal_scale = 0.1
         self.vertical_scale = 0.005
         self.border_size = 20
@@ -57,107 +159,176 @@ class Terrain:
         self.tot_cols = int(self.env_cols * self.width_per_env_pixels) + 2 * self.border
         self.tot_rows = int(self.env_rows * self.length_per_env_pixels) + 2 * self.border
 
+        # number of processes generating sub-terrain tiles, the terrain is the same for any number of workers
+        self.num_workers = cfg.get("generationWorkers", 1)
+
+        if cfg.get("cacheDir") is None:
+            self._generate(cfg, num_robots)
+            return
+
+        # cached terrains are generated from a freshly seeded RNG so that the cache key determines the terrain
+        cache = TerrainCache(cfg["cacheDir"], cfg.get("cacheMaxSizeMB", 2048))
+        key = cache.make_key(cfg, num_robots, seed)
+        arrays = cache.load(key)
+        if arrays is None:
+            def build(output_dir):
+                self._generate(cfg, num_robots, seed, output_dir=output_dir)
+                return {"height_field_raw": self.height_field_raw, "env_origins": self.env_origins}
+            cache.store(key, build)
+        else:
+            print(f"Loaded terrain {key} from cache {cache.cache_dir}")
+            self.height_field_raw = arrays["height_field_raw"]
+            self.env_origins = arrays["env_origins"]
+            self.heightsamples = self.height_field_raw
+            self.vertices = arrays["vertices"]
+            self.triangles = arrays["triangles"]
+
+    def _generate(self, cfg, num_robots, seed=None, output_dir=None):
+        if seed is not None:
+            np.random.seed(seed)
         self.height_field_raw = np.zeros((self.tot_rows , self.tot_cols), dtype=np.int16)
         if cfg["curriculum"]:
             self.curiculum(num_robots, num_terrains=self.env_cols, num_levels=self.env_rows)
         else:
             self.randomized_terrain()   
         self.heightsamples = self.height_field_raw
-        self.vertices, self.triangles = convert_heightfield_to_trimesh(self.height_field_raw, self.horizontal_scale, self.vertical_scale, cfg["slopeTreshold"])
+        self.vertices, self.triangles = convert_heightfield_to_trimesh(
+            self.height_field_raw, self.horizontal_scale, self.vertical_scale, cfg["slopeTreshold"], output_dir=output_dir
+        )
     
     def randomized_terrain(self):
-        for k in range(self.num_maps):
-            # Env coordinates in the world
-            (i, j) = np.unravel_index(k, (self.env_rows, self.env_cols))
-
-            # Heightfield coordinate system from now on
-            start_x = self.border + i * self.length_per_env_pixels
-            end_x = self.border + (i + 1) * self.length_per_env_pixels
-            start_y = self.border + j * self.width_per_env_pixels
-            end_y = self.border + (j + 1) * self.width_per_env_pixels
-
-            terrain = SubTerrain("terrain",
-                              width=self.width_per_env_pixels,
-                              length=self.width_per_env_pixels,
-                              vertical_scale=self.vertical_scale,
-                              horizontal_scale=self.horizontal_scale)
-            choice = np.random.uniform(0, 1)
-            if choice < 0.1:
-                if np.random.choice([0, 1]):
-                    pyramid_sloped_terrain(terrain, np.random.choice([-0.3, -0.2, 0, 0.2, 0.3]))
-                    random_uniform_terrain(terrain, min_height=-0.1, max_height=0.1, step=0.05, downsampled_scale=0.2)
-                else:
-                    pyramid_sloped_terrain(terrain, np.random.choice([-0.3, -0.2, 0, 0.2, 0.3]))
-            elif choice < 0.6:
-                # step_height = np.random.choice([-0.18, -0.15, -0.1, -0.05, 0.05, 0.1, 0.15, 0.18])
-                step_height = np.random.choice([-0.15, 0.15])
-                pyramid_stairs_terrain(terrain, step_width=0.31, step_height=step_height, platform_size=3.)
-            elif choice < 1.:
-                discrete_obstacles_terrain(terrain, 0.15, 1., 2., 40, platform_size=3.)
-
-            self.height_field_raw[start_x: end_x, start_y:end_y] = terrain.height_field_raw
-
-            env_origin_x = (i + 0.5) * self.env_length
-            env_origin_y = (j + 0.5) * self.env_width
-            x1 = int((self.env_length/2. - 1) / self.horizontal_scale)
-            x2 = int((self.env_length/2. + 1) / self.horizontal_scale)
-            y1 = int((self.env_width/2. - 1) / self.horizontal_scale)
-            y2 = int((self.env_width/2. + 1) / self.horizontal_scale)
-            env_origin_z = np.max(terrain.height_field_raw[x1:x2, y1:y2])*self.vertical_scale
-            self.env_origins[i, j] = [env_origin_x, env_origin_y, env_origin_z]
+        self._generate_tiles("random")
 
     def curiculum(self, num_robots, num_terrains, num_levels):
-        num_robots_per_map = int(num_robots / num_terrains)
-        left_over = num_robots % num_terrains
-        idx = 0
-        for j in range(num_terrains):
-            for i in range(num_levels):
-                terrain = SubTerrain("terrain",
-                                    width=self.width_per_env_pixels,
-                                    length=self.width_per_env_pixels,
-                                    vertical_scale=self.vertical_scale,
-                                    horizontal_scale=self.horizontal_scale)
-                difficulty = i / num_levels
-                choice = j / num_terrains
-
-                slope = difficulty * 0.4
-                step_height = 0.05 + 0.175 * difficulty
-                discrete_obstacles_height = 0.025 + difficulty * 0.15
-                stepping_stones_size = 2 - 1.8 * difficulty
-                if choice < self.proportions[0]:
-                    if choice < 0.05:
-                        slope *= -1
-                    pyramid_sloped_terrain(terrain, slope=slope, platform_size=3.)
-                elif choice < self.proportions[1]:
-                    if choice < 0.15:
-                        slope *= -1
-                    pyramid_sloped_terrain(terrain, slope=slope, platform_size=3.)
-                    random_uniform_terrain(terrain, min_height=-0.1, max_height=0.1, step=0.025, downsampled_scale=0.2)
-                elif choice < self.proportions[3]:
-                    if choice<self.proportions[2]:
-                        step_height *= -1
-                    pyramid_stairs_terrain(terrain, step_width=0.31, step_height=step_height, platform_size=3.)
-                elif choice < self.proportions[4]:
-                    discrete_obstacles_terrain(terrain, discrete_obstacles_height, 1., 2., 40, platform_size=3.)
-                else:
-                    stepping_stones_terrain(terrain, stone_size=stepping_stones_size, stone_distance=0.1, max_height=0., platform_size=3.)
-
-                # Heightfield coordinate system
-                start_x = self.border + i * self.length_per_env_pixels
-                end_x = self.border + (i + 1) * self.length_per_env_pixels
-                start_y = self.border + j * self.width_per_env_pixels
-                end_y = self.border + (j + 1) * self.width_per_env_pixels
-                self.height_field_raw[start_x: end_x, start_y:end_y] = terrain.height_field_raw
-
-                robots_in_map = num_robots_per_map
-                if j < left_over:
-                    robots_in_map +=1
-
-                env_origin_x = (i + 0.5) * self.env_length
-                env_origin_y = (j + 0.5) * self.env_width
-                x1 = int((self.env_length/2. - 1) / self.horizontal_scale)
-                x2 = int((self.env_length/2. + 1) / self.horizontal_scale)
-                y1 = int((self.env_width/2. - 1) / self.horizontal_scale)
-                y2 = int((self.env_width/2. + 1) / self.horizontal_scale)
-                env_origin_z = np.max(terrain.height_field_raw[x1:x2, y1:y2])*self.vertical_scale
-                self.env_origins[i, j] = [env_origin_x, env_origin_y, env_origin_z]
+        self._generate_tiles("curriculum")
+
+    def _generate_tiles(self, mode):
+        """ Generates all sub-terrain tiles, in a process pool if more than one worker is configured.
+
+            Every tile is generated from its own seed. The seeds are drawn up front from the global
+            RNG in tile order, so the terrain does not depend on the number of workers.
+        """
+        tile_seeds = np.random.randint(0, 2**31 - 1, size=self.num_maps)
+        tiles = [(mode, i, j, int(tile_seeds[k])) for k, (i, j) in enumerate(np.ndindex(self.env_rows, self.env_cols))]
+        params = {
+            "border": self.border,
+            "width_per_env_pixels": self.width_per_env_pixels,
+            "length_per_env_pixels": self.length_per_env_pixels,
+            "horizontal_scale": self.horizontal_scale,
+            "vertical_scale": self.vertical_scale,
+            "env_length": self.env_length,
+            "env_width": self.env_width,
+            "num_levels": self.env_rows,
+            "num_terrains": self.env_cols,
+            "proportions": self.proportions,
+        }
+
+        if self.num_workers <= 1:
+            # tiles reseed the global RNG, restore it afterwards as a worker process would leave it untouched
+            rng_state = np.random.get_state()
+            origins = [_fill_tile(self.height_field_raw, params, *tile) for tile in tiles]
+            np.random.set_state(rng_state)
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=self.height_field_raw.nbytes)
+            try:
+                height_field = np.ndarray(self.height_field_raw.shape, dtype=self.height_field_raw.dtype, buffer=shm.buf)
+                height_field[:] = self.height_field_raw
+                args = [(shm.name, self.height_field_raw.shape, self.height_field_raw.dtype, params, tile) for tile in tiles]
+                # forking the multi-threaded simulator process can deadlock on locks held by other threads, so workers
+                # are spawned. They only import this module and the terrain primitives, and attach to the shared
+                # height field by name
+                with multiprocessing.get_context("spawn").Pool(self.num_workers) as pool:
+                    origins = pool.map(_fill_shared_tile, args)
+                self.height_field_raw[:] = height_field
+                del height_field
+            finally:
+                shm.close()
+                shm.unlink()
+
+        for (_, i, j, _), origin in zip(tiles, origins):
+            self.env_origins[i, j] = origin
+
+
+def _fill_shared_tile(args):
+    shm_name, shape, dtype, params, tile = args
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        height_field = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        origin = _fill_tile(height_field, params, *tile)
+        del height_field
+    finally:
+        shm.close()
+    return origin
+
+
+def _fill_tile(height_field_raw, params, mode, i, j, seed):
+    """ Generates tile (i, j) into height_field_raw and returns its env origin. """
+    np.random.seed(seed)
+    terrain = SubTerrain("terrain",
+                         width=params["width_per_env_pixels"],
+                         length=params["width_per_env_pixels"],
+                         vertical_scale=params["vertical_scale"],
+                         horizontal_scale=params["horizontal_scale"])
+    if mode == "curriculum":
+        _curriculum_sub_terrain(terrain, i / params["num_levels"], j / params["num_terrains"], params["proportions"])
+    else:
+        _random_sub_terrain(terrain)
+
+    # Heightfield coordinate system
+    start_x = params["border"] + i * params["length_per_env_pixels"]
+    end_x = params["border"] + (i + 1) * params["length_per_env_pixels"]
+    start_y = params["border"] + j * params["width_per_env_pixels"]
+    end_y = params["border"] + (j + 1) * params["width_per_env_pixels"]
+    height_field_raw[start_x: end_x, start_y:end_y] = terrain.height_field_raw
+
+    env_length = params["env_length"]
+    env_width = params["env_width"]
+    horizontal_scale = params["horizontal_scale"]
+    env_origin_x = (i + 0.5) * env_length
+    env_origin_y = (j + 0.5) * env_width
+    x1 = int((env_length/2. - 1) / horizontal_scale)
+    x2 = int((env_length/2. + 1) / horizontal_scale)
+    y1 = int((env_width/2. - 1) / horizontal_scale)
+    y2 = int((env_width/2. + 1) / horizontal_scale)
+    env_origin_z = np.max(terrain.height_field_raw[x1:x2, y1:y2])*params["vertical_scale"]
+    return [env_origin_x, env_origin_y, env_origin_z]
+
+
+def _random_sub_terrain(terrain):
+    choice = np.random.uniform(0, 1)
+    if choice < 0.1:
+        if np.random.choice([0, 1]):
+            pyramid_sloped_terrain(terrain, np.random.choice([-0.3, -0.2, 0, 0.2, 0.3]))
+            random_uniform_terrain(terrain, min_height=-0.1, max_height=0.1, step=0.05, downsampled_scale=0.2)
+        else:
+            pyramid_sloped_terrain(terrain, np.random.choice([-0.3, -0.2, 0, 0.2, 0.3]))
+    elif choice < 0.6:
+        # step_height = np.random.choice([-0.18, -0.15, -0.1, -0.05, 0.05, 0.1, 0.15, 0.18])
+        step_height = np.random.choice([-0.15, 0.15])
+        pyramid_stairs_terrain(terrain, step_width=0.31, step_height=step_height, platform_size=3.)
+    elif choice < 1.:
+        discrete_obstacles_terrain(terrain, 0.15, 1., 2., 40, platform_size=3.)
+
+
+def _curriculum_sub_terrain(terrain, difficulty, choice, proportions):
+    slope = difficulty * 0.4
+    step_height = 0.05 + 0.175 * difficulty
+    discrete_obstacles_height = 0.025 + difficulty * 0.15
+    stepping_stones_size = 2 - 1.8 * difficulty
+    if choice < proportions[0]:
+        if choice < 0.05:
+            slope *= -1
+        pyramid_sloped_terrain(terrain, slope=slope, platform_size=3.)
+    elif choice < proportions[1]:
+        if choice < 0.15:
+            slope *= -1
+        pyramid_sloped_terrain(terrain, slope=slope, platform_size=3.)
+        random_uniform_terrain(terrain, min_height=-0.1, max_height=0.1, step=0.025, downsampled_scale=0.2)
+    elif choice < proportions[3]:
+        if choice<proportions[2]:
+            step_height *= -1
+        pyramid_stairs_terrain(terrain, step_width=0.31, step_height=step_height, platform_size=3.)
+    elif choice < proportions[4]:
+        discrete_obstacles_terrain(terrain, discrete_obstacles_height, 1., 2., 40, platform_size=3.)
+    else:
+        stepping_stones_terrain(terrain, stone_size=stepping_stones_size, stone_distance=0.1, max_height=0., platform_size=3.)
@@ -0,0 +1,109 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import torch
+
+
+class HeightSampler:
+    """ Samples terrain heights below batches of world positions.
+
+        The height field is stored flattened as float so that every query is answered with a single
+        gather. In the default mode the height of a point is the minimum of the height field sample
+        it falls into and its diagonal neighbour, matching the original Anymal terrain lookups.
+        With bilinear=True the four surrounding samples are interpolated instead.
+
+    Args:
+        height_samples (torch.Tensor): height field of shape (num_rows, num_cols) in vertical_scale units.
+        horizontal_scale (float): horizontal size of a height field cell [meters].
+        vertical_scale (float): vertical size of a height field unit [meters].
+        border_size (float): offset of the world origin into the height field [meters].
+        bilinear (bool): interpolate between the four surrounding samples.
+    """
+
+    def __init__(self, height_samples, horizontal_scale, vertical_scale, border_size, bilinear=False) -> None:
+        self.num_rows, self.num_cols = height_samples.shape
+        self.horizontal_scale = horizontal_scale
+        self.vertical_scale = vertical_scale
+        self.border_size = border_size
+        self.bilinear = bilinear
+
+        self._heights = height_samples.to(dtype=torch.float).reshape(-1) * vertical_scale
+        device = self._heights.device
+        if bilinear:
+            self._corner_offsets = torch.tensor([0, 1, self.num_cols, self.num_cols + 1], device=device)
+        else:
+            self._corner_offsets = torch.tensor([0, self.num_cols + 1], device=device)
+
+    def sample(self, points) -> torch.Tensor:
+        """ Heights below points.
+
+        Args:
+            points (torch.Tensor): world positions of shape (..., 2) or (..., 3). Only x and y are used and points is not modified.
+
+        Returns:
+            heights(torch.Tensor): terrain heights of shape points.shape[:-1] [meters].
+        """
+        shape = points.shape[:-1]
+        xy = (points[..., :2].reshape(-1, 2) + self.border_size) / self.horizontal_scale
+
+        if self.bilinear:
+            cell = torch.floor(xy).long()
+            px = torch.clip(cell[:, 0], 0, self.num_rows - 2)
+            py = torch.clip(cell[:, 1], 0, self.num_cols - 2)
+            fx = torch.clip(xy[:, 0] - px, 0.0, 1.0).unsqueeze(1)
+            fy = torch.clip(xy[:, 1] - py, 0.0, 1.0).unsqueeze(1)
+        else:
+            px = torch.clip(xy[:, 0].long(), 0, self.num_rows - 2)
+            py = torch.clip(xy[:, 1].long(), 0, self.num_cols - 2)
+
+        corners = torch.take(self._heights, (px * self.num_cols + py).unsqueeze(1) + self._corner_offsets)
+
+        if self.bilinear:
+            h0 = torch.lerp(corners[:, 0:1], corners[:, 1:2], fy)
+            h1 = torch.lerp(corners[:, 2:3], corners[:, 3:4], fy)
+            heights = torch.lerp(h0, h1, fx).squeeze(1)
+        else:
+            heights = torch.min(corners, dim=1).values
+
+        return heights.view(shape)
+
+    def sample_many(self, *point_sets):
+        """ Heights below several point sets, answered with one batched lookup.
+
+        Args:
+            point_sets (torch.Tensor): world positions of shape (..., 2) or (..., 3), all of the same last dimension.
+
+        Returns:
+            heights(tuple): terrain heights for each point set, each of shape point_set.shape[:-1].
+        """
+        flat_points = [points.reshape(-1, points.shape[-1]) for points in point_sets]
+        heights = self.sample(torch.cat(flat_points, dim=0))
+        splits = heights.split([points.shape[0] for points in flat_points])
+        return tuple(h.view(points.shape[:-1]) for h, points in zip(splits, point_sets))
@@ -0,0 +1,80 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import numpy as np
+import torch
+
+
+class BatchedLidarReader:
+    """ Reads the linear depth data of many lidars into one persistent device tensor.
+
+        Every lidar writes its ranges into a row of a single host buffer (pinned when the
+        target device is a GPU), which is then uploaded to the device with one copy.
+        The backend only needs a ``get_linear_depth_data(path)`` method, so any object
+        mimicking the range sensor interface can be used in place of the simulator one.
+
+    Args:
+        lidar_interface: object providing ``get_linear_depth_data(path)``, e.g. the interface
+            returned by ``_range_sensor.acquire_lidar_sensor_interface()``.
+        lidar_paths (list): prim paths of the lidars, one per env.
+        ranges_count (int): number of range readings per lidar.
+        device (str): device of the ranges tensor.
+    """
+
+    def __init__(self, lidar_interface, lidar_paths, ranges_count, device) -> None:
+        self._lidar_interface = lidar_interface
+        self._lidar_paths = list(lidar_paths)
+        self._ranges_count = ranges_count
+        self._device = torch.device(device)
+
+        num_lidars = len(self._lidar_paths)
+        pin_memory = self._device.type == "cuda"
+        self._host_ranges = torch.zeros((num_lidars, ranges_count), dtype=torch.float, pin_memory=pin_memory)
+        self._host_ranges_np = self._host_ranges.numpy()
+        self.ranges = torch.zeros((num_lidars, ranges_count), dtype=torch.float, device=self._device)
+        # guards the host buffer against being overwritten while the previous upload is still in flight
+        self._upload_done = torch.cuda.Event() if pin_memory else None
+
+    def read(self) -> torch.Tensor:
+        """ Fetches the latest depth data of all lidars and uploads it to the device.
+
+        Returns:
+            ranges(torch.Tensor): Persistent tensor of shape (num_lidars, ranges_count) holding the ranges.
+        """
+        if self._upload_done is not None:
+            self._upload_done.synchronize()
+
+        for i, path in enumerate(self._lidar_paths):
+            self._host_ranges_np[i] = np.squeeze(self._lidar_interface.get_linear_depth_data(path))
+
+        self.ranges.copy_(self._host_ranges, non_blocking=True)
+        if self._upload_done is not None:
+            self._upload_done.record()
+        return self.ranges
@@ -0,0 +1,83 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+from collections import OrderedDict
+
+
+class ObservationLayout:
+    """ Named column slices of an observation buffer.
+
+        Components are laid out back to back in the order they are given, so a task can
+        write each component in place into its persistent buffer through ``view``
+        instead of concatenating freshly allocated tensors every step.
+
+    Args:
+        components (list): (name, size) pairs in buffer order.
+    """
+
+    def __init__(self, components) -> None:
+        self._slices = OrderedDict()
+        offset = 0
+        for name, size in components:
+            if name in self._slices:
+                raise ValueError(f"Duplicate observation component: {name}")
+            self._slices[name] = slice(offset, offset + size)
+            offset += size
+        self._size = offset
+
+    def __contains__(self, name) -> bool:
+        return name in self._slices
+
+    @property
+    def size(self) -> int:
+        """ Total number of columns covered by the layout. """
+        return self._size
+
+    @property
+    def names(self) -> list:
+        """ Component names in buffer order. """
+        return list(self._slices.keys())
+
+    def slice(self, name) -> slice:
+        return self._slices[name]
+
+    def view(self, buf, name):
+        """ Returns the columns of ``buf`` holding ``name``. Writing to the view writes into ``buf``. """
+        return buf[..., self._slices[name]]
+
+    def copy_components(self, src_buf, dst_layout, dst_buf) -> None:
+        """ Copies every component shared with ``dst_layout`` from ``src_buf`` into ``dst_buf``. """
+        for name in self._slices:
+            if name in dst_layout:
+                dst_layout.view(dst_buf, name).copy_(self.view(src_buf, name))
+
+    def as_dict(self) -> dict:
+        """ Layout metadata as {name: [start, stop]}, e.g. for exporting alongside a policy. """
+        return {name: [s.start, s.stop] for name, s in self._slices.items()}
@@ -0,0 +1,122 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+
+from omniisaacgymenvs.utils.domain_randomization.adr import ADRController
+
+
+class FakeRandomizer():
+    """ Stand-in for Randomizer holding plain distribution parameters, and recording what ADR sets. """
+
+    def __init__(self, distributions):
+        self.types = {path: distribution for path, (distribution, _) in distributions.items()}
+        self.initial = {path: np.array(params, dtype=float) for path, (_, params) in distributions.items()}
+        self.current = {path: params.copy() for path, params in self.initial.items()}
+
+    def get_dr_distribution_parameters(self, *path):
+        return self.current[path].tolist()
+
+    def set_dr_distribution_parameters(self, distribution_parameters, *path):
+        self.current[path] = np.array(distribution_parameters, dtype=float)
+
+    def get_initial_dr_distribution_parameters(self, *path):
+        return self.initial[path].copy()
+
+    def get_dr_distribution_type(self, *path):
+        return self.types[path]
+
+
+PATH = ("rigid_prim_views", "object", "mass", "on_reset")
+
+
+def make_adr(distribution, params, index, limit, pin=None, queue_length=1):
+    randomizer = FakeRandomizer({PATH: (distribution, params)})
+    param = {"path": list(PATH), "index": index, "delta": 0.1, "limit": limit}
+    if pin is not None:
+        param["pin"] = pin
+    adr_config = {
+        "boundary_prob": 1.0,
+        "queue_length": queue_length,
+        "update_interval": 1,
+        "performance_thresholds": [0.0, 10.0],
+        "params": {"mass": param},
+    }
+    return randomizer, ADRController(randomizer, adr_config, num_envs=1, device="cpu")
+
+
+def run_window(adr, episode_return):
+    # the episode ending on the first step started in the previous window and is not counted, the second one is
+    adr.step(torch.tensor([-100.0]), torch.tensor([1]))
+    adr.step(torch.tensor([episode_return]), torch.tensor([1]))
+
+
+def test_lower_bound_widens_down_to_limit():
+    _, adr = make_adr("uniform", [1.0, 2.0], index=0, limit=0.5)
+    run_window(adr, 20.0)
+    assert adr._distribution_parameters[PATH][0] == pytest.approx(0.9)
+    for _ in range(10):
+        run_window(adr, 20.0)
+    assert adr._distribution_parameters[PATH][0] == pytest.approx(0.5)
+
+
+def test_upper_bound_widens_up_and_narrows_back_to_initial():
+    _, adr = make_adr("uniform", [1.0, 2.0], index=1, limit=3.0)
+    for _ in range(3):
+        run_window(adr, 20.0)
+    assert adr._distribution_parameters[PATH][1] == pytest.approx(2.3)
+    for _ in range(5):
+        run_window(adr, -20.0)
+    assert adr._distribution_parameters[PATH][1] == pytest.approx(2.0)
+
+
+def test_return_between_thresholds_keeps_parameter():
+    _, adr = make_adr("uniform", [1.0, 2.0], index=0, limit=0.5)
+    run_window(adr, 5.0)
+    assert adr._distribution_parameters[PATH][0] == pytest.approx(1.0)
+    assert adr.performance == pytest.approx(5.0)
+
+
+def test_uniform_is_pinned_to_evaluated_bound_and_restored():
+    randomizer, adr = make_adr("uniform", [1.0, 2.0], index=0, limit=0.5)
+    np.testing.assert_allclose(randomizer.current[PATH], [1.0, 1.0])
+    run_window(adr, 20.0)
+    # the updated range is restored before the next window pins it again
+    np.testing.assert_allclose(randomizer.current[PATH], [0.9, 0.9])
+    np.testing.assert_allclose(adr._distribution_parameters[PATH], [0.9, 2.0])
+
+
+def test_gaussian_mean_is_pinned_with_zero_std():
+    randomizer, adr = make_adr("gaussian", [0.0, 0.2], index=0, limit=1.0)
+    np.testing.assert_allclose(randomizer.current[PATH], [0.0, 0.0])
+    run_window(adr, 20.0)
+    np.testing.assert_allclose(randomizer.current[PATH], [0.1, 0.0])
+    np.testing.assert_allclose(adr._distribution_parameters[PATH], [0.1, 0.2])
+
+
+def test_gaussian_std_is_not_pinned():
+    randomizer, adr = make_adr("gaussian", [0.0, 0.2], index=1, limit=0.5)
+    np.testing.assert_allclose(randomizer.current[PATH], [0.0, 0.2])
+    run_window(adr, 20.0)
+    np.testing.assert_allclose(randomizer.current[PATH], [0.0, 0.3])
+    with pytest.raises(ValueError):
+        make_adr("gaussian", [0.0, 0.2], index=1, limit=0.5, pin=True)
+
+
+def test_window_waits_for_queue_length_episodes():
+    _, adr = make_adr("uniform", [1.0, 2.0], index=0, limit=0.5, queue_length=2)
+    run_window(adr, 20.0)
+    # only one episode finished inside the window so far
+    assert adr._distribution_parameters[PATH][0] == pytest.approx(1.0)
+    adr.step(torch.tensor([30.0]), torch.tensor([1]))
+    assert adr.performance == pytest.approx(25.0)
+    assert adr._distribution_parameters[PATH][0] == pytest.approx(0.9)
+
+
+def test_log_dict_reports_current_values():
+    _, adr = make_adr("uniform", [1.0, 2.0], index=0, limit=0.5)
+    run_window(adr, 20.0)
+    extras = {}
+    adr.step(torch.tensor([0.0]), torch.tensor([0]), extras)
+    assert extras["adr/mass"] == pytest.approx(0.9)
+    assert extras["adr/performance"] == pytest.approx(20.0)
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+pytest.importorskip("scipy")
+
+from omniisaacgymenvs.tasks.utils.anymal_terrain_generator import Terrain, TerrainCache
+
+
+def terrain_cfg(curriculum, workers):
+    return {
+        "curriculum": curriculum,
+        "mapLength": 8.0,
+        "mapWidth": 8.0,
+        "numLevels": 3,
+        "numTerrains": 4,
+        "terrainProportions": [0.1, 0.1, 0.35, 0.25, 0.2],
+        "slopeTreshold": 0.5,
+        "generationWorkers": workers,
+    }
+
+
+@pytest.mark.parametrize("curriculum", [True, False])
+def test_worker_count_does_not_change_terrain(curriculum):
+    np.random.seed(42)
+    serial = Terrain(terrain_cfg(curriculum, workers=1), num_robots=48)
+    np.random.seed(42)
+    parallel = Terrain(terrain_cfg(curriculum, workers=3), num_robots=48)
+
+    np.testing.assert_array_equal(serial.height_field_raw, parallel.height_field_raw)
+    np.testing.assert_array_equal(serial.env_origins, parallel.env_origins)
+    np.testing.assert_array_equal(serial.vertices, parallel.vertices)
+    np.testing.assert_array_equal(serial.triangles, parallel.triangles)
+
+
+def test_cached_terrain_matches_generated_terrain(tmp_path):
+    cfg = terrain_cfg(True, workers=1)
+    generated = Terrain(dict(cfg, cacheDir=str(tmp_path)), num_robots=48, seed=7)
+    cached = Terrain(dict(cfg, cacheDir=str(tmp_path)), num_robots=48, seed=7)
+
+    assert len([name for name in tmp_path.iterdir() if not name.name.startswith(".")]) == 1
+    np.testing.assert_array_equal(generated.height_field_raw, cached.height_field_raw)
+    np.testing.assert_array_equal(generated.env_origins, cached.env_origins)
+    np.testing.assert_array_equal(generated.vertices, cached.vertices)
+    np.testing.assert_array_equal(generated.triangles, cached.triangles)
+
+
+def cache_entry(num_vertices):
+    return {
+        "height_field_raw": np.zeros((4, 4), dtype=np.int16),
+        "vertices": np.zeros((num_vertices, 3), dtype=np.float32),
+        "triangles": np.zeros((2, 3), dtype=np.uint32),
+        "env_origins": np.zeros((1, 1, 3)),
+    }
+
+
+def test_cache_skips_entries_larger_than_the_limit(tmp_path, capsys):
+    cache = TerrainCache(str(tmp_path), max_size_mb=1)
+    cache.store("small", lambda output_dir: cache_entry(16))
+    cache.store("large", lambda output_dir: cache_entry(2**17))
+
+    assert "not caching it" in capsys.readouterr().out
+    assert cache.load("large") is None
+    assert cache.load("small")["vertices"].shape == (16, 3)
+    assert sorted(os.listdir(str(tmp_path))) == ["small"]
@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pytest.importorskip("omni.isaac.core")
+
+from omniisaacgymenvs.robots.controllers.differential_controller import DifferentialController
+
+
+def scalar_forward(controller, commands):
+    return torch.stack([controller.forward(command) for command in commands.numpy()]).to(commands.dtype)
+
+
+@pytest.mark.parametrize(
+    "limits",
+    [
+        {},
+        {"max_linear_speed": 0.3},
+        {"max_angular_speed": 0.5},
+        {"max_wheel_speed": 2.0},
+        {"max_linear_speed": 0.3, "max_angular_speed": 0.5, "max_wheel_speed": 2.0},
+    ],
+)
+def test_forward_batch_matches_forward(limits):
+    controller = DifferentialController("diff", wheel_radius=0.03, wheel_base=0.1125, **limits)
+    generator = torch.Generator().manual_seed(0)
+    commands = torch.rand((256, 2), generator=generator, dtype=torch.float64) * 4.0 - 2.0
+    torch.testing.assert_close(controller.forward_batch(commands), scalar_forward(controller, commands))
+
+
+def test_forward_batch_clips_at_the_limits():
+    controller = DifferentialController(
+        "diff", wheel_radius=0.5, wheel_base=1.0, max_linear_speed=1.0, max_angular_speed=1.0, max_wheel_speed=2.5
+    )
+    commands = torch.tensor([[5.0, 0.0], [-5.0, 0.0], [0.0, 5.0], [1.0, 1.0], [-1.0, -1.0]], dtype=torch.float64)
+    expected = torch.tensor([[2.0, 2.0], [-2.0, -2.0], [-1.0, 1.0], [1.0, 2.5], [-1.0, -2.5]], dtype=torch.float64)
+    torch.testing.assert_close(controller.forward_batch(commands), expected)
+    torch.testing.assert_close(scalar_forward(controller, commands), expected)
+
+
+def test_forward_batch_rejects_bad_shapes():
+    controller = DifferentialController("diff", wheel_radius=0.03, wheel_base=0.1125)
+    with pytest.raises(Exception):
+        controller.forward_batch(torch.zeros(2))
+    with pytest.raises(Exception):
+        controller.forward_batch(torch.zeros((4, 3)))
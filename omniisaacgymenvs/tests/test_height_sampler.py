@@ -0,0 +1,96 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from omniisaacgymenvs.tasks.utils.height_sampler import HeightSampler
+
+
+def reference_heights(height_samples, points, border_size, horizontal_scale, vertical_scale):
+    """ The lookup AnymalTerrainTask.get_heights did before HeightSampler, kept verbatim for parity. """
+    points = points.clone()
+    points += border_size
+    points = (points/horizontal_scale).long()
+    px = points[:, :, 0].view(-1)
+    py = points[:, :, 1].view(-1)
+    px = torch.clip(px, 0, height_samples.shape[0]-2)
+    py = torch.clip(py, 0, height_samples.shape[1]-2)
+
+    heights1 = height_samples[px, py]
+    heights2 = height_samples[px+1, py+1]
+    heights = torch.min(heights1, heights2)
+    return heights.view(points.shape[0], -1) * vertical_scale
+
+
+def synthetic_height_samples(num_rows=12, num_cols=15, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randint(-200, 200, (num_rows, num_cols), generator=generator, dtype=torch.int16)
+
+
+def test_default_mode_matches_min_of_two_neighbours():
+    height_samples = synthetic_height_samples()
+    sampler = HeightSampler(height_samples, horizontal_scale=0.1, vertical_scale=0.005, border_size=0.3)
+
+    generator = torch.Generator().manual_seed(1)
+    # spans the whole grid and beyond it on every side, so clamped points are covered as well
+    points = torch.rand((8, 17, 3), generator=generator) * 2.4 - 0.7
+    original = points.clone()
+
+    heights = sampler.sample(points)
+    expected = reference_heights(height_samples, points, 0.3, 0.1, 0.005)
+    assert heights.shape == (8, 17)
+    assert torch.equal(heights, expected)
+    assert torch.equal(points, original)
+
+
+def test_bilinear_interpolates_linear_field_exactly():
+    # h = 3 * row + col, which bilinear interpolation reproduces exactly inside the grid
+    height_samples = torch.arange(9, dtype=torch.int16).view(3, 3)
+    sampler = HeightSampler(height_samples, horizontal_scale=1.0, vertical_scale=1.0, border_size=0.0, bilinear=True)
+
+    points = torch.tensor([
+        [0.5, 0.5],
+        [1.25, 0.75],
+        # upper grid edge, falls into the last cell with a fraction of 1
+        [2.0, 2.0],
+        [1.5, 2.0],
+        # outside the grid, clamped to the nearest edge
+        [-1.0, -1.0],
+        [5.0, 0.5],
+        [5.0, 5.0],
+        [0.5, -3.0],
+    ])
+    expected = torch.tensor([2.0, 4.5, 8.0, 6.5, 0.0, 6.5, 8.0, 1.5])
+    assert torch.allclose(sampler.sample(points), expected)
+
+
+def test_bilinear_hand_computed_values():
+    height_samples = torch.tensor([[0, 4], [2, 10]], dtype=torch.int16)
+    sampler = HeightSampler(height_samples, horizontal_scale=0.5, vertical_scale=0.1, border_size=1.0, bilinear=True)
+
+    # world (x, y) maps to cell coordinates ((x + 1) / 0.5, (y + 1) / 0.5)
+    points = torch.tensor([
+        [-0.75, -0.75],  # (0.5, 0.5)
+        [-0.875, -0.625],  # (0.25, 0.75)
+        [-1.0, -1.0],  # (0, 0) corner
+        [-0.5, -0.5],  # (1, 1) corner
+        [-0.5, -0.75],  # (1, 0.5) edge
+    ])
+    # lerp along y first: h0 = 0 + fy * 4, h1 = 2 + fy * 8, then along x
+    expected = torch.tensor([4.0, 4.25, 0.0, 10.0, 6.0]) * 0.1
+    assert torch.allclose(sampler.sample(points), expected)
+
+
+def test_sample_many_matches_separate_lookups():
+    height_samples = synthetic_height_samples()
+    for bilinear in (False, True):
+        sampler = HeightSampler(height_samples, 0.1, 0.005, 0.3, bilinear=bilinear)
+        generator = torch.Generator().manual_seed(2)
+        scan = torch.rand((4, 10, 3), generator=generator) * 1.5 - 0.3
+        knees = torch.rand((16, 3), generator=generator) * 1.5 - 0.3
+        base = torch.rand((4, 3), generator=generator) * 1.5 - 0.3
+
+        scan_heights, knee_heights, base_heights = sampler.sample_many(scan, knees, base)
+        assert torch.equal(scan_heights, sampler.sample(scan))
+        assert torch.equal(knee_heights, sampler.sample(knees))
+        assert torch.equal(base_heights, sampler.sample(base))
+        assert knee_heights.shape == (16,) and base_heights.shape == (4,)
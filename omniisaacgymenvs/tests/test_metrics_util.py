@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+
+from omniisaacgymenvs.utils.metrics_util import MemorySink, MetricsBuffer
+
+
+def test_means_of_tensors_scalars_and_nested_extras():
+    sink = MemorySink()
+    metrics = MetricsBuffer([sink], device="cpu", flush_steps=2)
+    metrics.add({"reward": torch.tensor([1.0, 3.0]), "length": 10, "episode": {"success": np.float32(0.5)}})
+    metrics.step()
+    metrics.add({"reward": torch.tensor(5.0), "length": 20, "empty": torch.zeros(0)})
+    metrics.step()
+
+    assert sink.records == [(2, {"reward": 3.0, "length": 15.0, "episode/success": 0.5})]
+
+
+def test_flush_at_explicit_step_and_reset():
+    sink = MemorySink()
+    metrics = MetricsBuffer([sink], device="cpu", flush_steps=None)
+    metrics.add({"reward": torch.tensor([2.0, 4.0])})
+    metrics.flush(7)
+    # nothing was added since the last flush, so there is nothing to write
+    metrics.flush(8)
+    metrics.add({"length": 3})
+    metrics.flush(9)
+
+    assert sink.records == [(7, {"reward": 3.0}), (9, {"length": 3.0})]
+
+
+def test_close_flushes_and_closes_sinks():
+    class ClosingSink(MemorySink):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    sink = ClosingSink()
+    metrics = MetricsBuffer([sink], device="cpu", flush_steps=100)
+    metrics.add({"reward": 1.0})
+    metrics.step()
+    metrics.close()
+
+    assert sink.records == [(1, {"reward": 1.0})]
+    assert sink.closed
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from omniisaacgymenvs.envs.mt_pipeline import StepPipeline
+
+
+class StandInSim(threading.Thread):
+    """ Simulation side of a StepPipeline whose observations hold the index of the step that wrote them. """
+
+    def __init__(self, pipeline, num_envs=4, num_observations=3):
+        super().__init__(daemon=True)
+        self._pipeline = pipeline
+        self.obs_buf = torch.zeros((num_envs, num_observations))
+        self.rew_buf = torch.zeros(num_envs)
+        self.reset_buf = torch.zeros(num_envs, dtype=torch.long)
+        self.num_steps = 0
+        self.received_actions = []
+
+    def run(self):
+        while True:
+            actions = self._pipeline.get_actions()
+            if actions is None:
+                return
+            self.received_actions.append(actions.clone())
+            self.num_steps += 1
+            # the sim keeps writing into the same buffers, like a task does
+            self.obs_buf.fill_(self.num_steps)
+            self.rew_buf.fill_(-self.num_steps)
+            self._pipeline.send_data({
+                "obs": self.obs_buf,
+                "rew": self.rew_buf,
+                "reset": self.reset_buf,
+                "extras": {"step": self.num_steps},
+            })
+
+
+def start(pipeline):
+    sim = StandInSim(pipeline)
+    sim.start()
+    return sim
+
+
+def test_step_data_stays_valid_until_the_next_step():
+    pipeline = StepPipeline("cpu", timeout=5)
+    sim = start(pipeline)
+
+    pipeline.send_actions(torch.full((4, 2), 1.0))
+    first = pipeline.get_data()
+    first_obs, first_rew = first["obs"], first["rew"]
+    assert first["extras"]["step"] == 1
+    assert torch.all(first_obs == 1)
+    # the learner gets copies, not the buffers the sim keeps writing into
+    assert first_obs.data_ptr() != sim.obs_buf.data_ptr()
+
+    pipeline.send_actions(torch.full((4, 2), 2.0))
+    second = pipeline.get_data()
+    assert second["extras"]["step"] == 2
+    assert torch.all(second["obs"] == 2)
+    # the previous step's tensors were not overwritten while the next step was written
+    assert torch.all(first_obs == 1)
+    assert torch.all(first_rew == -1)
+
+    for step in range(3, 7):
+        pipeline.send_actions(torch.full((4, 2), float(step)))
+        data = pipeline.get_data()
+        assert torch.all(data["obs"] == step)
+        assert torch.all(data["rew"] == -step)
+
+    pipeline.stop()
+    sim.join(timeout=5)
+    assert not sim.is_alive()
+    assert [actions[0, 0].item() for actions in sim.received_actions] == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+
+def test_stop_unblocks_a_learner_waiting_for_data():
+    pipeline = StepPipeline("cpu", timeout=10)
+    sim = start(pipeline)
+    results = []
+
+    # no actions are sent, so the learner waits until the pipeline is stopped
+    learner = threading.Thread(target=lambda: results.append(pipeline.get_data()), daemon=True)
+    learner.start()
+    learner.join(timeout=0.1)
+    assert learner.is_alive()
+
+    pipeline.stop()
+    learner.join(timeout=5)
+    sim.join(timeout=5)
+    assert not learner.is_alive() and not sim.is_alive()
+    assert results == [None]
+
+
+def test_learner_timeout_raises():
+    pipeline = StepPipeline("cpu", timeout=0.05)
+    with pytest.raises(TimeoutError):
+        pipeline.get_data()
+
+
+def test_actions_timeout_is_opt_in():
+    pipeline = StepPipeline("cpu", actions_timeout=0.05)
+    with pytest.raises(TimeoutError):
+        pipeline.get_actions()
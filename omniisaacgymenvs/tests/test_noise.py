@@ -0,0 +1,142 @@
+import math
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from omniisaacgymenvs.utils.domain_randomization.noise import NoiseGenerator
+
+
+NUM_ENVS = 8
+DIMENSION = 5
+SEED = 7
+
+PARAMETERS = {
+    "gaussian": [0.5, 0.2],
+    "uniform": [-0.3, 0.4],
+    "loguniform": [0.5, 2.0],
+}
+
+
+def old_noise(distribution, distribution_parameters, size):
+    """ Noise as the per-call Randomizer drew it before NoiseGenerator. """
+    if distribution == "gaussian":
+        return torch.normal(mean=distribution_parameters[0], std=distribution_parameters[1], size=size)
+    elif distribution == "uniform":
+        return (distribution_parameters[1] - distribution_parameters[0]) * torch.rand(size) + distribution_parameters[0]
+    return torch.exp((math.log(distribution_parameters[1]) - math.log(distribution_parameters[0])) * torch.rand(size)
+        + math.log(distribution_parameters[0]))
+
+
+def make_generator(distribution="gaussian", operation="additive", pool_size=0, distribution_parameters=None):
+    if distribution_parameters is None:
+        distribution_parameters = PARAMETERS[distribution]
+    return NoiseGenerator(distribution, operation, distribution_parameters, NUM_ENVS, DIMENSION, "cpu", pool_size=pool_size)
+
+
+@pytest.mark.parametrize("operation", ["additive", "scaling"])
+@pytest.mark.parametrize("distribution", ["gaussian", "uniform", "loguniform"])
+def test_apply_matches_the_old_randomizer(distribution, operation):
+    buffer = torch.rand((NUM_ENVS, DIMENSION)) + 1.0
+    generator = make_generator(distribution, operation)
+
+    torch.manual_seed(SEED)
+    noise = old_noise(distribution, PARAMETERS[distribution], (NUM_ENVS, DIMENSION))
+    expected = buffer + noise if operation == "additive" else buffer * noise
+
+    torch.manual_seed(SEED)
+    result = generator.apply(buffer)
+
+    assert result is buffer
+    torch.testing.assert_close(buffer, expected)
+
+
+@pytest.mark.parametrize("distribution", ["gaussian", "uniform", "loguniform"])
+def test_per_dimension_parameters(distribution):
+    low, high = PARAMETERS[distribution]
+    distribution_parameters = [[low] * DIMENSION, [high] * DIMENSION]
+    distribution_parameters[1][0] = high * 2
+    generator = make_generator(distribution, distribution_parameters=distribution_parameters)
+
+    torch.manual_seed(SEED)
+    noise = generator.sample().clone()
+    torch.manual_seed(SEED)
+    expected = old_noise(distribution, [low, high], (NUM_ENVS, DIMENSION))
+
+    torch.testing.assert_close(noise[:, 1:], expected[:, 1:])
+    assert not torch.allclose(noise[:, 0], expected[:, 0])
+
+
+def test_invalid_arguments_raise():
+    with pytest.raises(ValueError):
+        make_generator("poisson", distribution_parameters=[0.0, 1.0])
+    with pytest.raises(ValueError):
+        make_generator(operation="offset")
+    with pytest.raises(ValueError):
+        make_generator(distribution_parameters=[[0.0, 0.0], [1.0, 1.0]])
+
+
+@pytest.mark.parametrize("operation", ["additive", "scaling"])
+def test_masked_envs_stay_untouched(operation):
+    buffer = torch.rand((NUM_ENVS, DIMENSION)) + 1.0
+    original = buffer.clone()
+    mask = torch.tensor([True, False, True, False, False, True, False, False])
+    generator = make_generator("uniform", operation)
+
+    torch.manual_seed(SEED)
+    noise = old_noise("uniform", PARAMETERS["uniform"], (NUM_ENVS, DIMENSION))
+    torch.manual_seed(SEED)
+    generator.apply(buffer, mask)
+
+    assert torch.equal(buffer[~mask], original[~mask])
+    expected = original[mask] + noise[mask] if operation == "additive" else original[mask] * noise[mask]
+    torch.testing.assert_close(buffer[mask], expected)
+
+
+@pytest.mark.parametrize("operation", ["additive", "scaling"])
+def test_correlated_noise_is_resampled_only_on_reset(operation):
+    generator = make_generator("gaussian", operation)
+    reset = torch.tensor([True, True, False, False, True, False, True, False])
+
+    # before their first reset, envs carry the identity noise
+    buffer = torch.ones((NUM_ENVS, DIMENSION))
+    torch.manual_seed(SEED)
+    generator.apply_correlated(buffer, reset)
+    torch.manual_seed(SEED)
+    first_noise = old_noise("gaussian", PARAMETERS["gaussian"], (NUM_ENVS, DIMENSION))
+    expected = 1.0 + first_noise if operation == "additive" else first_noise
+    torch.testing.assert_close(buffer[reset], expected[reset])
+    assert torch.equal(buffer[~reset], torch.ones_like(buffer[~reset]))
+
+    # without resets every env keeps its noise
+    correlated = generator._correlated_noise.clone()
+    buffer = torch.ones((NUM_ENVS, DIMENSION))
+    generator.apply_correlated(buffer, torch.zeros(NUM_ENVS, dtype=torch.bool))
+    assert torch.equal(generator._correlated_noise, correlated)
+    torch.testing.assert_close(buffer, 1.0 + correlated if operation == "additive" else correlated)
+
+    # a second reset only resamples the envs it selects
+    second_reset = torch.zeros(NUM_ENVS, dtype=torch.bool)
+    second_reset[2] = True
+    generator.apply_correlated(torch.ones((NUM_ENVS, DIMENSION)), second_reset)
+    assert torch.equal(generator._correlated_noise[~second_reset], correlated[~second_reset])
+    assert not torch.equal(generator._correlated_noise[second_reset], correlated[second_reset])
+
+
+def test_pool_is_refilled_once_exhausted():
+    pool_size = 3
+    generator = make_generator("uniform", pool_size=pool_size)
+    low, high = PARAMETERS["uniform"]
+
+    torch.manual_seed(SEED)
+    first_pool = torch.rand((pool_size, NUM_ENVS, DIMENSION))
+    second_pool = torch.rand((pool_size, NUM_ENVS, DIMENSION))
+
+    torch.manual_seed(SEED)
+    for frame in range(pool_size):
+        torch.testing.assert_close(generator.sample(), (high - low) * first_pool[frame] + low)
+    assert generator._pool_index == pool_size
+
+    # the first sample after the pool is used up draws a whole new pool in one call
+    torch.testing.assert_close(generator.sample(), (high - low) * second_pool[0] + low)
+    assert generator._pool_index == 1
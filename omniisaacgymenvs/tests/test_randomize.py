@@ -0,0 +1,87 @@
+import copy
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pytest.importorskip("omni.replicator.isaac")
+
+from omniisaacgymenvs.utils.domain_randomization.randomize import Randomizer
+
+
+NUM_ENVS = 4
+NUM_OBSERVATIONS = 6
+
+
+class FakeSimConfig():
+    def __init__(self, observations_params):
+        self.task_config = {
+            "env": {"numEnvs": NUM_ENVS},
+            "domain_randomization": {
+                "randomize": True,
+                "randomization_params": {"observations": observations_params},
+            },
+        }
+        self.config = {"rl_device": "cpu", "seed": 0}
+
+
+class FakeTask():
+    num_observations = NUM_OBSERVATIONS
+    randomize_observations = False
+
+
+def make_randomizer(observations_params):
+    randomizer = Randomizer(FakeSimConfig(observations_params))
+    randomizer._set_up_observations_randomization(FakeTask())
+    return randomizer
+
+
+def test_dimension_parameters_can_be_changed_at_runtime():
+    observations_params = {
+        "on_interval": {
+            "frequency_interval": 1,
+            "operation": "additive",
+            "distribution": "uniform",
+            "distribution_parameters": [-0.1, 0.1],
+            "dimension_parameters": [{"indices": [0, 2], "distribution_parameters": [-0.5, 0.5]}],
+        }
+    }
+    config = copy.deepcopy(observations_params)
+    randomizer = make_randomizer(observations_params)
+    path = ("observations", "on_interval")
+
+    # the task config is not modified
+    assert observations_params == config
+
+    expected = np.array([[-0.5, -0.5, -0.1, -0.1, -0.1, -0.1], [0.5, 0.5, 0.1, 0.1, 0.1, 0.1]])
+    np.testing.assert_allclose(randomizer.get_dr_distribution_parameters(*path), expected)
+    np.testing.assert_allclose(randomizer.get_initial_dr_distribution_parameters(*path), expected)
+
+    generator = randomizer._observations_noise["on_interval"]
+    scale, shift = generator._scale, generator._shift
+    old_scale, old_shift = scale.clone(), shift.clone()
+    torch.testing.assert_close(scale, torch.tensor(expected[1] - expected[0], dtype=torch.float))
+
+    # widen the range of columns 4 and 5 only
+    params = np.array(randomizer.get_dr_distribution_parameters(*path))
+    params[:, 4:] = [[-0.3], [0.3]]
+    randomizer.set_dr_distribution_parameters(params.tolist(), *path)
+
+    np.testing.assert_allclose(randomizer.get_dr_distribution_parameters(*path), params)
+    # the initial parameters and the config keep the old values
+    np.testing.assert_allclose(randomizer.get_initial_dr_distribution_parameters(*path), expected)
+    assert observations_params == config
+
+    # the noise generator buffers are updated in place, and only the targeted columns change
+    assert generator._scale is scale and generator._shift is shift
+    assert torch.equal(scale[:4], old_scale[:4]) and torch.equal(shift[:4], old_shift[:4])
+    torch.testing.assert_close(scale[4:], torch.full((2,), 0.6))
+    torch.testing.assert_close(shift[4:], torch.full((2,), -0.3))
+
+
+def test_invalid_parameter_shape_raises():
+    observations_params = {
+        "on_reset": {"operation": "scaling", "distribution": "gaussian", "distribution_parameters": [[1.0, 1.0], [0.1, 0.1]]}
+    }
+    with pytest.raises(ValueError):
+        make_randomizer(observations_params)
@@ -0,0 +1,105 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from omniisaacgymenvs.utils.terrain_utils.terrain_utils import (
+    SubTerrain,
+    discrete_obstacles_terrain,
+    pyramid_stairs_terrain,
+    stairs_terrain,
+    stepping_stones_terrain,
+)
+
+
+def reference_stairs_terrain(terrain, step_width, step_height):
+    """ The loop based stairs_terrain the vectorized one replaced, kept verbatim for parity. """
+    step_width = int(step_width / terrain.horizontal_scale)
+    step_height = int(step_height / terrain.vertical_scale)
+
+    num_steps = terrain.width // step_width
+    height = step_height
+    for i in range(num_steps):
+        terrain.height_field_raw[i * step_width: (i + 1) * step_width, :] += height
+        height += step_height
+    return terrain
+
+
+def reference_pyramid_stairs_terrain(terrain, step_width, step_height, platform_size=1.):
+    """ The loop based pyramid_stairs_terrain the vectorized one replaced, kept verbatim for parity. """
+    step_width = int(step_width / terrain.horizontal_scale)
+    step_height = int(step_height / terrain.vertical_scale)
+    platform_size = int(platform_size / terrain.horizontal_scale)
+
+    height = 0
+    start_x = 0
+    stop_x = terrain.width
+    start_y = 0
+    stop_y = terrain.length
+    while (stop_x - start_x) > platform_size and (stop_y - start_y) > platform_size:
+        start_x += step_width
+        stop_x -= step_width
+        start_y += step_width
+        stop_y -= step_width
+        height += step_height
+        terrain.height_field_raw[start_x: stop_x, start_y: stop_y] = height
+    return terrain
+
+
+def make_pair(width, length, initial=None):
+    terrains = [SubTerrain(width=width, length=length, vertical_scale=0.005, horizontal_scale=0.1) for _ in range(2)]
+    if initial is not None:
+        for terrain in terrains:
+            terrain.height_field_raw[:] = initial
+    return terrains
+
+
+SIZES = [(80, 80), (81, 80), (80, 97), (33, 120), (16, 16)]
+
+
+@pytest.mark.parametrize("width,length", SIZES)
+@pytest.mark.parametrize("step_width,step_height", [(0.31, 0.05), (0.5, -0.1), (0.3, 0.2), (2.0, 0.1), (20.0, 0.1)])
+def test_stairs_is_bit_exact(width, length, step_width, step_height):
+    # a rough base checks that the stairs are added on top of the existing heights
+    initial = np.random.default_rng(0).integers(-20, 20, size=(width, length))
+    terrain, reference = make_pair(width, length, initial)
+    stairs_terrain(terrain, step_width, step_height)
+    reference_stairs_terrain(reference, step_width, step_height)
+    np.testing.assert_array_equal(terrain.height_field_raw, reference.height_field_raw)
+    assert terrain.height_field_raw.dtype == reference.height_field_raw.dtype
+
+
+@pytest.mark.parametrize("width,length", SIZES)
+@pytest.mark.parametrize("step_width,step_height", [(0.31, 0.05), (0.5, -0.1), (0.3, 0.2), (2.0, 0.1)])
+@pytest.mark.parametrize("platform_size", [0.0, 1.0, 3.0, 20.0])
+def test_pyramid_stairs_is_bit_exact(width, length, step_width, step_height, platform_size):
+    initial = np.random.default_rng(1).integers(-20, 20, size=(width, length))
+    terrain, reference = make_pair(width, length, initial)
+    pyramid_stairs_terrain(terrain, step_width, step_height, platform_size)
+    reference_pyramid_stairs_terrain(reference, step_width, step_height, platform_size)
+    np.testing.assert_array_equal(terrain.height_field_raw, reference.height_field_raw)
+
+
+def test_discrete_obstacles_heights_and_platform():
+    np.random.seed(0)
+    terrain = make_pair(80, 80)[0]
+    discrete_obstacles_terrain(terrain, 0.2, 1.0, 2.0, 20, platform_size=3.0)
+    max_height = int(0.2 / terrain.vertical_scale)
+    assert set(np.unique(terrain.height_field_raw)) <= {0, -max_height, -max_height // 2, max_height // 2, max_height}
+    assert np.all(terrain.height_field_raw[25:55, 25:55] == 0)
+    assert np.any(terrain.height_field_raw != 0)
+
+
+@pytest.mark.parametrize("width,length", [(80, 80), (60, 90), (90, 60)])
+def test_stepping_stones_heights_and_platform(width, length):
+    np.random.seed(0)
+    terrain = make_pair(width, length)[0]
+    stepping_stones_terrain(terrain, 0.5, 0.3, 0.1, platform_size=2.0, depth=-1.0)
+    depth = int(-1.0 / terrain.vertical_scale)
+    max_height = int(0.1 / terrain.vertical_scale)
+    heights = terrain.height_field_raw
+    stones = heights[heights != depth]
+    assert np.all((stones >= -max_height - 1) & (stones < max_height))
+    assert np.any(heights == depth)
+    x, y = (width - 20) // 2, (length - 20) // 2
+    assert np.all(heights[x:x + 20, y:y + 20] == 0)
@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from omniisaacgymenvs.utils.terrain_utils.terrain_utils import convert_heightfield_to_trimesh
+
+
+def reference_convert_heightfield_to_trimesh(height_field_raw, horizontal_scale, vertical_scale, slope_threshold=None):
+    """ The loop based implementation convert_heightfield_to_trimesh replaced, kept verbatim for parity. """
+    hf = height_field_raw
+    num_rows = hf.shape[0]
+    num_cols = hf.shape[1]
+
+    y = np.linspace(0, (num_cols-1)*horizontal_scale, num_cols)
+    x = np.linspace(0, (num_rows-1)*horizontal_scale, num_rows)
+    yy, xx = np.meshgrid(y, x)
+
+    if slope_threshold is not None:
+
+        slope_threshold *= horizontal_scale / vertical_scale
+        move_x = np.zeros((num_rows, num_cols))
+        move_y = np.zeros((num_rows, num_cols))
+        move_corners = np.zeros((num_rows, num_cols))
+        move_x[:num_rows-1, :] += (hf[1:num_rows, :] - hf[:num_rows-1, :] > slope_threshold)
+        move_x[1:num_rows, :] -= (hf[:num_rows-1, :] - hf[1:num_rows, :] > slope_threshold)
+        move_y[:, :num_cols-1] += (hf[:, 1:num_cols] - hf[:, :num_cols-1] > slope_threshold)
+        move_y[:, 1:num_cols] -= (hf[:, :num_cols-1] - hf[:, 1:num_cols] > slope_threshold)
+        move_corners[:num_rows-1, :num_cols-1] += (hf[1:num_rows, 1:num_cols] - hf[:num_rows-1, :num_cols-1] > slope_threshold)
+        move_corners[1:num_rows, 1:num_cols] -= (hf[:num_rows-1, :num_cols-1] - hf[1:num_rows, 1:num_cols] > slope_threshold)
+        xx += (move_x + move_corners*(move_x == 0)) * horizontal_scale
+        yy += (move_y + move_corners*(move_y == 0)) * horizontal_scale
+
+    vertices = np.zeros((num_rows*num_cols, 3), dtype=np.float32)
+    vertices[:, 0] = xx.flatten()
+    vertices[:, 1] = yy.flatten()
+    vertices[:, 2] = hf.flatten() * vertical_scale
+    triangles = -np.ones((2*(num_rows-1)*(num_cols-1), 3), dtype=np.uint32)
+    for i in range(num_rows - 1):
+        ind0 = np.arange(0, num_cols-1) + i*num_cols
+        ind1 = ind0 + 1
+        ind2 = ind0 + num_cols
+        ind3 = ind2 + 1
+        start = 2*i*(num_cols-1)
+        stop = start + 2*(num_cols-1)
+        triangles[start:stop:2, 0] = ind0
+        triangles[start:stop:2, 1] = ind3
+        triangles[start:stop:2, 2] = ind1
+        triangles[start+1:stop:2, 0] = ind0
+        triangles[start+1:stop:2, 1] = ind2
+        triangles[start+1:stop:2, 2] = ind3
+
+    return vertices, triangles
+
+
+def height_fields():
+    rng = np.random.default_rng(0)
+    # rough noise, steep steps in both directions and a flat field
+    noise = rng.integers(-50, 50, size=(37, 53)).astype(np.int16)
+    steps = (np.add.outer(np.arange(41) // 5, np.arange(29) // 3) * 40).astype(np.int16)
+    flat = np.zeros((16, 16), dtype=np.int16)
+    return [noise, steps, -steps, flat]
+
+
+@pytest.mark.parametrize("slope_threshold", [None, 0.5, 0.05])
+@pytest.mark.parametrize("index", range(4))
+def test_trimesh_is_bit_exact(index, slope_threshold):
+    height_field = height_fields()[index]
+    vertices, triangles = convert_heightfield_to_trimesh(height_field, 0.1, 0.005, slope_threshold)
+    ref_vertices, ref_triangles = reference_convert_heightfield_to_trimesh(height_field, 0.1, 0.005, slope_threshold)
+    assert vertices.dtype == ref_vertices.dtype and triangles.dtype == ref_triangles.dtype
+    np.testing.assert_array_equal(vertices, ref_vertices)
+    np.testing.assert_array_equal(triangles, ref_triangles)
+
+
+def test_trimesh_written_to_output_dir_is_bit_exact(tmp_path):
+    height_field = height_fields()[0]
+    vertices, triangles = convert_heightfield_to_trimesh(height_field, 0.1, 0.005, 0.5, output_dir=str(tmp_path))
+    ref_vertices, ref_triangles = reference_convert_heightfield_to_trimesh(height_field, 0.1, 0.005, 0.5)
+    np.testing.assert_array_equal(np.load(tmp_path / "vertices.npy"), ref_vertices)
+    np.testing.assert_array_equal(np.load(tmp_path / "triangles.npy"), ref_triangles)
+    np.testing.assert_array_equal(vertices, ref_vertices)
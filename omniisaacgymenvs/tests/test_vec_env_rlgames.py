@@ -0,0 +1,129 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("omni.isaac.gym.vec_env")
+
+from omniisaacgymenvs.envs.data_handoff import RLDataHandoff
+from omniisaacgymenvs.envs.vec_env_rlgames import VecEnvRLGames
+from omniisaacgymenvs.utils.step_profiler import StepProfiler
+
+
+NUM_ENVS = 3
+NUM_AGENTS = 2
+NUM_ACTIONS = 2
+
+
+class FakeRandomizer():
+    """ Adds one to the actions in place, like the noise based action randomization. """
+
+    adr = None
+
+    def apply_actions_randomization(self, actions, reset_buf):
+        return actions.add_(1.0)
+
+
+class FakeTask():
+    """ Two agent task whose rewards and resets are set directly by the tests. """
+
+    def __init__(self, per_agent_rewards=False, randomize_actions=False):
+        self.num_agents = NUM_AGENTS
+        self.num_actions = NUM_ACTIONS
+        self.per_agent_rewards = per_agent_rewards
+        self.per_agent_resets = False
+        self.randomize_actions = randomize_actions
+        self.randomize_observations = False
+        self.clip_actions = 1.5
+        self.clip_obs = 5.0
+        self.control_frequency_inv = 1
+        self.device = "cpu"
+        self.rl_device = "cpu"
+        self.profiler = StepProfiler("fake")
+        self._dr_randomizer = FakeRandomizer()
+
+        self.obs_buf = torch.zeros((NUM_ENVS * NUM_AGENTS, 4))
+        self.rew_buf = torch.tensor([1.0, 2.0, 3.0])
+        self.reset_buf = torch.tensor([0, 1, 0])
+        self.agent_rew_buf = torch.zeros(NUM_ENVS * NUM_AGENTS)
+        self.agent_reset_buf = torch.ones(NUM_ENVS * NUM_AGENTS, dtype=torch.long)
+        self.received_actions = []
+
+    def reset(self):
+        pass
+
+    def pre_physics_step(self, actions):
+        self.received_actions.append(actions)
+
+    def post_physics_step(self):
+        if self.per_agent_rewards:
+            self.agent_rew_buf.copy_(torch.arange(NUM_ENVS * NUM_AGENTS, dtype=torch.float))
+        return self.obs_buf, self.rew_buf, self.reset_buf, {}
+
+    def get_states(self):
+        return torch.zeros((NUM_ENVS, 0))
+
+
+class FakeWorld():
+    def step(self, render=False):
+        pass
+
+
+def make_env(task):
+    env = VecEnvRLGames.__new__(VecEnvRLGames)
+    env._task = task
+    env._world = FakeWorld()
+    env._render = False
+    env.sim_frame_count = 0
+    env.num_envs = NUM_ENVS
+    env.num_states = 0
+    env.metrics = None
+    env._handoff = RLDataHandoff(task.rl_device)
+    env._zero_actions = torch.zeros((NUM_ENVS * NUM_AGENTS, NUM_ACTIONS))
+    return env
+
+
+def test_shared_rewards_are_copied_to_every_agent():
+    task = FakeTask()
+    env = make_env(task)
+
+    _, rew, resets, _ = env.step(torch.zeros((NUM_ENVS * NUM_AGENTS, NUM_ACTIONS)))
+
+    assert rew is task.agent_rew_buf and resets is task.agent_reset_buf
+    assert torch.equal(rew, torch.tensor([1.0, 2.0, 3.0, 1.0, 2.0, 3.0]))
+    assert torch.equal(resets, torch.tensor([0, 1, 0, 0, 1, 0]))
+
+    # the next step reuses the same buffers
+    task.rew_buf = torch.tensor([4.0, 5.0, 6.0])
+    _, next_rew, _, _ = env.step(torch.zeros((NUM_ENVS * NUM_AGENTS, NUM_ACTIONS)))
+    assert next_rew is rew
+    assert torch.equal(rew, torch.tensor([4.0, 5.0, 6.0, 4.0, 5.0, 6.0]))
+
+
+def test_per_agent_rewards_written_by_the_task_are_kept():
+    task = FakeTask(per_agent_rewards=True)
+    env = make_env(task)
+
+    _, rew, resets, _ = env.step(torch.zeros((NUM_ENVS * NUM_AGENTS, NUM_ACTIONS)))
+
+    assert rew is task.agent_rew_buf
+    assert torch.equal(rew, torch.arange(NUM_ENVS * NUM_AGENTS, dtype=torch.float))
+    # resets are still shared by the agents
+    assert torch.equal(resets, torch.tensor([0, 1, 0, 0, 1, 0]))
+
+
+def test_step_does_not_modify_the_given_actions():
+    task = FakeTask(randomize_actions=True)
+    env = make_env(task)
+    zero_actions = env._zero_actions
+
+    env.reset()
+    env.reset()
+
+    assert env._zero_actions is zero_actions
+    assert torch.equal(zero_actions, torch.zeros_like(zero_actions))
+    assert torch.equal(task.received_actions[-1], torch.ones_like(zero_actions))
+
+    actions = torch.full((NUM_ENVS * NUM_AGENTS, NUM_ACTIONS), 1.0)
+    env.step(actions)
+    assert torch.equal(actions, torch.full_like(actions, 1.0))
+    # randomized, then clipped
+    assert torch.equal(task.received_actions[-1], torch.full_like(actions, 1.5))
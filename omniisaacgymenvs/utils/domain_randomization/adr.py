@@ -0,0 +1,170 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import numpy as np
+import torch
+
+
+class ADRController():
+    """ Automatic domain randomization over the distributions registered in a Randomizer.
+
+        Every ADR parameter is one side (row ``index`` of distribution_parameters) of a registered distribution.
+        Training is split into windows that each last until ``queue_length`` episodes have completed. With
+        probability ``boundary_prob`` a window evaluates one randomly chosen parameter: its distribution is pinned
+        to that boundary, and the mean return of the episodes that both started and finished inside the window
+        decides whether the parameter is widened by ``delta`` (towards ``limit``) or narrowed back (towards its
+        initial value), on either side of the initial value. Returns are accumulated per env in device buffers and
+        only read back once every ``update_interval`` steps.
+
+        Pinning collapses a uniform or loguniform range onto the evaluated bound, and sets the std of a gaussian
+        to 0 when its mean is evaluated. A gaussian std cannot be pinned, so ``pin`` defaults to False for it.
+
+        The randomizer only needs get_dr_distribution_parameters, set_dr_distribution_parameters,
+        get_initial_dr_distribution_parameters and get_dr_distribution_type, so any stand-in providing them can be
+        used instead of the replicator backed one.
+
+    Args:
+        randomizer (Randomizer): randomizer holding the registered distributions.
+        adr_config (dict): the domain_randomization.adr section of the task config.
+        num_envs (int): number of environments.
+        device (str): device of the reward and reset buffers.
+    """
+
+    def __init__(self, randomizer, adr_config, num_envs, device):
+        self._randomizer = randomizer
+        self._device = device
+        self.boundary_prob = adr_config.get("boundary_prob", 0.5)
+        self.queue_length = adr_config.get("queue_length", 256)
+        self.update_interval = adr_config.get("update_interval", 16)
+        self.lower_threshold, self.upper_threshold = adr_config["performance_thresholds"]
+
+        self.params = list()
+        self._distribution_parameters = dict()
+        for name, param in adr_config["params"].items():
+            path = tuple(param["path"])
+            if path not in self._distribution_parameters:
+                self._distribution_parameters[path] = np.array(randomizer.get_dr_distribution_parameters(*path), dtype=float)
+            initial_value = np.array(randomizer.get_initial_dr_distribution_parameters(*path), dtype=float)[param["index"]]
+            distribution = randomizer.get_dr_distribution_type(*path)
+            pin_std = distribution == "gaussian" and param["index"] == 1
+            if pin_std and param.get("pin", False):
+                raise ValueError(f"ADR parameter {name} is the std of a gaussian and cannot be pinned, set pin: False.")
+            self.params.append({
+                "name": name,
+                "path": path,
+                "index": param["index"],
+                "delta": param["delta"],
+                "distribution": distribution,
+                "pin": param.get("pin", not pin_std),
+                # widening moves the parameter away from its initial value, up or down depending on the side
+                "direction": np.sign(param["limit"] - initial_value),
+                "lower_bound": np.minimum(initial_value, param["limit"]),
+                "upper_bound": np.maximum(initial_value, param["limit"]),
+            })
+
+        self._episode_returns = torch.zeros(num_envs, device=device)
+        self._episode_window = torch.full((num_envs,), -1, dtype=torch.long, device=device)
+        self._dones = torch.zeros(num_envs, dtype=torch.bool, device=device)
+        self._valid = torch.zeros(num_envs, dtype=torch.bool, device=device)
+        # sum of returns and number of episodes completed inside the current window
+        self._window_stats = torch.zeros(2, device=device)
+        self._window_id = -1
+        self._active = None
+        self._steps = 0
+        self.performance = 0.0
+        self._start_window()
+
+    def step(self, rewards, resets, extras=None):
+        """ Accumulates the rewards of one step and updates the distributions once a window is complete.
+
+        Args:
+            rewards (torch.Tensor): rewards of the step, of shape (num_envs,).
+            resets (torch.Tensor): reset flags of the step, of shape (num_envs,).
+            extras (dict, optional): dict the current ADR ranges are written to for logging.
+        """
+        self._episode_returns += rewards.to(self._device)
+        self._dones.copy_(resets)
+        torch.eq(self._episode_window, self._window_id, out=self._valid)
+        self._valid &= self._dones
+        self._window_stats[0] += torch.sum(self._episode_returns * self._valid)
+        self._window_stats[1] += torch.sum(self._valid)
+        self._episode_returns.masked_fill_(self._dones, 0)
+        self._episode_window.masked_fill_(self._dones, self._window_id)
+
+        self._steps += 1
+        if self._steps % self.update_interval == 0:
+            self._update()
+        if extras is not None:
+            extras.update(self.get_log_dict())
+
+    def _update(self):
+        window_return, window_count = self._window_stats.tolist()
+        if window_count < self.queue_length:
+            return
+
+        self.performance = window_return / window_count
+        if self._active is not None:
+            param = self.params[self._active]
+            parameters = self._distribution_parameters[param["path"]]
+            if self.performance >= self.upper_threshold:
+                parameters[param["index"]] += param["direction"] * param["delta"]
+            elif self.performance <= self.lower_threshold:
+                parameters[param["index"]] -= param["direction"] * param["delta"]
+            parameters[param["index"]] = np.clip(parameters[param["index"]], param["lower_bound"], param["upper_bound"])
+        self._start_window()
+
+    def _start_window(self):
+        # restore the distribution evaluated in the last window, including its updated boundary
+        if self._active is not None:
+            path = self.params[self._active]["path"]
+            self._randomizer.set_dr_distribution_parameters(self._distribution_parameters[path].tolist(), *path)
+
+        self._active = None
+        if len(self.params) > 0 and np.random.uniform() < self.boundary_prob:
+            self._active = np.random.randint(len(self.params))
+            param = self.params[self._active]
+            if param["pin"]:
+                pinned = self._distribution_parameters[param["path"]].copy()
+                if param["distribution"] == "gaussian":
+                    pinned[1] = 0.0
+                else:
+                    pinned[1 - param["index"]] = pinned[param["index"]]
+                self._randomizer.set_dr_distribution_parameters(pinned.tolist(), *param["path"])
+
+        self._window_id += 1
+        self._window_stats.zero_()
+
+    def get_log_dict(self):
+        """ Returns the current value of every ADR parameter and the performance of the last completed window. """
+        log_dict = {"adr/performance": self.performance}
+        for param in self.params:
+            value = self._distribution_parameters[param["path"]][param["index"]]
+            log_dict[f"adr/{param['name']}"] = float(np.mean(value))
+        return log_dict
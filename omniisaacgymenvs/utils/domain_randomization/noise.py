@@ -0,0 +1,157 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import torch
+
+
+class NoiseGenerator():
+    """ Noise source for one observations or actions randomization entry.
+
+        The distribution and operation are resolved once when the generator is created, and all noise is
+        drawn into preallocated buffers. Standard samples are either drawn every step or taken from a pool
+        of ``pool_size`` frames that is refilled with a single call once it is used up. Env selection is
+        done with boolean masks, so applying noise never requires a host-device sync.
+
+    Args:
+        distribution (str): one of gaussian/normal, uniform, loguniform/log_uniform.
+        operation (str): additive or scaling.
+        distribution_parameters (list): [param_1, param_2] of the distribution, or [[param_1, ...], [param_2, ...]]
+            with one pair per dimension.
+        num_envs (int): number of environments.
+        dimension (int): size of the randomized buffer per env.
+        device (str): device of the randomized buffer.
+        pool_size (int): number of noise frames drawn at once. 0 draws noise every step.
+    """
+
+    DISTRIBUTIONS = {
+        "gaussian": "normal",
+        "normal": "normal",
+        "uniform": "uniform",
+        "loguniform": "log_uniform",
+        "log_uniform": "log_uniform",
+    }
+    OPERATIONS = ("additive", "scaling")
+
+    def __init__(self, distribution, operation, distribution_parameters, num_envs, dimension, device, pool_size=0):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"The specified {distribution} distribution is not supported. "
+                + "Options: uniform, gaussian/normal, loguniform/log_uniform")
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"The specified {operation} operation type is not supported. Options: additive, scaling")
+
+        self._distribution = self.DISTRIBUTIONS[distribution]
+        self._additive = operation == "additive"
+        self._num_envs = num_envs
+        self._dimension = dimension
+        self._device = device
+
+        # noise = shift + scale * standard_sample, followed by exp for log uniform
+        self._scale = torch.zeros(dimension, device=device)
+        self._shift = torch.zeros(dimension, device=device)
+        self._identity = torch.tensor(0.0 if self._additive else 1.0, device=device)
+        self.set_parameters(distribution_parameters)
+
+        self._noise = torch.zeros((num_envs, dimension), device=device)
+        self._correlated_noise = torch.full((num_envs, dimension), self._identity.item(), device=device)
+        self._pool_size = pool_size
+        if pool_size > 0:
+            self._pool = torch.zeros((pool_size, num_envs, dimension), device=device)
+            self._pool_index = pool_size
+        else:
+            self._pool = torch.zeros((1, num_envs, dimension), device=device)
+
+    def set_parameters(self, distribution_parameters):
+        """ Updates the distribution parameters in place.
+
+        Args:
+            distribution_parameters: [param_1, param_2] shared by all dimensions, or [[param_1, ...], [param_2, ...]]
+                with one value per dimension. Tensors already on the device are used without a host round trip.
+        """
+        params = torch.as_tensor(distribution_parameters, dtype=torch.float, device=self._device)
+        if params.shape != (2,) and params.shape != (2, self._dimension):
+            raise ValueError(f"Invalid distribution_parameters of shape {tuple(params.shape)}, "
+                + f"expected (2,) or (2, {self._dimension}).")
+        if self._distribution == "normal":
+            self._scale.copy_(params[1])
+            self._shift.copy_(params[0])
+        elif self._distribution == "uniform":
+            torch.sub(params[1], params[0], out=self._scale)
+            self._shift.copy_(params[0])
+        else:
+            log_params = torch.log(params)
+            torch.sub(log_params[1], log_params[0], out=self._scale)
+            self._shift.copy_(log_params[0])
+
+    def _draw(self, samples):
+        if self._distribution == "normal":
+            samples.normal_()
+        else:
+            samples.uniform_()
+
+    def sample(self):
+        """ Draws one frame of noise for all envs.
+
+        Returns:
+            noise(torch.Tensor): Persistent tensor of shape (num_envs, dimension), overwritten by the next call.
+        """
+        if self._pool_size > 0:
+            if self._pool_index == self._pool_size:
+                self._draw(self._pool)
+                self._pool_index = 0
+            samples = self._pool[self._pool_index]
+            self._pool_index += 1
+        else:
+            samples = self._pool[0]
+            self._draw(samples)
+
+        torch.addcmul(self._shift, samples, self._scale, out=self._noise)
+        if self._distribution == "log_uniform":
+            self._noise.exp_()
+        return self._noise
+
+    def _apply(self, buffer, noise):
+        if self._additive:
+            buffer.add_(noise)
+        else:
+            buffer.mul_(noise)
+        return buffer
+
+    def apply(self, buffer, mask=None):
+        """ Applies freshly drawn noise to the envs selected by mask, or to all envs if mask is None. """
+        noise = self.sample()
+        if mask is not None:
+            torch.where(mask.unsqueeze(-1), noise, self._identity, out=noise)
+        return self._apply(buffer, noise)
+
+    def apply_correlated(self, buffer, reset_mask):
+        """ Resamples the persistent noise of the envs selected by reset_mask and applies it to all envs. """
+        noise = self.sample()
+        torch.where(reset_mask.unsqueeze(-1), noise, self._correlated_noise, out=self._correlated_noise)
+        return self._apply(buffer, self._correlated_noise)
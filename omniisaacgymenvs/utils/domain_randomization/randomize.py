@@ -35,6 +35,8 @@ import numpy as np
 import torch
 
 from omni.isaac.core.prims import RigidPrimView
+from omniisaacgymenvs.utils.domain_randomization.adr import ADRController
+from omniisaacgymenvs.utils.domain_randomization.noise import NoiseGenerator
 
 class Randomizer():
     def __init__(self, sim_config):
@@ -47,6 +49,7 @@ class Randomizer():
         self.active_domain_randomizations = dict()
         self._observations_dr_params = None
         self._actions_dr_params = None
+        self.adr = None
 
         if dr_config is not None:
             randomize = dr_config.get("randomize", False)
@@ -54,6 +57,7 @@ class Randomizer():
             if randomize and randomization_params is not None:
                 self.randomize = True
                 self.min_frequency = dr_config.get("min_frequency", 1)
+                self.noise_pool_size = dr_config.get("noise_pool_size", 0)
 
     def apply_on_startup_domain_randomization(self, task):
         if self.randomize:
@@ -164,6 +168,9 @@ class Randomizer():
                                         if attribute not in ["scale"]:
                                             self._set_up_articulation_view_randomization(view_name, attribute, params)
             rep.orchestrator.run()
+            adr_config = self._cfg["domain_randomization"].get("adr", None)
+            if adr_config is not None and adr_config.get("enabled", False):
+                self.adr = ADRController(self, adr_config, self._cfg["env"]["numEnvs"], self._config["rl_device"])
         else:
             dr_config = self._cfg.get("domain_randomization", None)
             if dr_config is None:
@@ -175,135 +182,117 @@ class Randomizer():
             
     def _set_up_observations_randomization(self, task):
         task.randomize_observations = True
-        self._observations_dr_params = self._cfg["domain_randomization"]["randomization_params"]["observations"]
-        if self._observations_dr_params is None:
+        observations_dr_params = self._cfg["domain_randomization"]["randomization_params"]["observations"]
+        if observations_dr_params is None:
             raise ValueError(f"Observations randomization parameters are not provided.")
-        if "on_reset" in self._observations_dr_params.keys():
-            if not set(('operation','distribution', 'distribution_parameters')).issubset(self._observations_dr_params["on_reset"].keys()):
+        self._observations_dr_params = dict()
+        if "on_reset" in observations_dr_params.keys():
+            if not set(('operation','distribution', 'distribution_parameters')).issubset(observations_dr_params["on_reset"].keys()):
                 raise ValueError(f"Please ensure the following observations on_reset randomization parameters are provided: " + \
                     "operation, distribution, distribution_parameters.")
-            self.active_domain_randomizations[("observations", "on_reset")] = np.array(self._observations_dr_params["on_reset"]["distribution_parameters"])
-        if "on_interval" in self._observations_dr_params.keys():
-            if not set(('frequency_interval', 'operation','distribution', 'distribution_parameters')).issubset(self._observations_dr_params["on_interval"].keys()):
+            self._observations_dr_params["on_reset"] = self._sanitize_noise_parameters(
+                "observations", observations_dr_params["on_reset"], task.num_observations
+            )
+            self.active_domain_randomizations[("observations", "on_reset")] = self._observations_dr_params["on_reset"]["distribution_parameters"].copy()
+        if "on_interval" in observations_dr_params.keys():
+            if not set(('frequency_interval', 'operation','distribution', 'distribution_parameters')).issubset(observations_dr_params["on_interval"].keys()):
                 raise ValueError(f"Please ensure the following observations on_interval randomization parameters are provided: " + \
                     "frequency_interval, operation, distribution, distribution_parameters.")
-            self.active_domain_randomizations[("observations", "on_interval")] = np.array(self._observations_dr_params["on_interval"]["distribution_parameters"])
+            self._observations_dr_params["on_interval"] = self._sanitize_noise_parameters(
+                "observations", observations_dr_params["on_interval"], task.num_observations
+            )
+            self.active_domain_randomizations[("observations", "on_interval")] = self._observations_dr_params["on_interval"]["distribution_parameters"].copy()
+        self._observations_noise = self._create_noise_generators(self._observations_dr_params, task.num_observations)
+        self._observations_frequency_interval = self._observations_dr_params.get("on_interval", dict()).get("frequency_interval", 0)
         self._observations_counter_buffer = torch.zeros((self._cfg["env"]["numEnvs"]), dtype=torch.int, device=self._config["rl_device"])
-        self._observations_correlated_noise = torch.zeros((self._cfg["env"]["numEnvs"], task.num_observations), device=self._config["rl_device"])
+        self._observations_reset_mask = torch.zeros((self._cfg["env"]["numEnvs"]), dtype=torch.bool, device=self._config["rl_device"])
+        self._observations_interval_mask = torch.zeros((self._cfg["env"]["numEnvs"]), dtype=torch.bool, device=self._config["rl_device"])
         
     def _set_up_actions_randomization(self, task):
         task.randomize_actions = True
-        self._actions_dr_params = self._cfg["domain_randomization"]["randomization_params"]["actions"]
-        if self._actions_dr_params is None:
+        actions_dr_params = self._cfg["domain_randomization"]["randomization_params"]["actions"]
+        if actions_dr_params is None:
             raise ValueError(f"Actions randomization parameters are not provided.")
-        if "on_reset" in self._actions_dr_params.keys():
-            if not set(('operation','distribution', 'distribution_parameters')).issubset(self._actions_dr_params["on_reset"].keys()):
+        self._actions_dr_params = dict()
+        if "on_reset" in actions_dr_params.keys():
+            if not set(('operation','distribution', 'distribution_parameters')).issubset(actions_dr_params["on_reset"].keys()):
                 raise ValueError(f"Please ensure the following actions on_reset randomization parameters are provided: " + \
                     "operation, distribution, distribution_parameters.")
-            self.active_domain_randomizations[("actions", "on_reset")] = np.array(self._actions_dr_params["on_reset"]["distribution_parameters"])
-        if "on_interval" in self._actions_dr_params.keys():
-            if not set(('frequency_interval', 'operation','distribution', 'distribution_parameters')).issubset(self._actions_dr_params["on_interval"].keys()):
+            self._actions_dr_params["on_reset"] = self._sanitize_noise_parameters(
+                "actions", actions_dr_params["on_reset"], task.num_actions
+            )
+            self.active_domain_randomizations[("actions", "on_reset")] = self._actions_dr_params["on_reset"]["distribution_parameters"].copy()
+        if "on_interval" in actions_dr_params.keys():
+            if not set(('frequency_interval', 'operation','distribution', 'distribution_parameters')).issubset(actions_dr_params["on_interval"].keys()):
                 raise ValueError(f"Please ensure the following actions on_interval randomization parameters are provided: " + \
                     "frequency_interval, operation, distribution, distribution_parameters.")
-            self.active_domain_randomizations[("actions", "on_interval")] = np.array(self._actions_dr_params["on_interval"]["distribution_parameters"])
+            self._actions_dr_params["on_interval"] = self._sanitize_noise_parameters(
+                "actions", actions_dr_params["on_interval"], task.num_actions
+            )
+            self.active_domain_randomizations[("actions", "on_interval")] = self._actions_dr_params["on_interval"]["distribution_parameters"].copy()
+        self._actions_noise = self._create_noise_generators(self._actions_dr_params, task.num_actions)
+        self._actions_frequency_interval = self._actions_dr_params.get("on_interval", dict()).get("frequency_interval", 0)
         self._actions_counter_buffer = torch.zeros((self._cfg["env"]["numEnvs"]), dtype=torch.int, device=self._config["rl_device"])
-        self._actions_correlated_noise = torch.zeros((self._cfg["env"]["numEnvs"], task.num_actions), device=self._config["rl_device"])
+        self._actions_reset_mask = torch.zeros((self._cfg["env"]["numEnvs"]), dtype=torch.bool, device=self._config["rl_device"])
+        self._actions_interval_mask = torch.zeros((self._cfg["env"]["numEnvs"]), dtype=torch.bool, device=self._config["rl_device"])
+
+    def _sanitize_noise_parameters(self, buffer_type, params, dimension):
+        # returns a new params dict, the task config is left untouched
+        distribution_parameters = np.array(params["distribution_parameters"], dtype=float)
+        if "dimension_parameters" in params.keys():
+            # per-slice overrides on top of the parameters shared by all dimensions, e.g.
+            # dimension_parameters: [{indices: [0, 360], distribution_parameters: [0, 0.05]}]
+            distribution_parameters = np.array(self._sanitize_distribution_parameters(buffer_type, dimension, distribution_parameters))
+            for entry in params["dimension_parameters"]:
+                start, end = entry["indices"]
+                distribution_parameters[:, start:end] = np.array(entry["distribution_parameters"], dtype=float).reshape(2, -1)
+        elif distribution_parameters.shape != (2,) and distribution_parameters.shape != (2, dimension):
+            raise ValueError(f"The provided distribution_parameters for {buffer_type} is invalid due to incorrect dimensions.")
+        sanitized_params = {key: value for key, value in params.items() if key != "dimension_parameters"}
+        sanitized_params["distribution_parameters"] = distribution_parameters
+        return sanitized_params
+
+    def _create_noise_generators(self, dr_params, dimension):
+        noise_generators = dict()
+        for event in ("on_reset", "on_interval"):
+            if event in dr_params.keys():
+                noise_generators[event] = NoiseGenerator(
+                    distribution=dr_params[event]["distribution"],
+                    operation=dr_params[event]["operation"],
+                    distribution_parameters=dr_params[event]["distribution_parameters"],
+                    num_envs=self._cfg["env"]["numEnvs"],
+                    dimension=dimension,
+                    device=self._config["rl_device"],
+                    pool_size=self.noise_pool_size,
+                )
+        return noise_generators
 
     def apply_observations_randomization(self, observations, reset_buf):
-        env_ids = reset_buf.nonzero(as_tuple=False).squeeze(-1)
-        self._observations_counter_buffer[env_ids] = 0
+        self._observations_reset_mask.copy_(reset_buf)
+        self._observations_counter_buffer.masked_fill_(self._observations_reset_mask, 0)
         self._observations_counter_buffer += 1
 
-        if "on_reset" in self._observations_dr_params.keys():
-            observations[:] = self._apply_correlated_noise(
-                buffer_type="observations",
-                buffer=observations,
-                reset_ids=env_ids,
-                operation=self._observations_dr_params["on_reset"]["operation"], 
-                distribution=self._observations_dr_params["on_reset"]["distribution"], 
-                distribution_parameters=self._observations_dr_params["on_reset"]["distribution_parameters"],
-            )
+        if "on_reset" in self._observations_noise:
+            self._observations_noise["on_reset"].apply_correlated(observations, self._observations_reset_mask)
         
-        if "on_interval" in self._observations_dr_params.keys():
-            randomize_ids = (self._observations_counter_buffer >= self._observations_dr_params["on_interval"]["frequency_interval"]).nonzero(as_tuple=False).squeeze(-1)
-            self._observations_counter_buffer[randomize_ids] = 0
-            observations[:] = self._apply_uncorrelated_noise(
-                buffer=observations,
-                randomize_ids=randomize_ids,
-                operation=self._observations_dr_params["on_interval"]["operation"], 
-                distribution=self._observations_dr_params["on_interval"]["distribution"], 
-                distribution_parameters=self._observations_dr_params["on_interval"]["distribution_parameters"],
-            )
+        if "on_interval" in self._observations_noise:
+            torch.ge(self._observations_counter_buffer, self._observations_frequency_interval, out=self._observations_interval_mask)
+            self._observations_counter_buffer.masked_fill_(self._observations_interval_mask, 0)
+            self._observations_noise["on_interval"].apply(observations, self._observations_interval_mask)
         return observations
     
     def apply_actions_randomization(self, actions, reset_buf):
-        env_ids = reset_buf.nonzero(as_tuple=False).squeeze(-1)
-        self._actions_counter_buffer[env_ids] = 0
+        self._actions_reset_mask.copy_(reset_buf)
+        self._actions_counter_buffer.masked_fill_(self._actions_reset_mask, 0)
         self._actions_counter_buffer += 1
 
-        if "on_reset" in self._actions_dr_params.keys():
-            actions[:] = self._apply_correlated_noise(
-                buffer_type="actions",
-                buffer=actions,
-                reset_ids=env_ids,
-                operation=self._actions_dr_params["on_reset"]["operation"], 
-                distribution=self._actions_dr_params["on_reset"]["distribution"], 
-                distribution_parameters=self._actions_dr_params["on_reset"]["distribution_parameters"],
-            )
-        if "on_interval" in self._actions_dr_params.keys():
-            randomize_ids = (self._actions_counter_buffer >= self._actions_dr_params["on_interval"]["frequency_interval"]).nonzero(as_tuple=False).squeeze(-1)
-            self._actions_counter_buffer[randomize_ids] = 0
-            actions[:] = self._apply_uncorrelated_noise(
-                buffer=actions,
-                randomize_ids=randomize_ids,
-                operation=self._actions_dr_params["on_interval"]["operation"], 
-                distribution=self._actions_dr_params["on_interval"]["distribution"], 
-                distribution_parameters=self._actions_dr_params["on_interval"]["distribution_parameters"],
-            )
+        if "on_reset" in self._actions_noise:
+            self._actions_noise["on_reset"].apply_correlated(actions, self._actions_reset_mask)
+        if "on_interval" in self._actions_noise:
+            torch.ge(self._actions_counter_buffer, self._actions_frequency_interval, out=self._actions_interval_mask)
+            self._actions_counter_buffer.masked_fill_(self._actions_interval_mask, 0)
+            self._actions_noise["on_interval"].apply(actions, self._actions_interval_mask)
         return actions
-    
-    def _apply_uncorrelated_noise(self, buffer, randomize_ids, operation, distribution, distribution_parameters):
-        if distribution == "gaussian" or distribution == "normal":
-            noise = torch.normal(mean=distribution_parameters[0], std=distribution_parameters[1], size=(len(randomize_ids), buffer.shape[1]), device=self._config["rl_device"])
-        elif distribution == "uniform":
-            noise = (distribution_parameters[1] - distribution_parameters[0]) * torch.rand((len(randomize_ids), buffer.shape[1]), device=self._config["rl_device"]) + distribution_parameters[0]
-        elif distribution == "loguniform" or distribution == "log_uniform":
-            noise = torch.exp((np.log(distribution_parameters[1]) - np.log(distribution_parameters[0])) * torch.rand((len(randomize_ids), buffer.shape[1]), device=self._config["rl_device"]) + np.log(distribution_parameters[0]))
-        else:
-            print(f"The specified {distribution} distribution is not supported.")
-
-        if operation == "additive":
-            buffer[randomize_ids] += noise
-        elif operation == "scaling":
-            buffer[randomize_ids] *= noise
-        else:
-            print(f"The specified {operation} operation type is not supported.")
-        return buffer
-    
-    def _apply_correlated_noise(self, buffer_type, buffer, reset_ids, operation, distribution, distribution_parameters):
-        if buffer_type == "observations":
-            correlated_noise_buffer = self._observations_correlated_noise
-        elif buffer_type == "actions":
-            correlated_noise_buffer = self._actions_correlated_noise
-
-        if len(reset_ids) > 0:
-            if distribution == "gaussian" or distribution == "normal":
-                correlated_noise_buffer[reset_ids] = torch.normal(mean=distribution_parameters[0], std=distribution_parameters[1], size=(len(reset_ids), buffer.shape[1]), device=self._config["rl_device"])
-            elif distribution == "uniform":
-                correlated_noise_buffer[reset_ids] = (distribution_parameters[1] - distribution_parameters[0]) * torch.rand((len(reset_ids), buffer.shape[1]), device=self._config["rl_device"]) + distribution_parameters[0]
-            elif distribution == "loguniform" or distribution == "log_uniform":
-                correlated_noise_buffer[reset_ids] = torch.exp((np.log(distribution_parameters[1]) - np.log(distribution_parameters[0])) * torch.rand((len(reset_ids), buffer.shape[1]), device=self._config["rl_device"]) + np.log(distribution_parameters[0]))
-            else:
-                print(f"The specified {distribution} distribution is not supported.")
-        
-        if operation == "additive":
-            buffer += correlated_noise_buffer
-        elif operation == "scaling":
-            buffer *= correlated_noise_buffer
-        else:
-            print(f"The specified {operation} operation type is not supported.")
-        return buffer        
-
 
     def _set_up_simulation_randomization(self, attribute, params):
         if params is None:
@@ -454,7 +443,7 @@ class Randomizer():
             # if the user only provides the parameters for one body in the articulation, assume the same parameters for all other links
             dist_params = [[distribution_parameters[0]] * (dimension // 3), [distribution_parameters[1]] * (dimension // 3)]
         else:
-            raise ValueError(f"The provided distribution_parameters for {view_name} {attribute} is invalid due to incorrect dimensions.")
+            raise ValueError(f"The provided distribution_parameters for {attribute} is invalid due to incorrect dimensions.")
         return dist_params
     
 
@@ -463,16 +452,18 @@ class Randomizer():
             raise ValueError(f"Cannot find a valid domain randomization distribution using the path {distribution_path}.")
         if distribution_path[0] == "observations":
             if len(distribution_parameters) == 2:
-                self._observations_dr_params[distribution_path[1]]["distribution_parameters"] = distribution_parameters
+                self._observations_noise[distribution_path[1]].set_parameters(distribution_parameters)
+                self._observations_dr_params[distribution_path[1]]["distribution_parameters"] = np.array(distribution_parameters, dtype=float)
             else:
                 raise ValueError(f"Please provide distribution_parameters for observations {distribution_path[1]} " +
-                    "in the form of [dist_param_1, dist_param_2]")
+                    "in the form of [dist_param_1, dist_param_2] or [[dist_param_1, ...], [dist_param_2, ...]]")
         elif distribution_path[0] == "actions":
             if len(distribution_parameters) == 2:
-                self._actions_dr_params[distribution_path[1]]["distribution_parameters"] = distribution_parameters
+                self._actions_noise[distribution_path[1]].set_parameters(distribution_parameters)
+                self._actions_dr_params[distribution_path[1]]["distribution_parameters"] = np.array(distribution_parameters, dtype=float)
             else:
                 raise ValueError(f"Please provide distribution_parameters for actions {distribution_path[1]} " +
-                    "in the form of [dist_param_1, dist_param_2]")
+                    "in the form of [dist_param_1, dist_param_2] or [[dist_param_1, ...], [dist_param_2, ...]]")
         else:
             replicator_distribution = self.distributions[distribution_path[0]][distribution_path[1]][distribution_path[2]]                
             if distribution_path[0] == "rigid_prim_views" or distribution_path[0] == "articulation_views":
@@ -504,6 +495,25 @@ class Randomizer():
             elif replicator_distribution.node.get_node_type().get_node_type() == "omni.replicator.core.OgnSampleNormal":
                 return dr.utils.get_distribution_params(replicator_distribution, ["mean", "std"])
     
+    def get_dr_distribution_type(self, *distribution_path):
+        if distribution_path not in self.active_domain_randomizations.keys():
+            raise ValueError(f"Cannot find a valid domain randomization distribution using the path {distribution_path}.")
+        if distribution_path[0] == "observations":
+            distribution = self._observations_dr_params[distribution_path[1]]["distribution"]
+        elif distribution_path[0] == "actions":
+            distribution = self._actions_dr_params[distribution_path[1]]["distribution"]
+        else:
+            replicator_distribution = self.distributions[distribution_path[0]][distribution_path[1]][distribution_path[2]]
+            if distribution_path[0] == "rigid_prim_views" or distribution_path[0] == "articulation_views":
+                replicator_distribution = replicator_distribution[distribution_path[3]]
+            node_type = replicator_distribution.node.get_node_type().get_node_type()
+            distribution = {
+                "omni.replicator.core.OgnSampleUniform": "uniform",
+                "omni.replicator.core.OgnSampleLogUniform": "loguniform",
+                "omni.replicator.core.OgnSampleNormal": "gaussian",
+            }[node_type]
+        return {"normal": "gaussian", "log_uniform": "loguniform"}.get(distribution, distribution)
+
     def get_initial_dr_distribution_parameters(self, *distribution_path):
         if distribution_path not in self.active_domain_randomizations.keys():
             raise ValueError(f"Cannot find a valid domain randomization distribution using the path {distribution_path}.")
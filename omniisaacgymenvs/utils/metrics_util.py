@@ -0,0 +1,175 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import csv
+import numbers
+import time
+
+import torch
+
+
+class WandbSink():
+    """ Logs flushed metrics to wandb, grouped under one section. """
+
+    def __init__(self, wandb, section="rewards"):
+        self._wandb = wandb
+        self._section = section
+
+    def write(self, metrics, step):
+        self._wandb.log({self._section: metrics})
+
+    def close(self):
+        pass
+
+
+class TensorboardSink():
+    """ Logs flushed metrics as scalars of a tensorboard SummaryWriter. """
+
+    def __init__(self, writer, prefix="env/"):
+        self._writer = writer
+        self._prefix = prefix
+
+    def write(self, metrics, step):
+        for key, value in metrics.items():
+            self._writer.add_scalar(self._prefix + key, value, step)
+
+    def close(self):
+        self._writer.flush()
+
+
+class CSVSink():
+    """ Appends flushed metrics as rows of a CSV file. The columns are fixed by the first flush. """
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = None
+
+    def write(self, metrics, step):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=["step"] + list(metrics.keys()), extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerow({"step": step, **metrics})
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class MemorySink():
+    """ Keeps flushed metrics in memory as a list of (step, metrics) tuples. """
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, metrics, step):
+        self.records.append((step, dict(metrics)))
+
+    def close(self):
+        pass
+
+
+class MetricsBuffer():
+    """ Accumulates scalar extras on the device and flushes their means to a set of sinks.
+
+        Every key keeps a running sum and count in one device tensor, so adding the extras of a step does not
+        sync with the host. The means are read back with a single transfer once ``flush_steps`` steps or
+        ``flush_seconds`` seconds have passed since the last flush, and handed to every sink. A sink is any
+        object with ``write(metrics, step)`` and ``close()`` methods. Nested dicts of extras, e.g.
+        ``extras["episode"]``, are logged with ``parent/child`` keys.
+
+    Args:
+        sinks (list): sinks receiving the flushed metrics.
+        device (str): device the metrics are accumulated on.
+        flush_steps (int, optional): number of steps between flushes.
+        flush_seconds (float, optional): time between flushes, checked on every step.
+    """
+
+    def __init__(self, sinks, device, flush_steps=100, flush_seconds=None):
+        self.sinks = list(sinks)
+        self._device = device
+        self._flush_steps = flush_steps
+        self._flush_seconds = flush_seconds
+
+        # running sum (row 0) and count (row 1) of every key since the last flush
+        self._keys = {}
+        self._stats = torch.zeros((2, 0), device=device)
+        self._step = 0
+        self._steps_since_flush = 0
+        self._last_flush_time = time.time()
+
+    def add(self, extras, prefix=""):
+        for key, value in extras.items():
+            if isinstance(value, dict):
+                self.add(value, prefix=f"{prefix}{key}/")
+                continue
+            if isinstance(value, torch.Tensor):
+                if value.numel() == 0:
+                    continue
+                idx = self._key_index(prefix + key)
+                self._stats[0, idx] += value.to(self._device).sum()
+                self._stats[1, idx] += value.numel()
+            elif isinstance(value, numbers.Number):
+                idx = self._key_index(prefix + key)
+                self._stats[0, idx] += value
+                self._stats[1, idx] += 1
+
+    def _key_index(self, key):
+        if key not in self._keys:
+            self._keys[key] = len(self._keys)
+            self._stats = torch.cat((self._stats, torch.zeros((2, 1), device=self._device)), dim=1)
+        return self._keys[key]
+
+    def step(self):
+        """ Advances the step counter and flushes once the step or time interval has passed. """
+        self._step += 1
+        self._steps_since_flush += 1
+        if self._flush_steps is not None and self._steps_since_flush >= self._flush_steps:
+            self.flush()
+        elif self._flush_seconds is not None and time.time() - self._last_flush_time >= self._flush_seconds:
+            self.flush()
+
+    def flush(self, step=None):
+        """ Hands the means since the last flush to the sinks, logged at ``step`` or the internal step counter. """
+        self._steps_since_flush = 0
+        self._last_flush_time = time.time()
+        if len(self._keys) == 0:
+            return
+
+        sums, counts = self._stats.tolist()
+        self._stats.zero_()
+        metrics = {key: sums[idx] / counts[idx] for key, idx in self._keys.items() if counts[idx] > 0}
+        if len(metrics) > 0:
+            for sink in self.sinks:
+                sink.write(metrics, self._step if step is None else step)
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
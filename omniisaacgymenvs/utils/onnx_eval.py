@@ -0,0 +1,169 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import time
+
+import numpy as np
+import onnxruntime as ort
+import torch
+
+
+class ModelWrapper(torch.nn.Module):
+    """ Normalizes observations and runs the a2c network of an rl_games model, the part that is exported to ONNX.
+
+        Exporting the whole model does not work because of the torch distributions, so only the network is exported.
+    """
+
+    def __init__(self, model):
+        torch.nn.Module.__init__(self)
+        self._model = model
+
+    def forward(self, input_dict):
+        input_dict["obs"] = self._model.norm_obs(input_dict["obs"])
+        return self._model.a2c_network(input_dict)
+
+
+def load_observations(path, obs_shape):
+    """ Loads recorded observations from a .npy, .npz (key "obs") or .pt file as float32 of shape (N, *obs_shape). """
+
+    if path.endswith(".npz"):
+        obs = np.load(path)["obs"]
+    elif path.endswith(".pt"):
+        obs = torch.load(path, map_location="cpu")
+        if isinstance(obs, dict):
+            obs = obs["obs"]
+        obs = obs.numpy()
+    else:
+        obs = np.load(path)
+    return np.ascontiguousarray(obs, dtype=np.float32).reshape((-1,) + tuple(obs_shape))
+
+
+def synthetic_observations(num_samples, obs_shape, scale=1.0, seed=0):
+    """ Normally distributed observations, for checking parity and throughput when no recording is available. """
+
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((num_samples,) + tuple(obs_shape), dtype=np.float32) * scale
+
+
+class OnnxPolicyEvaluator():
+    """ Runs observation datasets through an exported policy in large batches and times every batch.
+
+        Models exported with a dynamic batch dimension are run at the requested batch size. Older exports have
+        their batch dimension fixed at export time and are run at that size instead, padding the last batch.
+    """
+
+    def __init__(self, model_path, intra_op_threads=0, providers=None):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=providers or ort.get_available_providers()
+        )
+        self.model_path = model_path
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.obs_shape = tuple(model_input.shape[1:])
+        self.fixed_batch_size = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        self.output_names = [output.name for output in self.session.get_outputs()]
+        self.action_dim = self.session.get_outputs()[0].shape[-1]
+
+    def run(self, obs, batch_size):
+        """ Returns the model outputs for all of obs and the latency of every batch in seconds. """
+
+        if self.fixed_batch_size is not None:
+            batch_size = self.fixed_batch_size
+        num_samples = len(obs)
+        outputs = None
+        latencies = []
+        for start in range(0, num_samples, batch_size):
+            batch = obs[start:start + batch_size]
+            num = len(batch)
+            if self.fixed_batch_size is not None and num < batch_size:
+                batch = np.concatenate([batch, np.zeros((batch_size - num,) + batch.shape[1:], dtype=batch.dtype)])
+
+            start_time = time.perf_counter()
+            results = self.session.run(self.output_names, {self.input_name: batch})
+            latencies.append(time.perf_counter() - start_time)
+
+            if outputs is None:
+                outputs = [np.empty((num_samples,) + result.shape[1:], dtype=result.dtype) for result in results]
+            for output, result in zip(outputs, results):
+                output[start:start + num] = result[:num]
+        return outputs, np.array(latencies)
+
+    def benchmark(self, obs, batch_sizes):
+        """ Throughput and per-batch latency of running all of obs at each batch size. """
+
+        stats = []
+        for batch_size in batch_sizes:
+            # warm up the session for this input shape first
+            self.run(obs[:batch_size], batch_size)
+            _, latencies = self.run(obs, batch_size)
+            latencies_ms = latencies * 1000.0
+            stats.append({
+                "batch_size": self.fixed_batch_size or batch_size,
+                "num_batches": len(latencies),
+                "samples_per_sec": len(obs) / latencies.sum(),
+                "mean_ms": float(latencies_ms.mean()),
+                "p50_ms": float(np.percentile(latencies_ms, 50)),
+                "p99_ms": float(np.percentile(latencies_ms, 99)),
+            })
+            if self.fixed_batch_size is not None:
+                break
+        return stats
+
+
+def checkpoint_outputs(model, obs, batch_size, device):
+    """ Runs obs through the rl_games model the ONNX file was exported from, returns (mu, log_std, value). """
+
+    model.eval()
+    wrapper = ModelWrapper(model)
+    outputs = [[], [], []]
+    with torch.no_grad():
+        for start in range(0, len(obs), batch_size):
+            batch = torch.from_numpy(obs[start:start + batch_size]).to(device)
+            results = wrapper({"obs": batch, "rnn_states": None})
+            for output, result in zip(outputs, results[:3]):
+                output.append(result.cpu().numpy())
+    return [np.concatenate(output) for output in outputs]
+
+
+def compare_outputs(outputs, reference_outputs, names, atol=1e-4, rtol=1e-4):
+    """ Per-output max absolute difference and whether it is within tolerance of the reference. """
+
+    report = []
+    for name, output, reference in zip(names, outputs, reference_outputs):
+        output = output.reshape(reference.shape)
+        report.append({
+            "name": name,
+            "max_abs_diff": float(np.abs(output - reference).max()),
+            "ok": bool(np.allclose(output, reference, atol=atol, rtol=rtol)),
+        })
+    return report
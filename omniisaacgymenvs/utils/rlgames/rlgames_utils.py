@@ -34,6 +34,8 @@ import torch
 import numpy as np
 from typing import Callable
 
+from omniisaacgymenvs.utils.metrics_util import MetricsBuffer, TensorboardSink
+
 
 class RLGPUAlgoObserver(AlgoObserver):
     """Allows us to log stats from the env along with the algorithm running stats. """
@@ -44,15 +46,16 @@ class RLGPUAlgoObserver(AlgoObserver):
     def after_init(self, algo):
         self.algo = algo
         self.mean_scores = torch_ext.AverageMeter(1, self.algo.games_to_track).to(self.algo.ppo_device)
-        self.ep_infos = []
         self.direct_info = {}
         self.writer = self.algo.writer
+        # episode infos are accumulated on device and written once per print
+        self.episode_metrics = MetricsBuffer([TensorboardSink(self.writer, prefix="Episode/")], self.algo.device, flush_steps=None)
 
     def process_infos(self, infos, done_indices):
         assert isinstance(infos, dict), "RLGPUAlgoObserver expects dict info"
         if isinstance(infos, dict):
             if 'episode' in infos:
-                self.ep_infos.append(infos['episode'])
+                self.accumulate_episode_info(infos['episode'])
 
             if len(infos) > 0 and isinstance(infos, dict):  # allow direct logging from env
                 self.direct_info = {}
@@ -61,29 +64,30 @@ class RLGPUAlgoObserver(AlgoObserver):
                     if isinstance(v, float) or isinstance(v, int) or (isinstance(v, torch.Tensor) and len(v.shape) == 0):
                         self.direct_info[k] = v
 
+    def accumulate_episode_info(self, ep_info):
+        self.episode_metrics.add(ep_info)
+
     def after_clear_stats(self):
         self.mean_scores.clear()
 
     def after_print_stats(self, frame, epoch_num, total_time):
-        if self.ep_infos:
-            for key in self.ep_infos[0]:
-                    infotensor = torch.tensor([], device=self.algo.device)
-                    for ep_info in self.ep_infos:
-                        # handle scalar and zero dimensional tensor infos
-                        if not isinstance(ep_info[key], torch.Tensor):
-                            ep_info[key] = torch.Tensor([ep_info[key]])
-                        if len(ep_info[key].shape) == 0:
-                            ep_info[key] = ep_info[key].unsqueeze(0)
-                        infotensor = torch.cat((infotensor, ep_info[key].to(self.algo.device)))
-                    value = torch.mean(infotensor)
-                    self.writer.add_scalar('Episode/' + key, value, epoch_num)
-            self.ep_infos.clear()
-        
+        self.episode_metrics.flush(epoch_num)
+
         for k, v in self.direct_info.items():
             self.writer.add_scalar(f'{k}/frame', v, frame)
             self.writer.add_scalar(f'{k}/iter', v, epoch_num)
             self.writer.add_scalar(f'{k}/time', v, total_time)
 
+        # step phase timings of the task, when profiling is enabled
+        task = getattr(getattr(self.algo.vec_env, "env", None), "_task", None)
+        if task is not None and task.profiler.enabled:
+            task.profiler.write(self.writer, frame)
+
+        # thread stall statistics of the multi-threaded workflow
+        stall_stats = getattr(getattr(self.algo.vec_env, "env", None), "stall_stats", None)
+        if stall_stats is not None:
+            stall_stats.write(self.writer, frame)
+
         if self.mean_scores.current_size > 0:
             mean_scores = self.mean_scores.get_mean()
             self.writer.add_scalar('scores/mean', mean_scores, frame)
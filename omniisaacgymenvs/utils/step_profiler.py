@@ -0,0 +1,150 @@
+# Copyright (c) 2018-2022, NVIDIA Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import contextlib
+import time
+
+import torch
+
+
+class _Phase():
+    """ Timing context of one named phase, reused for every step. At most ``max_events`` event pairs are
+        recorded per window, so the GPU time of a window that is never reported does not grow without bound. """
+
+    def __init__(self, cuda_events, max_events):
+        self._cuda_events = cuda_events
+        self._max_events = max_events
+        self._events = []
+        self._num_events = 0
+        self._recording = False
+        self._start = 0.0
+        self.wall_time = 0.0
+        self.count = 0
+
+    def __enter__(self):
+        self._recording = self._cuda_events and self._num_events < self._max_events
+        if self._recording:
+            if self._num_events == len(self._events):
+                self._events.append((torch.cuda.Event(enable_timing=True), torch.cuda.Event(enable_timing=True)))
+            self._events[self._num_events][0].record()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.wall_time += time.perf_counter() - self._start
+        self.count += 1
+        if self._recording:
+            self._events[self._num_events][1].record()
+            self._num_events += 1
+
+    def gpu_time(self):
+        """ Returns the summed GPU time of the window in seconds, waiting for the last recorded event. """
+        if self._num_events == 0:
+            return 0.0
+        self._events[self._num_events - 1][1].synchronize()
+        return sum(start.elapsed_time(end) for start, end in self._events[:self._num_events]) / 1000.0
+
+    def reset(self):
+        self._num_events = 0
+        self.wall_time = 0.0
+        self.count = 0
+
+
+class StepProfiler():
+    """ Opt-in per-phase timing of the RL step.
+
+        Phases are timed with ``with profiler.phase(name):`` blocks. When the profiler is disabled, ``phase``
+        returns a shared no-op context, so the instrumented code only pays for one method call per phase.
+        Wall times are always recorded; on GPU, ``cuda_events`` additionally records start and end events of
+        every phase, which are only read back once per window. Every ``window`` steps the mean time per
+        step of each phase is stored in ``summary``, printed as a table if ``print_table`` is set, and
+        can be written to a tensorboard SummaryWriter with ``write``.
+
+    Args:
+        name (str): name shown in the table, usually the task name.
+        enabled (bool): whether phases are timed.
+        window (int): number of steps aggregated per report.
+        cuda_events (bool): whether to also record GPU time with CUDA events.
+        print_table (bool): whether to print the table after every window.
+    """
+
+    _NULL_PHASE = contextlib.nullcontext()
+
+    def __init__(self, name, enabled=False, window=100, cuda_events=False, print_table=True):
+        self.name = name
+        self.enabled = enabled
+        self.window = window
+        self.cuda_events = cuda_events and torch.cuda.is_available()
+        self.print_table = print_table
+        self.summary = {}
+        self._phases = {}
+        self._steps = 0
+
+    def phase(self, name):
+        if not self.enabled:
+            return self._NULL_PHASE
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = _Phase(self.cuda_events, self.window)
+            self._phases[name] = phase
+        return phase
+
+    def step(self):
+        if not self.enabled:
+            return
+        self._steps += 1
+        if self._steps % self.window == 0:
+            self.report()
+
+    def report(self):
+        """ Aggregates the phases of the current window into ``summary`` and starts a new window. """
+        self.summary = {}
+        for name, phase in self._phases.items():
+            self.summary[name] = {
+                "wall_ms": 1000.0 * phase.wall_time / self.window,
+                "gpu_ms": 1000.0 * phase.gpu_time() / self.window if self.cuda_events else None,
+                "calls": phase.count / self.window,
+            }
+            phase.reset()
+        if self.print_table:
+            print(self.table())
+
+    def table(self):
+        lines = [f"[{self.name}] mean time per step over {self.window} steps", f"{'phase':<36}{'wall ms':>12}{'gpu ms':>12}{'calls':>8}"]
+        for name, stats in self.summary.items():
+            gpu_ms = f"{stats['gpu_ms']:>12.3f}" if stats["gpu_ms"] is not None else f"{'-':>12}"
+            lines.append(f"{name:<36}{stats['wall_ms']:>12.3f}{gpu_ms}{stats['calls']:>8.1f}")
+        return "\n".join(lines)
+
+    def write(self, writer, step):
+        for name, stats in self.summary.items():
+            writer.add_scalar(f"profile/{name}_wall_ms", stats["wall_ms"], step)
+            if stats["gpu_ms"] is not None:
+                writer.add_scalar(f"profile/{name}_gpu_ms", stats["gpu_ms"], step)
@@ -32,9 +32,7 @@ from numpy.random import choice
 from scipy import interpolate
 
 from math import sqrt
-
-from omni.isaac.core.prims import XFormPrim
-from pxr import UsdPhysics, Sdf, Gf, PhysxSchema
+import os
 
 
 def random_uniform_terrain(terrain, min_height, max_height, step=1, downsampled_scale=None,):
@@ -151,12 +149,22 @@ def discrete_obstacles_terrain(terrain, max_height, min_size, max_size, num_rect
     width_range = range(min_size, max_size, 4)
     length_range = range(min_size, max_size, 4)
 
-    for _ in range(num_rects):
-        width = np.random.choice(width_range)
-        length = np.random.choice(length_range)
-        start_i = np.random.choice(range(0, i-width, 4))
-        start_j = np.random.choice(range(0, j-length, 4))
-        terrain.height_field_raw[start_i:start_i+width, start_j:start_j+length] = np.random.choice(height_range)
+    # draw all obstacles at once, start positions are uniform over multiples of 4 that keep the obstacle inside
+    widths = np.random.choice(width_range, num_rects)
+    lengths = np.random.choice(length_range, num_rects)
+    start_i = 4 * np.floor(np.random.uniform(size=num_rects) * np.ceil((i - widths) / 4)).astype(int)
+    start_j = 4 * np.floor(np.random.uniform(size=num_rects) * np.ceil((j - lengths) / 4)).astype(int)
+    heights = np.random.choice(height_range, num_rects)
+
+    # later obstacles are painted over earlier ones, so every cell takes the height of the last obstacle covering it
+    rows = np.arange(i)
+    cols = np.arange(j)
+    in_rows = (rows[None, :] >= start_i[:, None]) & (rows[None, :] < (start_i + widths)[:, None])
+    in_cols = (cols[None, :] >= start_j[:, None]) & (cols[None, :] < (start_j + lengths)[:, None])
+    covered = in_rows[:, :, None] & in_cols[:, None, :]
+    last_rect = num_rects - 1 - np.argmax(covered[::-1], axis=0)
+    covered_any = covered.any(axis=0)
+    terrain.height_field_raw[covered_any] = heights[last_rect[covered_any]]
 
     x1 = (terrain.width - platform_size) // 2
     x2 = (terrain.width + platform_size) // 2
@@ -203,10 +211,9 @@ def stairs_terrain(terrain, step_width, step_height):
     step_height = int(step_height / terrain.vertical_scale)
 
     num_steps = terrain.width // step_width
-    height = step_height
-    for i in range(num_steps):
-        terrain.height_field_raw[i * step_width: (i + 1) * step_width, :] += height
-        height += step_height
+    step = np.arange(terrain.width) // step_width
+    heights = np.where(step < num_steps, (step + 1) * step_height, 0)
+    terrain.height_field_raw += heights[:, None].astype(terrain.height_field_raw.dtype)
     return terrain
 
 def pyramid_stairs_terrain(terrain, step_width, step_height, platform_size=1.):
@@ -226,18 +233,17 @@ def pyramid_stairs_terrain(terrain, step_width, step_height, platform_size=1.):
     step_height = int(step_height / terrain.vertical_scale)
     platform_size = int(platform_size / terrain.horizontal_scale)
 
-    height = 0
-    start_x = 0
-    stop_x = terrain.width
-    start_y = 0
-    stop_y = terrain.length
-    while (stop_x - start_x) > platform_size and (stop_y - start_y) > platform_size:
-        start_x += step_width
-        stop_x -= step_width
-        start_y += step_width
-        stop_y -= step_width
-        height += step_height
-        terrain.height_field_raw[start_x: stop_x, start_y: stop_y] = height
+    # number of steps until the remaining area is not larger than the platform
+    num_steps = max(0, min(-(-(terrain.width - platform_size) // (2 * step_width)), -(-(terrain.length - platform_size) // (2 * step_width))))
+
+    # step index of every cell, i.e. the number of step_width wide rings between the cell and the border
+    x = np.arange(terrain.width)
+    y = np.arange(terrain.length)
+    level_x = np.minimum(x // step_width, (terrain.width - 1 - x) // step_width)
+    level_y = np.minimum(y // step_width, (terrain.length - 1 - y) // step_width)
+    level = np.minimum(np.minimum(level_x[:, None], level_y[None, :]), num_steps)
+
+    terrain.height_field_raw[:] = np.where(level > 0, level * step_height, terrain.height_field_raw)
     return terrain
 
 def stepping_stones_terrain(terrain, stone_size, stone_distance, max_height, platform_size=1., depth=-10):
@@ -261,35 +267,13 @@ def stepping_stones_terrain(terrain, stone_size, stone_distance, max_height, pla
     platform_size = int(platform_size / terrain.horizontal_scale)
     height_range = np.arange(-max_height-1, max_height, step=1)
 
-    start_x = 0
-    start_y = 0
     terrain.height_field_raw[:, :] = int(depth / terrain.vertical_scale)
     if terrain.length >= terrain.width:
-        while start_y < terrain.length:
-            stop_y = min(terrain.length, start_y + stone_size)
-            start_x = np.random.randint(0, stone_size)
-            # fill first hole
-            stop_x = max(0, start_x - stone_distance)
-            terrain.height_field_raw[0: stop_x, start_y: stop_y] = np.random.choice(height_range)
-            # fill row
-            while start_x < terrain.width:
-                stop_x = min(terrain.width, start_x + stone_size)
-                terrain.height_field_raw[start_x: stop_x, start_y: stop_y] = np.random.choice(height_range)
-                start_x += stone_size + stone_distance
-            start_y += stone_size + stone_distance
+        # rows of stones along the length
+        _paint_stepping_stones(terrain.height_field_raw, stone_size, stone_distance, height_range)
     elif terrain.width > terrain.length:
-        while start_x < terrain.width:
-            stop_x = min(terrain.width, start_x + stone_size)
-            start_y = np.random.randint(0, stone_size)
-            # fill first hole
-            stop_y = max(0, start_y - stone_distance)
-            terrain.height_field_raw[start_x: stop_x, 0: stop_y] = np.random.choice(height_range)
-            # fill column
-            while start_y < terrain.length:
-                stop_y = min(terrain.length, start_y + stone_size)
-                terrain.height_field_raw[start_x: stop_x, start_y: stop_y] = np.random.choice(height_range)
-                start_y += stone_size + stone_distance
-            start_x += stone_size + stone_distance
+        # columns of stones along the width
+        _paint_stepping_stones(terrain.height_field_raw.T, stone_size, stone_distance, height_range)
 
     x1 = (terrain.width - platform_size) // 2
     x2 = (terrain.width + platform_size) // 2
@@ -298,7 +282,36 @@ def stepping_stones_terrain(terrain, stone_size, stone_distance, max_height, pla
     terrain.height_field_raw[x1:x2, y1:y2] = 0
     return terrain
 
-def convert_heightfield_to_trimesh(height_field_raw, horizontal_scale, vertical_scale, slope_threshold=None):
+def _paint_stepping_stones(height_field, stone_size, stone_distance, height_range):
+    """
+    Paint rows of stepping stones along the second axis of height_field, with the stones of each row
+    spaced along the first axis starting at a random offset. The gap before the first stone of a row is
+    filled as well. All random draws are done at once.
+    """
+    (num_x, num_y) = height_field.shape
+    period = stone_size + stone_distance
+
+    y = np.arange(num_y)
+    row = y // period
+    in_row = (y % period) < stone_size
+    num_rows = (num_y + period - 1) // period
+    num_stones = (num_x + period - 1) // period
+
+    start_x = np.random.randint(0, stone_size, size=num_rows)
+    first_heights = np.random.choice(height_range, num_rows)
+    stone_heights = np.random.choice(height_range, (num_rows, num_stones))
+
+    x = np.arange(num_x)[:, None]
+    rel_x = x - start_x[row][None, :]
+    stone = rel_x // period
+    in_stone = (rel_x >= 0) & ((rel_x % period) < stone_size) & in_row[None, :]
+    in_first_hole = (x < np.maximum(0, start_x - stone_distance)[row][None, :]) & in_row[None, :]
+
+    rows = np.broadcast_to(row[None, :], height_field.shape)
+    height_field[in_stone] = stone_heights[rows[in_stone], stone[in_stone]]
+    height_field[in_first_hole] = first_heights[rows[in_first_hole]]
+
+def convert_heightfield_to_trimesh(height_field_raw, horizontal_scale, vertical_scale, slope_threshold=None, output_dir=None):
     """
     Convert a heightfield array to a triangle mesh represented by vertices and triangles.
     Optionally, corrects vertical surfaces above the provide slope threshold:
@@ -315,6 +328,7 @@ def convert_heightfield_to_trimesh(height_field_raw, horizontal_scale, vertical_
         horizontal_scale (float): horizontal scale of the heightfield [meters]
         vertical_scale (float): vertical scale of the heightfield [meters]
         slope_threshold (float): the slope threshold above which surfaces are made vertical. If None no correction is applied (default: None)
+        output_dir (str): if given, vertices and triangles are written to memory-mapped vertices.npy and triangles.npy files in this directory (default: None)
     Returns:
         vertices (np.array(float)): array of shape (num_vertices, 3). Each row represents the location of each vertex [meters]
         triangles (np.array(int)): array of shape (num_triangles, 3). Each row represents the indices of the 3 vertices connected by this triangle.
@@ -325,46 +339,58 @@ def convert_heightfield_to_trimesh(height_field_raw, horizontal_scale, vertical_
 
     y = np.linspace(0, (num_cols-1)*horizontal_scale, num_cols)
     x = np.linspace(0, (num_rows-1)*horizontal_scale, num_rows)
-    yy, xx = np.meshgrid(y, x)
+
+    # create triangle mesh vertices from the heightfield grid, filled in place as float32
+    vertices = _empty_array((num_rows*num_cols, 3), np.float32, output_dir, "vertices")
+    grid = vertices.reshape(num_rows, num_cols, 3)
+    grid[:, :, 0] = x[:, None]
+    grid[:, :, 1] = y[None, :]
+    np.multiply(hf.reshape(-1), vertical_scale, out=vertices[:, 2])
 
     if slope_threshold is not None:
 
         slope_threshold *= horizontal_scale / vertical_scale
-        move_x = np.zeros((num_rows, num_cols))
-        move_y = np.zeros((num_rows, num_cols))
-        move_corners = np.zeros((num_rows, num_cols))
+        move_x = np.zeros((num_rows, num_cols), dtype=np.int8)
+        move_y = np.zeros((num_rows, num_cols), dtype=np.int8)
+        move_corners = np.zeros((num_rows, num_cols), dtype=np.int8)
         move_x[:num_rows-1, :] += (hf[1:num_rows, :] - hf[:num_rows-1, :] > slope_threshold)
         move_x[1:num_rows, :] -= (hf[:num_rows-1, :] - hf[1:num_rows, :] > slope_threshold)
         move_y[:, :num_cols-1] += (hf[:, 1:num_cols] - hf[:, :num_cols-1] > slope_threshold)
         move_y[:, 1:num_cols] -= (hf[:, :num_cols-1] - hf[:, 1:num_cols] > slope_threshold)
         move_corners[:num_rows-1, :num_cols-1] += (hf[1:num_rows, 1:num_cols] - hf[:num_rows-1, :num_cols-1] > slope_threshold)
         move_corners[1:num_rows, 1:num_cols] -= (hf[:num_rows-1, :num_cols-1] - hf[1:num_rows, 1:num_cols] > slope_threshold)
-        xx += (move_x + move_corners*(move_x == 0)) * horizontal_scale
-        yy += (move_y + move_corners*(move_y == 0)) * horizontal_scale
-
-    # create triangle mesh vertices and triangles from the heightfield grid
-    vertices = np.zeros((num_rows*num_cols, 3), dtype=np.float32)
-    vertices[:, 0] = xx.flatten()
-    vertices[:, 1] = yy.flatten()
-    vertices[:, 2] = hf.flatten() * vertical_scale
-    triangles = -np.ones((2*(num_rows-1)*(num_cols-1), 3), dtype=np.uint32)
-    for i in range(num_rows - 1):
-        ind0 = np.arange(0, num_cols-1) + i*num_cols
-        ind1 = ind0 + 1
-        ind2 = ind0 + num_cols
-        ind3 = ind2 + 1
-        start = 2*i*(num_cols-1)
-        stop = start + 2*(num_cols-1)
-        triangles[start:stop:2, 0] = ind0
-        triangles[start:stop:2, 1] = ind3
-        triangles[start:stop:2, 2] = ind1
-        triangles[start+1:stop:2, 0] = ind0
-        triangles[start+1:stop:2, 1] = ind2
-        triangles[start+1:stop:2, 2] = ind3
+        move_x += move_corners*(move_x == 0)
+        move_y += move_corners*(move_y == 0)
+
+        # only the moved vertices need their coordinates recomputed
+        rows, cols = np.nonzero(move_x)
+        grid[rows, cols, 0] = x[rows] + move_x[rows, cols].astype(np.float64) * horizontal_scale
+        rows, cols = np.nonzero(move_y)
+        grid[rows, cols, 1] = y[cols] + move_y[rows, cols].astype(np.float64) * horizontal_scale
+
+    # each grid cell is split into two triangles, (0, 3, 1) and (0, 2, 3) with 0 being the top left corner
+    triangles = _empty_array((2*(num_rows-1)*(num_cols-1), 3), np.uint32, output_dir, "triangles")
+    ind0 = (np.arange(num_rows-1, dtype=np.uint32)[:, None] * num_cols + np.arange(num_cols-1, dtype=np.uint32)[None, :]).reshape(-1)
+    cells = triangles.reshape(-1, 2, 3)
+    cells[:, 0, 0] = ind0
+    np.add(ind0, num_cols + 1, out=cells[:, 0, 1])
+    np.add(ind0, 1, out=cells[:, 0, 2])
+    cells[:, 1, 0] = ind0
+    np.add(ind0, num_cols, out=cells[:, 1, 1])
+    np.add(ind0, num_cols + 1, out=cells[:, 1, 2])
 
     return vertices, triangles
+
+def _empty_array(shape, dtype, output_dir=None, name=None):
+    if output_dir is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(os.path.join(output_dir, name + ".npy"), mode="w+", dtype=dtype, shape=shape)
     
 def add_terrain_to_stage(stage, vertices, triangles, position=None, orientation=None):
+    # imported here so that the terrain generation above can run in worker processes without the simulator
+    from omni.isaac.core.prims import XFormPrim
+    from pxr import UsdPhysics, PhysxSchema
+
     num_faces = triangles.shape[0]
     terrain_mesh = stage.DefinePrim("/World/terrain", "Mesh")
     terrain_mesh.GetAttribute("points").Set(vertices)
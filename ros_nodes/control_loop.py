@@ -0,0 +1,167 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class StateSnapshot:
+    """Latest-value store written by sensor callbacks and read by the inference thread.
+
+    Every field is double buffered: a writer fills the inactive slot and then publishes it by flipping the
+    field's slot index, so writers never wait for the reader. Each field must have a single writer. Readers
+    copy the published slot and retry if the field was republished while they were copying, so they never
+    see a half written value.
+    """
+
+    def __init__(self, fields, clock=time.monotonic):
+        self._clock = clock
+        self._slots = {name: np.zeros((2, size)) for name, size in fields.items()}
+        self._index = {name: 0 for name in fields}
+        self._version = {name: 0 for name in fields}
+        self._stamp = {name: None for name in fields}
+
+    def write(self, name, values):
+        # This is a seqlock that relies on the GIL: statements run in program order for every thread, so a
+        # reader that sees the bumped _version also sees the flipped _index and the filled slot. The version
+        # has to be bumped after the index flips, as a reader only retries when the version changed.
+        back = 1 - self._index[name]
+        self._slots[name][back] = values
+        self._stamp[name] = self._clock()
+        self._index[name] = back
+        self._version[name] += 1
+
+    def read(self, name, out):
+        # The slot being copied is only rewritten after a second write, which bumps the version again,
+        # so an unchanged version after the copy means the copy is complete.
+        while True:
+            version = self._version[name]
+            np.copyto(out, self._slots[name][self._index[name]])
+            if self._version[name] == version:
+                return out
+
+    def is_set(self, name):
+        return self._version[name] > 0
+
+    def age(self, name):
+        """Seconds since the field was last written, or None if it never was."""
+        if self._stamp[name] is None:
+            return None
+        return self._clock() - self._stamp[name]
+
+
+class FixedRateLoop(threading.Thread):
+    """Runs `step` at a fixed rate on its own thread, with jitter and deadline-miss accounting.
+
+    Wake-ups are scheduled from the previous deadline rather than from the end of the step, so the loop
+    does not drift. A step that ends after the next deadline counts as a miss, and the periods it overran
+    are skipped instead of being run back to back. `clock` and `wait(seconds)` can be replaced together,
+    e.g. by a fake clock whose wait advances its time, to run the loop without sleeping.
+    """
+
+    def __init__(self, rate, step, history=4096, clock=time.perf_counter, wait=None):
+        super().__init__(daemon=True)
+        self.period = 1.0 / rate
+        self._step = step
+        self._clock = clock
+        self._stop_event = threading.Event()
+        # waiting on the stop event lets stop() cut the wait short
+        self._wait = self._stop_event.wait if wait is None else wait
+        # lateness of every wake-up and duration of every step, in seconds
+        self._jitter = np.zeros(history)
+        self._durations = np.zeros(history)
+        self.num_steps = 0
+        self.deadline_misses = 0
+
+    def run(self):
+        deadline = self._clock()
+        while not self._stop_event.is_set():
+            start = self._clock()
+            i = self.num_steps % len(self._jitter)
+            self._jitter[i] = start - deadline
+            self._step()
+            end = self._clock()
+            self._durations[i] = end - start
+            self.num_steps += 1
+
+            deadline += self.period
+            if end > deadline:
+                self.deadline_misses += 1
+                deadline += np.ceil((end - deadline) / self.period) * self.period
+            self._wait(max(0.0, deadline - self._clock()))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self):
+        """Returns jitter and step duration percentiles in milliseconds, and the deadline-miss count."""
+        num = min(self.num_steps, len(self._jitter))
+        if num == 0:
+            return {"steps": 0, "deadline_misses": 0}
+        jitter = self._jitter[:num] * 1000.0
+        durations = self._durations[:num] * 1000.0
+        return {
+            "steps": self.num_steps,
+            "deadline_misses": self.deadline_misses,
+            "jitter_p50_ms": float(np.percentile(jitter, 50)),
+            "jitter_p99_ms": float(np.percentile(jitter, 99)),
+            "jitter_max_ms": float(jitter.max()),
+            "step_p50_ms": float(np.percentile(durations, 50)),
+            "step_p99_ms": float(np.percentile(durations, 99)),
+        }
+
+
+class TransformLookup:
+    """Non-blocking TF lookups with a latency budget.
+
+    Asks the buffer for the latest available transform without waiting and rejects transforms older than
+    `max_age` seconds, so the controller never blocks on TF nor acts on stale poses. Any object with a
+    tf2_ros.Buffer style `lookup_transform(target, source, time)` works, e.g. FakeTFBuffer.
+    """
+
+    def __init__(self, tf_buffer, now, max_age=0.1, latest_time=0, exceptions=(Exception,)):
+        self._tf_buffer = tf_buffer
+        self._now = now
+        self._latest_time = latest_time
+        self._exceptions = exceptions
+        self.max_age = max_age
+        self.failures = 0
+        self.stale = 0
+
+    def lookup(self, target, source):
+        """Returns (position, quaternion xyzw) of source in target, or None if unavailable or too old."""
+        try:
+            transform = self._tf_buffer.lookup_transform(target, source, self._latest_time)
+        except self._exceptions:
+            self.failures += 1
+            return None
+        if self._now() - transform.header.stamp.to_sec() > self.max_age:
+            self.stale += 1
+            return None
+        translation = transform.transform.translation
+        rotation = transform.transform.rotation
+        return (np.array([translation.x, translation.y, translation.z]),
+                np.array([rotation.x, rotation.y, rotation.z, rotation.w]))
+
+
+class FakeTFBuffer:
+    """Stand-in for tf2_ros.Buffer serving the transforms given to `set_transform`, for running nodes without ROS."""
+
+    def __init__(self, now):
+        self._now = now
+        self._transforms = {}
+
+    def set_transform(self, target, source, position, quaternion=(0.0, 0.0, 0.0, 1.0), stamp=None):
+        stamp = self._now() if stamp is None else stamp
+        self._transforms[(target, source)] = SimpleNamespace(
+            header=SimpleNamespace(stamp=SimpleNamespace(to_sec=lambda: stamp)),
+            transform=SimpleNamespace(
+                translation=SimpleNamespace(x=position[0], y=position[1], z=position[2]),
+                rotation=SimpleNamespace(x=quaternion[0], y=quaternion[1], z=quaternion[2], w=quaternion[3]),
+            ),
+        )
+
+    def lookup_transform(self, target, source, time, timeout=None):
+        if (target, source) not in self._transforms:
+            raise LookupError("no transform from {} to {}".format(source, target))
+        return self._transforms[(target, source)]
@@ -7,21 +7,34 @@ import tf2_ros
 from tf.transformations import euler_from_quaternion, quaternion_from_euler
 from geometry_msgs.msg import Twist
 from geometry_msgs.msg import PointStamped
-from collections import deque, defaultdict
 
 
 import onnxruntime as ort
 import numpy as np
 #import moveit_commander
+import os
 import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from trajectory_recorder import TrajectoryRecorder
+
+
+# columns of the run logs read by plot.py and the notebooks
+TRAJECTORY_FIELDS = [
+    "base_x", "base_y", "base_yaw",
+    "left_finger_x", "left_finger_y", "left_finger_z",
+    "target_x", "target_y", "target_z",
+    "distance_from_target", "elapsed_time",
+]
+
+
 class ExportHelper:
 
     def __init__(self, argv):
         experiment = argv[1]
         point = argv[2]
         method = argv[3]
-        self.output_filename = "{}_{}_{}.csv".format(experiment, point, method)
+        self.output_filename = "{}_{}_{}.npy".format(experiment, point, method)
         #self.output_filename = "e3_p3_baseline.csv"
 
         # p1   0.4,  -0.6,   0.5
@@ -51,17 +64,21 @@ class ExportHelper:
 
         self.start_time = None
 
-        rospy.Timer(rospy.Duration(1/30.0), self.update_base_pose)
+        self.recorder = TrajectoryRecorder(self.output_filename, TRAJECTORY_FIELDS)
 
-        self.data = defaultdict(list)
+        self.pose_timer = rospy.Timer(rospy.Duration(1/30.0), self.update_base_pose)
 
         rospy.on_shutdown(self.shutdown_hook)
     
     def shutdown_hook(self):
-        import pandas as pd
-        print("\nexporting data to csv file: ", self.output_filename)     
-        df = pd.DataFrame(self.data)
-        df.to_csv(self.output_filename, index=False)
+        # the pose timer records rows, it has to be done before the recorder is closed
+        self.pose_timer.shutdown()
+        self.pose_timer.join(timeout=1.0)
+        try:
+            self.recorder.close()
+        except IOError as e:
+            print(e)
+        print("\nrecorded {} rows to {}".format(self.recorder.num_rows, self.output_filename))
 
         # Q: what is the command to set sim time parameter in ros
         # A: rosparam set use_sim_time true
@@ -113,20 +130,16 @@ class ExportHelper:
             print("elapsed time:", elapsed_time.to_sec())
             print("-----------------")
 
-            self.data["base_x"].append(self.base_position[0])
-            self.data["base_y"].append(self.base_position[1])
-            self.data["base_yaw"].append(self.base_yaw)
-            self.data["left_finger_x"].append(self.left_finger_position[0])
-            self.data["left_finger_y"].append(self.left_finger_position[1])
-            self.data["left_finger_z"].append(self.left_finger_position[2])
-            self.data["target_x"].append(self.target_pos[0])
-            self.data["target_y"].append(self.target_pos[1])
-            self.data["target_z"].append(self.target_pos[2])
-            self.data["distance_from_target"].append(distance_from_target)
-            self.data["elapsed_time"].append(elapsed_time.to_sec())
+            self.recorder.record(
+                self.base_position[0], self.base_position[1], self.base_yaw, *self.left_finger_position,
+                *self.target_pos, distance_from_target, elapsed_time.to_sec(),
+            )
                 
         except (tf2_ros.LookupException, tf2_ros.ConnectivityException, tf2_ros.ExtrapolationException):
             print("lookup tf error")
+        except IOError as e:
+            # the run goes on without the rows that could not be written
+            print(e)
 
 
 if __name__ == '__main__':
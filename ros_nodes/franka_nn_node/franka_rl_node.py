@@ -5,11 +5,14 @@ from sensor_msgs.msg import JointState
 from control_msgs.msg import FollowJointTrajectoryActionGoal, GripperCommandActionGoal
 from trajectory_msgs.msg import JointTrajectory, JointTrajectoryPoint
 
-import onnxruntime as ort
 import numpy as np
 #import moveit_commander
+import os
 import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from policy_runtime import PolicyRuntime
+
 
 class RLNode:
 
@@ -24,9 +27,9 @@ class RLNode:
         if len(sys.argv) > 1:
             self.task = sys.argv[1]
         if self.task == "ground":
-            self.ort_model = ort.InferenceSession("franka_reachground.onnx")
+            self.policy = PolicyRuntime("franka_reachground.onnx")
         else:
-            self.ort_model = ort.InferenceSession("franka_reachup.onnx")
+            self.policy = PolicyRuntime("franka_reachup.onnx")
 
         self.joint_positions = np.zeros(9)
         self.joint_velocities = np.zeros(9)
@@ -75,12 +78,11 @@ class RLNode:
 
         to_target = np.array([0.5, 0.5, -0.5])
 
+        observation = self.policy.obs[0]
+        observation[:9] = pos_scaled
+        observation[9:18] = vel_scaled
         if self.task == "ground":
-            observation = np.concatenate((pos_scaled, vel_scaled, to_target)).astype(np.float32)
-        else:
-            observation = np.concatenate((pos_scaled, vel_scaled)).astype(np.float32)
-        
-        observation = observation.reshape((1,-1))
+            observation[18:21] = to_target
 
         # isaac code for observations
         # prop_pos = self._props.get_world_poses(clone=False)[0]
@@ -95,9 +97,8 @@ class RLNode:
         #     dim=-1,
         # )
 
-        outputs = self.ort_model.run(None, {"obs": observation})
-        mu = outputs[0].squeeze(0)
-        sigma = np.exp(outputs[1].squeeze(0))
+        mu = self.policy.act().squeeze(0)
+        sigma = np.exp(self.policy.log_std.squeeze(0))
         action = np.random.normal(mu, sigma)
 
         # isaac code for setting joint position targets          
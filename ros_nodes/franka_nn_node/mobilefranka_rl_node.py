@@ -9,22 +9,57 @@ from geometry_msgs.msg import Twist
 from geometry_msgs.msg import PointStamped
 
 
-import onnxruntime as ort
 import numpy as np
 #import moveit_commander
+import os
 import sys
-from collections import defaultdict
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from control_loop import FixedRateLoop, StateSnapshot, TransformLookup
+from policy_runtime import MultiAgentPolicyRuntime
+from trajectory_recorder import TrajectoryRecorder
+
+
+# columns of the run logs read by plot.py and the notebooks
+TRAJECTORY_FIELDS = [
+    "base_x", "base_y", "base_yaw",
+    "left_finger_x", "left_finger_y", "left_finger_z",
+    "target_x", "target_y", "target_z",
+    "distance_from_target", "elapsed_time",
+]
+
+# observation segments of the mobile franka policies, in the order of the Isaac Sim task observations
+OBS_SEGMENT_SIZES = {
+    "base_pos_xy": 2,
+    "base_yaw": 1,
+    "arm_dof_pos": 9,
+    "arm_dof_vel": 9,
+    "left_finger_pos": 3,
+    "target_pos": 3,
+}
+FULL_OBS = ["base_pos_xy", "base_yaw", "arm_dof_pos", "arm_dof_vel", "left_finger_pos", "target_pos"]
+# per-agent layouts of each method, the MARL policies append a base / arm one-hot id to every row
+OBS_LAYOUTS = {
+    "baseline": [FULL_OBS],
+    "m1": [FULL_OBS, FULL_OBS],
+    # m2 splits the state between the agents and pads the base row to the arm row length
+    "m2": [
+        ["base_pos_xy", "base_yaw", "left_finger_pos", "target_pos", ("pad", 15)],
+        ["arm_dof_pos", "arm_dof_vel", "left_finger_pos", "target_pos"],
+    ],
+}
 
 
 class MobileFrankaRLNode:
 
-    def __init__(self, argv):
+    def __init__(self, argv, tf_buffer=None):
 
         experiment = argv[1]
         point = argv[2]
         method = argv[3]
         run_number = argv[4]
-        self.output_filename = "{}_{}_{}_{}.csv".format(experiment, point, method, run_number)
+        self.output_filename = "{}_{}_{}_{}.npy".format(experiment, point, method, run_number)
 
         self.arm_joint_sub = rospy.Subscriber('/franka_state_controller/joint_states', JointState, self.arm_callback)
         #self.gripper_joint_sub = rospy.Subscriber('/franka_gripper/joint_states', JointState, self.gripper_callback)
@@ -52,23 +87,17 @@ class MobileFrankaRLNode:
             self.base_control = True
 
         if method == "baseline":
-            #self.ort_model = ort.InferenceSession("models/single_agent_mobilefranka.onnx")
-            self.ort_model = ort.InferenceSession("models/newmodels/baselinebest.onnx")
-            self.single_agent = True
-            self.use_cv = False
+            model_path = "models/newmodels/baselinebest.onnx"
         elif method == "m1":
-            self.ort_model = ort.InferenceSession("models/m1_exp_reward_mobilefranka.onnx")
-            #self.ort_model = ort.InferenceSession("models/newmodels/m1best.onnx")
-            self.single_agent = False
-            self.use_cv = False
+            model_path = "models/m1_exp_reward_mobilefranka.onnx"
         elif method == "m2":
-            #self.ort_model = ort.InferenceSession("models/mobilefrankaMARL_cv.onnx")
-            self.ort_model = ort.InferenceSession("models/newmodels/m2best.onnx")
-            self.single_agent = False
-            self.use_cv = True
+            model_path = "models/newmodels/m2best.onnx"
+        self.single_agent = method == "baseline"
+        self.policy = MultiAgentPolicyRuntime(
+            model_path, OBS_LAYOUTS[method], OBS_SEGMENT_SIZES, agent_ids=not self.single_agent
+        )
 
-        self.joint_positions = np.zeros(9)
-        self.joint_velocities = np.zeros(9)
+        self.dt = 1 / 60.0 # 60 Hz
 
         # arm joint dof limits from isaac
         self.lower_limits = np.array([-2.8973, -1.7628, -2.8973, -3.0718, -2.8973, -0.0175, -2.8973,  0.0000, 0.0000])
@@ -89,41 +118,78 @@ class MobileFrankaRLNode:
         else:
             print("invalid point")
             return
-        
+        self.policy.write("target_pos", self.target_pos)
+
         self.start_time = None
-        self.data = defaultdict(list)
-        rospy.on_shutdown(self.shutdown_hook)
+        self.recorder = TrajectoryRecorder(self.output_filename, TRAJECTORY_FIELDS)
 
-        #self.target_pos = np.array([-2.0, -1.0, 0.5])
         self.joint_targets = None
-
-        self.base_position = None
-        self.base_yaw = None
-        self.left_finger_position = None
-
-        self.last_base_position = None
-        self.last_base_yaw = None
-        self.base_velocity = None
-        self.base_yaw_velocity = None
-        
         self.first_position = None
 
-        self.tfBuffer = tf2_ros.Buffer()
-        self.listener = tf2_ros.TransformListener(self.tfBuffer)
-
-        self.dt = 1 / 60.0 # 60 Hz
-
-        rospy.Timer(rospy.Duration(self.dt), self.send_control)
+        # sensor callbacks and the pose timer publish into the snapshot, the inference thread copies the latest
+        # values into its own buffers at the start of every step
+        self.state = StateSnapshot({
+            "arm_joint_positions": 7,
+            "arm_joint_velocities": 7,
+            "gripper_joint_positions": 2,
+            "gripper_joint_velocities": 2,
+            "base_pose": 4,  # x, y, z relative to the first position and yaw
+            "left_finger_position": 3,
+        })
+        self.joint_positions = np.zeros(9)
+        self.joint_velocities = np.zeros(9)
+        self.base_pose = np.zeros(4)
+        self.left_finger_position = np.zeros(3)
+
+        # scaled joint observations and arm target updates are computed in place every control step
+        self.pos_scale = 2.0 / (self.upper_limits - self.lower_limits)
+        self.pos_scaled = np.zeros(9)
+        self.vel_scaled = np.zeros(9)
+        # speed scales are changed from isaac sim to be 0.1 times the isaac sim values
+        dof_speed_scales = np.array([0.1, 0.1 ,0.1 ,0.1, 0.1, 0.1, 0.1, 0.01, 0.01]) * 0.2
+        self.target_step_scale = dof_speed_scales * self.dt * 7.5
+        self.target_step = np.zeros(9)
+
+        # poses older than pose_max_age are rejected by the lookup, and the controller stops acting once the
+        # last accepted pose is older than pose_timeout
+        self.pose_max_age = rospy.get_param("~pose_max_age", 0.1)
+        self.pose_timeout = rospy.get_param("~pose_timeout", 0.5)
+        self.stale_steps = 0
+        self.last_log_time = 0.0
+
+        if tf_buffer is None:
+            tf_buffer = tf2_ros.Buffer()
+            self.listener = tf2_ros.TransformListener(tf_buffer)
+        self.tfBuffer = tf_buffer
+        self.transforms = TransformLookup(
+            tf_buffer,
+            now=lambda: rospy.get_rostime().to_sec(),
+            max_age=self.pose_max_age,
+            latest_time=rospy.Time(0),
+            exceptions=(tf2_ros.LookupException, tf2_ros.ConnectivityException, tf2_ros.ExtrapolationException),
+        )
+
+        self.control_loop = FixedRateLoop(1 / self.dt, self.control_step)
+        self.control_loop.start()
+        rospy.on_shutdown(self.shutdown_hook)
 
-        rospy.Timer(rospy.Duration(1/30.0), self.update_base_pose)
+        self.pose_timer = rospy.Timer(rospy.Duration(1/30.0), self.update_base_pose)
 
-        #rospy.Timer(rospy.Duration(1/10.0), self.update_base_velocity)
-    
     def shutdown_hook(self):
-        import pandas as pd
-        print("\nExporting data to csv file: ", self.output_filename)     
-        df = pd.DataFrame(self.data)
-        df.to_csv(self.output_filename, index=False)
+        self.control_loop.stop()
+        self.control_loop.join(timeout=1.0)
+        print("\ncontrol loop:", self.control_loop.stats())
+        print("pose lookups: {} failed, {} stale, {} control steps skipped on stale poses".format(
+            self.transforms.failures, self.transforms.stale, self.stale_steps))
+
+        # the pose timer records rows, it has to be done before the recorder is closed
+        self.pose_timer.shutdown()
+        self.pose_timer.join(timeout=1.0)
+        try:
+            self.recorder.close()
+        except IOError as e:
+            print(e)
+        print("Recorded {} rows to {}".format(self.recorder.num_rows, self.output_filename))
     
     def publish_target(self):
         target = PointStamped()
@@ -135,265 +201,124 @@ class MobileFrankaRLNode:
         target.point.z = target_point[2]
         self.target_pub.publish(target)
 
-    def update_base_velocity(self, timer_event):
-        """Calculate the base velocity in the x and y directions and the base yaw velocity"""
-        if self.base_position is not None and self.last_base_position is not None:
-            self.base_velocity = (self.base_position - self.last_base_position) / (1/10.0)
-            self.last_base_position = self.base_position
-        elif self.base_position is not None:
-            self.base_velocity = np.zeros(3)
-            self.last_base_position = self.base_position
-        else:
-            self.base_velocity = None
-
-        if self.base_yaw is not None and self.last_base_yaw is not None:
-            base_yaw_velocity = (self.base_yaw - self.last_base_yaw) / (1/10.0)
-            if np.abs(base_yaw_velocity) < 0.1:
-                self.base_yaw_velocity = 0
-            else:
-                self.base_yaw_velocity = base_yaw_velocity
-            self.last_base_yaw = self.base_yaw
-        elif self.base_yaw is not None:
-            self.base_yaw_velocity = 0
-            self.last_base_yaw = self.base_yaw
-        else:
-            self.base_yaw_velocity = None
-        print("basevel x", self.base_velocity[0])
-        print("basevel y", self.base_velocity[1])
-        print("baseyawvel", self.base_yaw_velocity)
-
-    
     def update_base_pose(self, timer_event):
         # get the first position as the origin
         if self.first_position is None:
-            try:
-                optitrack_trans = self.tfBuffer.lookup_transform('universe', 'husky_link', rospy.get_rostime(), rospy.Duration(1.0))
-                self.first_position = np.array([optitrack_trans.transform.translation.x, optitrack_trans.transform.translation.y, optitrack_trans.transform.translation.z])
-                self.start_time = rospy.Time.now()
-            except (tf2_ros.LookupException, tf2_ros.ConnectivityException, tf2_ros.ExtrapolationException):
-                print("tf error")
+            first_pose = self.transforms.lookup('universe', 'husky_link')
+            if first_pose is None:
+                rospy.logwarn_throttle(1.0, "waiting for the husky_link transform")
                 return
-        
-        # get the current position and rotation relative to the origin 
+            self.first_position = first_pose[0]
+            self.start_time = rospy.Time.now()
+
+        # get the current position and rotation relative to the origin, never waiting on tf
+        base_pose = self.transforms.lookup('universe', 'husky_link')
+        left_finger_pose = self.transforms.lookup('universe', 'panda_leftfinger')
+        if base_pose is None or left_finger_pose is None:
+            rospy.logwarn_throttle(1.0, "pose not available ({} failed, {} stale lookups)".format(
+                self.transforms.failures, self.transforms.stale))
+            return
+
+        base_position = base_pose[0] - self.first_position
+        roll, pitch, yaw = euler_from_quaternion(base_pose[1])
+        base_yaw = yaw % (2*np.pi)
+        left_finger_position = left_finger_pose[0] - self.first_position
+        self.state.write("base_pose", np.append(base_position, base_yaw))
+        self.state.write("left_finger_position", left_finger_position)
+
+        distance_from_target = np.linalg.norm(self.target_pos - left_finger_position)
+        elapsed_time = (rospy.Time.now() - self.start_time).to_sec()
+        now = time.monotonic()
+        if now - self.last_log_time > 1.0:
+            # one status line per second, the jitter percentiles are not worth computing on every tick
+            self.last_log_time = now
+            stats = self.control_loop.stats()
+            rospy.loginfo(
+                "t {:.1f}s base ({:.3f}, {:.3f}, yaw {:.3f}) left finger ({:.3f}, {:.3f}, {:.3f}) distance from target {:.3f} "
+                "| control jitter p99 {:.2f} ms, {} deadline misses".format(
+                    elapsed_time, base_position[0], base_position[1], base_yaw, *left_finger_position,
+                    distance_from_target, stats.get("jitter_p99_ms", 0.0), stats["deadline_misses"],
+                )
+            )
+        self.publish_target()
+
         try:
-            husky_trans = self.tfBuffer.lookup_transform('universe', 'husky_link', rospy.get_rostime(), rospy.Duration(1.0))
-            self.base_position = np.array([husky_trans.transform.translation.x, husky_trans.transform.translation.y, husky_trans.transform.translation.z]) - self.first_position
-            base_quat = np.array([husky_trans.transform.rotation.x, husky_trans.transform.rotation.y, husky_trans.transform.rotation.z, husky_trans.transform.rotation.w])
-            roll, pitch, yaw = euler_from_quaternion(base_quat)
-            #print("yaw % 2*np.pi", yaw % (2*np.pi))
-            self.base_yaw = yaw % (2*np.pi)
-            left_finger_trans = self.tfBuffer.lookup_transform('universe', 'panda_leftfinger', rospy.get_rostime(), rospy.Duration(1.0))
-            left_finger_position = np.array([left_finger_trans.transform.translation.x, left_finger_trans.transform.translation.y, left_finger_trans.transform.translation.z])
-            self.left_finger_position = left_finger_position - self.first_position
-            #print("self.base_position ", self.base_position)
-            #print("self.left_finger_position", self.left_finger_position)
-            distance_from_target = np.linalg.norm([self.target_pos - self.left_finger_position])
-            current_time = rospy.Time.now()
-            elapsed_time = current_time - self.start_time
-
-            print("base x:", '{:.3f}'.format(self.base_position[0]))
-            print("base y:", '{:.3f}'.format(self.base_position[1]))
-            print("base yaw:", '{:.3f}'.format(self.base_yaw))
-            print("left finger x:", '{:.3f}'.format(self.left_finger_position[0]))
-            print("left finger y:", '{:.3f}'.format(self.left_finger_position[1]))
-            print("left finger z:", '{:.3f}'.format(self.left_finger_position[2]))
-            print("target x:", '{:.3f}'.format(self.target_pos[0]))
-            print("target y:", '{:.3f}'.format(self.target_pos[1]))
-            print("target z:", '{:.3f}'.format(self.target_pos[2]))
-            print("distance from target:", distance_from_target)
-            print("elapsed time:", elapsed_time.to_sec())
-            print("-----------------")
-            # if distance_from_target < 0.08:
-            #     print("Goal reached!", "distance:", distance_from_target)
-            #     rospy.signal_shutdown()
-            self.publish_target()
-
-            current_time = rospy.Time.now()
-            elapsed_time = current_time - self.start_time
-
-            self.data["base_x"].append(self.base_position[0])
-            self.data["base_y"].append(self.base_position[1])
-            self.data["base_yaw"].append(self.base_yaw)
-            self.data["left_finger_x"].append(self.left_finger_position[0])
-            self.data["left_finger_y"].append(self.left_finger_position[1])
-            self.data["left_finger_z"].append(self.left_finger_position[2])
-            self.data["target_x"].append(self.target_pos[0])
-            self.data["target_y"].append(self.target_pos[1])
-            self.data["target_z"].append(self.target_pos[2])
-            self.data["distance_from_target"].append(distance_from_target)
-            self.data["elapsed_time"].append(elapsed_time.to_sec())
-                
-        except (tf2_ros.LookupException, tf2_ros.ConnectivityException, tf2_ros.ExtrapolationException):
-            print("tf error")
-        
-        # tf.transformations.euler_from_quaternion
-        # tf.transformations.quaternion_from_euler
+            self.recorder.record(
+                base_position[0], base_position[1], base_yaw, *left_finger_position, *self.target_pos,
+                distance_from_target, elapsed_time,
+            )
+        except IOError as e:
+            # the run goes on without the rows that could not be written
+            rospy.logerr_throttle(5.0, str(e))
 
-        
-    
     def optitrack_callback(self, msg):
-        # get the first position as the origin
-        # if self.first_position is None:
-        #     self.first_position = np.array([msg.pose.position.x, msg.pose.position.y, msg.pose.position.z])
-        # # get the current position relative to the origin
-        # self.base_position = np.array([msg.pose.position.x, msg.pose.position.y, msg.pose.position.z]) - self.first_position
-        # self.base_rotation = np.array([msg.pose.orientation.x, msg.pose.orientation.y, msg.pose.orientation.z, msg.pose.orientation.w])
-        # print(self.base_position)
-        # try:
-        #     trans = self.tfBuffer.lookup_transform('universe', 'husky_link', rospy.get_rostime())
-        #     print("trans", trans)
-        # except (tf2_ros.LookupException, tf2_ros.ConnectivityException, tf2_ros.ExtrapolationException):
-        #     print("tf2_ros error")
+        # the base pose comes from tf (see update_base_pose)
         pass
 
     def arm_callback(self, msg):
-        self.joint_positions[:7] = msg.position
-        self.joint_velocities[:7] = msg.velocity
+        self.state.write("arm_joint_positions", msg.position)
+        self.state.write("arm_joint_velocities", msg.velocity)
 
     def gripper_callback(self, msg):
-        self.joint_positions[7:] = msg.position
-        self.joint_velocities[7:] = msg.velocity
-
-    def send_control(self, timer_event):
+        self.state.write("gripper_joint_positions", msg.position)
+        self.state.write("gripper_joint_velocities", msg.velocity)
+
+    def read_state(self):
+        """Copies the latest snapshot into the inference buffers, returns False if a pose is missing or stale."""
+        if not self.state.is_set("base_pose") or not self.state.is_set("arm_joint_positions"):
+            return False
+        if self.state.age("base_pose") > self.pose_timeout:
+            self.stale_steps += 1
+            return False
+        self.state.read("arm_joint_positions", self.joint_positions[:7])
+        self.state.read("arm_joint_velocities", self.joint_velocities[:7])
+        self.state.read("gripper_joint_positions", self.joint_positions[7:])
+        self.state.read("gripper_joint_velocities", self.joint_velocities[7:])
+        self.state.read("base_pose", self.base_pose)
+        self.state.read("left_finger_position", self.left_finger_position)
+        return True
+
+    def control_step(self):
+        """Runs on the inference thread at 1 / dt."""
+        if not self.read_state():
+            return
 
         if self.joint_targets is None:
             # if self.joint_targets initializes to zeros it can make big movement which could break the real robot
             # so we check that joint_positions is not all zeros before initializing joint targets to it
             if self.joint_positions.sum() == 0:
-                print("here self.joint_positions.sum() == 0:")
                 return
-            else:
-                self.joint_targets = self.joint_positions
-        
-        if self.first_position is None or self.base_position is None or self.left_finger_position is None:
-            print("position not available")
-            return
-        # Isaac sim obs
-        # obs = torch.hstack((
-        #     base_pos_xy, 
-        #     base_yaw, 
-        #     arm_dof_pos_scaled,
-        #     #base_vel_xy, 
-        #     #base_angvel_z, 
-        #     franka_dof_vel[:, 3:] * self.dof_vel_scale,
-        #     self.franka_lfinger_pos,
-        #     self.target_positions
-        # )).to(dtype=torch.float32)
-        #
-        # base_id = torch.tensor([1.0, 0.0], device=self._device)
-        # arm_id = torch.tensor([0.0, 1.0], device=self._device)
-
-        #self.arm_move_group.get_current_joint_values()
-        
-        try:
-            base_pos_xy = self.base_position[:2]
-            base_yaw = np.array([self.base_yaw])
-            
-            # scale position and velocities accordingly
-            pos_scaled = 2.0 * (self.joint_positions - self.lower_limits) / (self.upper_limits - self.lower_limits) - 1.0
-            vel_scaled = self.joint_velocities * 0.1
-
-            left_finger_pos = self.left_finger_position
-            target_pos = self.target_pos
+            self.joint_targets = self.joint_positions.copy()
 
+        try:
+            # only the segments that changed since the last step are written, see OBS_LAYOUTS
+            self.policy.write("base_pos_xy", self.base_pose[:2])
+            self.policy.write("base_yaw", self.base_pose[3:])
+            np.subtract(self.joint_positions, self.lower_limits, out=self.pos_scaled)
+            self.pos_scaled *= self.pos_scale
+            self.pos_scaled -= 1.0
+            self.policy.write("arm_dof_pos", self.pos_scaled)
+            np.multiply(self.joint_velocities, 0.1, out=self.vel_scaled)
+            self.policy.write("arm_dof_vel", self.vel_scaled)
+            self.policy.write("left_finger_pos", self.left_finger_position)
+
+            action = self.policy.act_agents()
             if self.single_agent:
-                observation = np.concatenate((base_pos_xy, base_yaw, pos_scaled, vel_scaled, left_finger_pos, target_pos)).astype(np.float32)
-                observation = observation.reshape((1,-1))
-                outputs = self.ort_model.run(None, {"obs": observation})
-                mu = outputs[0].squeeze()
-                sigma = np.exp(outputs[1].squeeze())
-                action = np.random.normal(mu, sigma)
-                action = np.clip(mu, -1.0, 1.0)
-
-                #print(action.shape)
-                base_action = action[:2]
-                arm_action = action[2:]
+                base_action = action[0, :2]
+                arm_action = action[0, 2:]
             else:
-                base_id = np.array([1.0, 0.0])
-                arm_id = np.array([0.0, 1.0])
-
-                if self.use_cv:
-                    base_observation = np.concatenate((base_pos_xy, base_yaw, left_finger_pos, target_pos, np.zeros(15), base_id)).astype(np.float32)
-                    arm_observation = np.concatenate((pos_scaled, vel_scaled, left_finger_pos, target_pos, arm_id)).astype(np.float32)
-                    observation = np.vstack((base_observation, arm_observation))
-
-                    # outputs = self.ort_model.run(None, {"obs": base_observation.reshape((1,-1))})
-                    # mu = outputs[0]
-                    # sigma = np.exp(outputs[1])
-                    # #action = np.random.normal(mu, sigma)
-                    # base_action = np.clip(mu, -1.0, 1.0)
-
-                    # outputs = self.ort_model.run(None, {"obs": arm_observation.reshape((1,-1))})
-                    # mu = outputs[0]
-                    # sigma = np.exp(outputs[1])
-                    # #action = np.random.normal(mu, sigma)
-                    # arm_action = np.clip(mu, -1.0, 1.0)
-                else:
-                    base_observation = np.concatenate((base_pos_xy, base_yaw, pos_scaled, vel_scaled, left_finger_pos, target_pos, base_id)).astype(np.float32)
-                    arm_observation = np.concatenate((base_pos_xy, base_yaw, pos_scaled, vel_scaled, left_finger_pos, target_pos, arm_id)).astype(np.float32)
-
-                    observation = np.vstack((base_observation, arm_observation))
-
-                outputs = self.ort_model.run(None, {"obs": observation})
-                mu = outputs[0]
-                sigma = np.exp(outputs[1])
-                action = np.random.normal(mu, sigma)
-                action = np.clip(mu, -1.0, 1.0)
-
                 base_action = action[0]
                 arm_action = action[1]
 
-            
-
-            # if self.task == "ground":
-            #     observation = np.concatenate((pos_scaled, vel_scaled, to_target)).astype(np.float32)
-            # else:
-            #     observation = np.concatenate((pos_scaled, vel_scaled)).astype(np.float32)
-            
-            #observation = observation.reshape((1,-1))
-
-            # isaac code for observations
-            # prop_pos = self._props.get_world_poses(clone=False)[0]
-            # self.to_target = prop_pos - hand_pos
-            
-            # self.obs_buf = torch.cat(
-            #     (
-            #         dof_pos_scaled,
-            #         franka_dof_vel * self.dof_vel_scale,
-            #         self.to_target,
-            #     ),
-            #     dim=-1,
-            # )
-            
-
-
             # isaac code for setting joint position targets          
             # targets = self.franka_dof_targets + self.franka_dof_speed_scales * self.dt * self.actions * self.action_scale
             # self.franka_dof_targets[:] = torch.clamp(targets, self.franka_dof_lower_limits, self.franka_dof_upper_limits)
-
-            # speed scales are changed from isaac sim to be 0.1 times the isaac sim values
-            dof_speed_scales = np.array([0.1, 0.1 ,0.1 ,0.1, 0.1, 0.1, 0.1, 0.01, 0.01]) * 0.2
-            #dof_speed_scales = np.array([0.01, 0.01 ,0.01 ,0.01, 0.01, 0.01, 0.01, 0.01, 0.01])
-            #dof_speed_scales = np.array([1, 1 ,1 ,1, 1, 1, 1, 0.1, 0.1])
-            targets = self.joint_targets + dof_speed_scales * self.dt * arm_action * 7.5
-            self.joint_targets = np.clip(targets, self.lower_limits, self.upper_limits)
+            np.multiply(arm_action, self.target_step_scale, out=self.target_step)
+            self.joint_targets += self.target_step
+            np.clip(self.joint_targets, self.lower_limits, self.upper_limits, out=self.joint_targets)
 
             # set the goal for the arm joints (not gripper)
-            #print("self.joint_positions", self.joint_positions)
-            joint_goal = self.joint_targets[:7]
-            
-            # joint_goal = self.joint_positions[:7]
-            # joint_goal = [
-            #     0.00125, 
-            #     -0.78564, 
-            #     -0.00131, 
-            #     -2.35635,
-            #     -0.00366,
-            #     1.57296,
-            #     0.79711
-            # ]
-
-            #print(joint_goal)
+            joint_goal = self.joint_targets[:7].tolist()
 
             goal = FollowJointTrajectoryActionGoal()
 
@@ -413,46 +338,20 @@ class MobileFrankaRLNode:
                 "panda_joint7"
             ]
             goal.goal.trajectory.joint_names = joint_names
-            
-            #print("joint_positions", self.joint_positions[:7])
-            #print("joint_goal", joint_goal)
-            #print("scaled_action", dof_speed_scales * self.dt * arm_action * 7.5)
 
             if self.arm_control:
                 self.trajectory_goal_pub.publish(goal)
 
-            #self.base_vel_queue.append(base_action)
-
-            #base_action = np.mean(self.base_vel_queue, axis=0)
-
             # publish base actions as twist message, base_action[0] is the linear velocity, base_action[1] is the angular velocity
             twist = Twist()
             twist.linear.x = base_action[0] * 0.5 * 0.5 # check the speeds 0.2 is safe
             twist.angular.z = base_action[1] * 0.375 * 0.3 # check the speeds 0.1 is safe
-            #twist.linear.x = 0.1
-            #twist.angular.z = 0.0
 
-            #print("base cmd", twist.linear.x, twist.angular.z)
-
-            #print("base_action:", base_action[:2])
             if self.base_control:
                 self.base_cmd_vel_pub.publish(twist)
 
-            # TODO Need to publish the base action as moving average of the last 10 actions
-            # self.base_action_buffer.append(base_action)
-            # if len(self.base_action_buffer) > 10:
-            #     self.base_action_buffer.pop(0)
-            # base_action = np.mean(self.base_action_buffer, axis=0)
-
-            
-            #print(self.left_finger_position)
-
-
         except Exception as e:
-            print(type(e))
-            print(e)
-            pass
-
+            rospy.logerr_throttle(1.0, "control step failed: {}: {}".format(type(e).__name__, e))
 
 if __name__ == '__main__':
     rospy.init_node('rl_node', anonymous=True)
@@ -1,12 +1,17 @@
-import pandas as pd
+import os
+import sys
+
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from trajectory_recorder import load_trajectory
+
 
-# baseline
-df = pd.read_csv("e3_p1_m2.csv")
-distances = df["distance_from_target"].to_numpy()
-elapsed_secs = df["elapsed_time"].to_numpy()
+# baseline, the columns are memory-mapped straight from the run log
+run = load_trajectory("e3_p1_m2.npy")
+distances = run["distance_from_target"]
+elapsed_secs = run["elapsed_time"]
 
 # plot the distance from target over time with sns
 sns.set_theme(style="darkgrid")
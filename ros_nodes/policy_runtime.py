@@ -0,0 +1,166 @@
+import argparse
+import glob
+import os
+import time
+
+import onnxruntime as ort
+import numpy as np
+
+
+class PolicyRuntime:
+    """ONNX policy session shared by the ROS deployment nodes.
+
+    The session is configured once (thread counts, graph optimization level) and its input and outputs are
+    bound to preallocated numpy buffers, so running the policy does not allocate. Nodes either write their
+    observations straight into `obs` (shape (batch_size, obs_dim)) and call `act()`, or pass an array to
+    `act(obs)` which is copied into the buffer. `act` returns the mean action buffer, `log_std` holds the
+    second output of policies exporting one. Both are overwritten by the next call.
+
+    `batch_size` only applies to models exported with a dynamic batch dimension. Models whose batch dimension
+    was fixed at export time are always run at that size, which is available as `fixed_batch_size`.
+    """
+
+    def __init__(self, model_path, batch_size=1, intra_op_threads=1, inter_op_threads=1, warmup_steps=10):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.model_path = model_path
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # dynamic dimensions are reported as names (or None) instead of ints
+        self.fixed_batch_size = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        if self.fixed_batch_size is not None:
+            batch_size = self.fixed_batch_size
+        self.obs = np.zeros((batch_size, model_input.shape[-1]), dtype=np.float32)
+
+        # run once to find the output shapes, then bind everything to persistent buffers
+        output_names = [output.name for output in self.session.get_outputs()]
+        outputs = self.session.run(output_names, {self.input_name: self.obs})
+        self.outputs = [np.zeros(output.shape, dtype=np.float32) for output in outputs]
+
+        self.binding = self.session.io_binding()
+        self.binding.bind_input(self.input_name, "cpu", 0, np.float32, list(self.obs.shape), self.obs.ctypes.data)
+        for name, output in zip(output_names, self.outputs):
+            self.binding.bind_output(name, "cpu", 0, np.float32, list(output.shape), output.ctypes.data)
+
+        self.mu = self.outputs[0]
+        self.log_std = self.outputs[1] if len(self.outputs) > 1 else None
+
+        for _ in range(warmup_steps):
+            self.act()
+
+    def act(self, obs=None):
+        if obs is not None:
+            np.copyto(self.obs, np.reshape(obs, self.obs.shape))
+        self.session.run_with_iobinding(self.binding)
+        return self.mu
+
+    def benchmark(self, num_steps=1000):
+        """Times `act` on random observations and returns the mean, p50 and p99 latency in milliseconds."""
+        latencies = np.zeros(num_steps)
+        for i in range(num_steps):
+            self.obs[:] = np.random.uniform(-1.0, 1.0, self.obs.shape)
+            start = time.perf_counter()
+            self.act()
+            latencies[i] = time.perf_counter() - start
+        latencies *= 1000.0
+        return {
+            "mean_ms": float(latencies.mean()),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+
+
+class MultiAgentPolicyRuntime(PolicyRuntime):
+    """PolicyRuntime whose input rows are assembled from a declarative per-agent observation layout.
+
+    `agent_layouts` holds one list per agent of segment names, or `("pad", n)` for n zeros. `segment_sizes`
+    gives the width of every named segment. Each agent's row is its segments in order followed by a one-hot
+    agent id (unless `agent_ids` is False, e.g. for single-agent policies). Pads and ids are written once.
+    Each tick, `write(name, values)` copies a segment into every row using it, and `act_agents()` runs the
+    policy and returns the clipped actions (num_agents, action_dim) without allocating. Deterministic mode
+    uses the mean action and never touches `log_std`. Otherwise the actions are sampled around it.
+    """
+
+    def __init__(self, model_path, agent_layouts, segment_sizes, agent_ids=True, deterministic=True, seed=None,
+                 **kwargs):
+        super().__init__(model_path, batch_size=len(agent_layouts), **kwargs)
+        num_agents = len(agent_layouts)
+        if self.obs.shape[0] != num_agents:
+            raise ValueError("{} was exported with a fixed batch size of {}, the layout has {} agents".format(
+                model_path, self.obs.shape[0], num_agents))
+        self.deterministic = deterministic
+
+        self._views = {name: [] for name in segment_sizes}
+        for agent, layout in enumerate(agent_layouts):
+            start = 0
+            for segment in layout:
+                if isinstance(segment, tuple):
+                    start += segment[1]
+                    continue
+                self._views[segment].append(self.obs[agent, start:start + segment_sizes[segment]])
+                start += segment_sizes[segment]
+            if agent_ids:
+                self.obs[agent, start + agent] = 1.0
+                start += num_agents
+            if start != self.obs.shape[1]:
+                raise ValueError("Observation layout of agent {} has {} values, {} expects {}".format(
+                    agent, start, model_path, self.obs.shape[1]))
+
+        self.actions = np.zeros_like(self.mu)
+        if not deterministic:
+            if self.log_std is None:
+                raise ValueError("{} does not export log_std, it can only be run deterministically".format(model_path))
+            self._rng = np.random.default_rng(seed)
+            self._sigma = np.zeros_like(self.log_std)
+
+    def write(self, name, values):
+        for view in self._views[name]:
+            np.copyto(view, values)
+
+    def act_agents(self):
+        self.act()
+        if self.deterministic:
+            np.copyto(self.actions, self.mu)
+        else:
+            self._rng.standard_normal(out=self.actions, dtype=np.float32)
+            np.exp(self.log_std, out=self._sigma)
+            self.actions *= self._sigma
+            self.actions += self.mu
+        np.clip(self.actions, -1.0, 1.0, out=self.actions)
+        return self.actions
+
+
+if __name__ == '__main__':
+    # offline latency report, e.g. python policy_runtime.py franka_nn_node/models --batch_size 2
+    parser = argparse.ArgumentParser()
+    parser.add_argument("models", nargs="+", help="onnx files or directories containing them")
+    parser.add_argument("--batch_size", type=int, default=1,
+                        help="batch size of models with a dynamic batch dimension, fixed ones run at their own size")
+    parser.add_argument("--intra_op_threads", type=int, default=1)
+    parser.add_argument("--num_steps", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=60.0, help="control rate the latency is compared against")
+    args = parser.parse_args()
+
+    model_paths = []
+    for path in args.models:
+        if os.path.isdir(path):
+            model_paths += sorted(glob.glob(os.path.join(path, "*.onnx")))
+        else:
+            model_paths.append(path)
+
+    budget_ms = 1000.0 / args.rate
+    print("{:<70} {:>6} {:>8} {:>8} {:>8} {:>10}".format("model", "batch", "mean ms", "p50 ms", "p99 ms", "headroom"))
+    for model_path in model_paths:
+        try:
+            runtime = PolicyRuntime(model_path, batch_size=args.batch_size, intra_op_threads=args.intra_op_threads)
+        except Exception as e:
+            print("{:<70} failed to load: {}".format(model_path, e))
+            continue
+        stats = runtime.benchmark(args.num_steps)
+        print("{:<70} {:>6} {:>8.3f} {:>8.3f} {:>8.3f} {:>9.1f}x".format(
+            model_path, runtime.obs.shape[0], stats["mean_ms"], stats["p50_ms"], stats["p99_ms"], budget_ms / stats["p99_ms"]))
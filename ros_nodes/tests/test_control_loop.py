@@ -0,0 +1,139 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from control_loop import FakeTFBuffer, FixedRateLoop, StateSnapshot, TransformLookup
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+    def wait(self, seconds):
+        self.time += seconds
+
+
+class PoseFollower:
+    """Control step wired like mobilefranka_rl_node: the pose is looked up without waiting, written to the
+    snapshot when fresh, and the step is skipped once the snapshot pose is older than pose_timeout."""
+
+    def __init__(self, num_steps, publish_steps, dt, max_age, pose_timeout):
+        self.clock = FakeClock()
+        self.tf_buffer = FakeTFBuffer(self.clock)
+        self.transforms = TransformLookup(self.tf_buffer, now=self.clock, max_age=max_age)
+        self.state = StateSnapshot({"base_pose": 3}, clock=self.clock)
+        self.base_pose = np.zeros(3)
+        self.num_steps = num_steps
+        self.publish_steps = publish_steps
+        self.dt = dt
+        self.pose_timeout = pose_timeout
+        self.acted_steps = 0
+        self.stale_steps = 0
+        self.loop = None
+
+    def step(self):
+        step = self.loop.num_steps
+        self.clock.time = step * self.dt
+        # the tf publisher goes quiet after publish_steps
+        if step < self.publish_steps:
+            self.tf_buffer.set_transform("universe", "husky_link", (step, 0.0, 0.0))
+
+        pose = self.transforms.lookup("universe", "husky_link")
+        if pose is not None:
+            self.state.write("base_pose", pose[0])
+
+        if not self.state.is_set("base_pose") or self.state.age("base_pose") > self.pose_timeout:
+            self.stale_steps += 1
+        else:
+            self.state.read("base_pose", self.base_pose)
+            self.acted_steps += 1
+
+        if step + 1 == self.num_steps:
+            self.loop.stop()
+
+
+def run_loop(loop, timeout=10.0):
+    loop.start()
+    loop.join(timeout=timeout)
+    assert not loop.is_alive()
+
+
+def test_snapshot_read_write_and_age():
+    clock = FakeClock()
+    state = StateSnapshot({"base_pose": 3, "joints": 2}, clock=clock)
+    assert not state.is_set("base_pose")
+    assert state.age("base_pose") is None
+
+    clock.time = 1.0
+    state.write("base_pose", [1.0, 2.0, 3.0])
+    state.write("base_pose", [4.0, 5.0, 6.0])
+    clock.time = 1.5
+    out = np.zeros(3)
+    np.testing.assert_array_equal(state.read("base_pose", out), [4.0, 5.0, 6.0])
+    assert state.age("base_pose") == 0.5
+    assert not state.is_set("joints")
+
+
+def test_lookup_rejects_missing_and_stale_transforms():
+    clock = FakeClock()
+    tf_buffer = FakeTFBuffer(clock)
+    transforms = TransformLookup(tf_buffer, now=clock, max_age=0.5)
+
+    assert transforms.lookup("universe", "husky_link") is None
+    assert transforms.failures == 1
+
+    tf_buffer.set_transform("universe", "husky_link", (1.0, 2.0, 3.0), (0.0, 0.0, 1.0, 0.0))
+    position, quaternion = transforms.lookup("universe", "husky_link")
+    np.testing.assert_array_equal(position, [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(quaternion, [0.0, 0.0, 1.0, 0.0])
+
+    clock.time = 0.75
+    assert transforms.lookup("universe", "husky_link") is None
+    assert transforms.stale == 1
+    assert transforms.failures == 1
+
+
+def test_loop_skips_steps_once_the_pose_is_stale():
+    # times are multiples of 0.25 so the age comparisons are exact
+    follower = PoseFollower(num_steps=20, publish_steps=10, dt=0.25, max_age=0.6, pose_timeout=1.1)
+    follower.loop = FixedRateLoop(200.0, follower.step)
+    run_loop(follower.loop)
+
+    assert follower.loop.num_steps == 20
+    # the last transform is stamped 2.25, lookups from t=3.0 (step 12) on are older than max_age
+    assert follower.transforms.stale == 8
+    # the snapshot was last written at 2.75, steps from t=4.0 (step 16) on exceed pose_timeout
+    assert follower.acted_steps == 16
+    assert follower.stale_steps == 4
+    np.testing.assert_array_equal(follower.base_pose, [9.0, 0.0, 0.0])
+
+
+def test_loop_counts_deadline_misses():
+    clock = FakeClock()
+    slow_steps = {3, 7, 8}
+    loop = None
+
+    def step():
+        # slow steps take three times the period, the others take no time at all
+        if loop.num_steps in slow_steps:
+            clock.time += 0.15
+        if loop.num_steps + 1 == 12:
+            loop.stop()
+
+    loop = FixedRateLoop(20.0, step, clock=clock, wait=clock.wait)
+    run_loop(loop)
+
+    stats = loop.stats()
+    assert stats["steps"] == 12
+    assert stats["deadline_misses"] == len(slow_steps)
+    assert stats["step_p99_ms"] == pytest.approx(150.0)
+    assert stats["step_p50_ms"] == 0.0
+    # the overrun periods are skipped, so every wake-up is on time
+    assert stats["jitter_max_ms"] == pytest.approx(0.0, abs=1e-6)
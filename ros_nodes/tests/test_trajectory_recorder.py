@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from trajectory_recorder import TrajectoryRecorder, load_trajectory
+
+
+class FailingFile:
+    """Wraps the recorder's file and fails every write once `fail` is set."""
+
+    def __init__(self, file):
+        self._file = file
+        self.fail = False
+
+    def write(self, data):
+        if self.fail:
+            raise OSError("No space left on device")
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def test_rows_are_readable_after_every_flush(tmp_path):
+    path = str(tmp_path / "run.npy")
+    recorder = TrajectoryRecorder(path, ["x", "y"], chunk_size=4, num_chunks=2, flush_seconds=1e9)
+    for i in range(10):
+        recorder.record(i, -i)
+    recorder.close()
+
+    run = load_trajectory(path)
+    assert run.dtype.names == ("x", "y")
+    np.testing.assert_array_equal(run["x"], np.arange(10))
+    np.testing.assert_array_equal(run["y"], -np.arange(10))
+
+
+def test_write_failure_raises_instead_of_blocking(tmp_path):
+    path = str(tmp_path / "run.npy")
+    recorder = TrajectoryRecorder(path, ["x"], chunk_size=2, num_chunks=2, flush_seconds=1e9)
+    for i in range(4):
+        recorder.record(i)
+
+    recorder._file = FailingFile(recorder._file)
+    recorder._file.fail = True
+    # with two chunks and a failed writer, recording would block on the first flush after the failure if the
+    # failed chunk was not handed back
+    with pytest.raises(IOError):
+        for i in range(20):
+            recorder.record(i)
+    # rows recorded after the failure are dropped, recording goes on raising on every flush
+    with pytest.raises(IOError):
+        for i in range(20):
+            recorder.record(i)
+    with pytest.raises(IOError):
+        recorder.close()
+    assert recorder._file.closed
+
+    # the rows written before the failure are still a valid array
+    run = load_trajectory(path)
+    assert len(run) >= 2
+    np.testing.assert_array_equal(run["x"], np.arange(len(run)))
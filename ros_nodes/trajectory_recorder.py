@@ -0,0 +1,146 @@
+import argparse
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+class TrajectoryRecorder:
+    """Fixed-schema run log written to disk in chunks by a background thread.
+
+    Rows are recorded into preallocated structured-array chunks with one float64 column per field. Full
+    chunks, or the current chunk once `flush_seconds` have passed, are handed to a writer thread that
+    appends them to an .npy file and then rewrites its header with the new row count. The file is therefore
+    a valid array after every flush: a crash loses at most the last unflushed rows, and the file can be
+    memory-mapped while the run is still going (see load_trajectory). Memory is bounded by `num_chunks`
+    chunks. If the disk falls that far behind, `record` waits for a chunk to be written.
+
+    If a write fails, the writer stops writing and hands every chunk straight back, so `record` never waits
+    on it. The next flush, triggered by `record` or called directly, raises an IOError and drops the rows
+    recorded since. The file keeps the rows written before the failure.
+
+    `record` must always be called from the same thread.
+    """
+
+    _MAGIC = b"\x93NUMPY\x01\x00"
+
+    def __init__(self, path, fields, chunk_size=1024, num_chunks=4, flush_seconds=1.0):
+        self.path = path
+        self.fields = list(fields)
+        self.dtype = np.dtype([(name, np.float64) for name in self.fields])
+        self.flush_seconds = flush_seconds
+        self.num_rows = 0
+
+        # the header is padded to a fixed size so it can be rewritten in place as the row count grows
+        self._descr = np.lib.format.dtype_to_descr(self.dtype)
+        self._header_size = -(-(len(self._header_dict(10 ** 18)) + len(self._MAGIC) + 3) // 64) * 64
+        if self._header_size - len(self._MAGIC) - 2 > 0xFFFF:
+            raise ValueError("Too many fields for an .npy v1.0 header: {}".format(len(self.fields)))
+
+        self._free = queue.Queue()
+        for _ in range(num_chunks - 1):
+            self._free.put(np.zeros(chunk_size, dtype=self.dtype))
+        self._pending = queue.Queue()
+        self._chunk = np.zeros(chunk_size, dtype=self.dtype)
+        self._chunk_rows = 0
+        self._last_flush = time.monotonic()
+        self._error = None
+
+        self._file = open(path, "wb")
+        self._write_header()
+        self._file.flush()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def record(self, *values):
+        """Appends one row, values in the order of `fields`."""
+        self._chunk[self._chunk_rows] = values
+        self._chunk_rows += 1
+        if self._chunk_rows == len(self._chunk) or time.monotonic() - self._last_flush > self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Hands the rows recorded so far to the writer thread, raises IOError if a previous write failed."""
+        self._check_writer()
+        if self._chunk_rows > 0:
+            self._pending.put((self._chunk, self._chunk_rows))
+            self._chunk = self._free.get()
+            self._chunk_rows = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flushes the remaining rows and waits for them to be on disk, raises IOError if any write failed."""
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._pending.put(None)
+            self._writer.join()
+            self._file.close()
+        self._check_writer()
+
+    def _check_writer(self):
+        if self._error is not None:
+            self._chunk_rows = 0
+            raise IOError("Writing {} failed, rows recorded since were dropped: {}".format(
+                self.path, self._error)) from self._error
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            chunk, num_rows = item
+            if self._error is None:
+                try:
+                    self._write_chunk(chunk, num_rows)
+                except Exception as e:
+                    self._error = e
+            # always handed back, also after a failure, so record never blocks on the writer
+            self._free.put(chunk)
+
+    def _write_chunk(self, chunk, num_rows):
+        # data first, then the row count, so the header never covers rows that are not written yet
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(chunk[:num_rows].view(np.uint8))
+        self._file.flush()
+        self.num_rows += num_rows
+        self._write_header()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _header_dict(self, num_rows):
+        return "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}".format(self._descr, num_rows)
+
+    def _write_header(self):
+        header = self._header_dict(self.num_rows)
+        header = header.ljust(self._header_size - len(self._MAGIC) - 3) + "\n"
+        self._file.seek(0)
+        self._file.write(self._MAGIC + struct.pack("<H", len(header)) + header.encode("latin1"))
+
+
+def load_trajectory(path):
+    """Memory-maps a recorded run, columns are accessed by field name without copying, e.g. run["elapsed_time"]."""
+    return np.load(path, mmap_mode="r")
+
+
+def export_csv(path, csv_path=None):
+    """Writes a recorded run as CSV with one column per field, for tools that expect the old CSV logs."""
+    run = load_trajectory(path)
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    np.savetxt(csv_path, run, delimiter=",", header=",".join(run.dtype.names), comments="", fmt="%.17g")
+    return csv_path
+
+
+if __name__ == '__main__':
+    # e.g. python trajectory_recorder.py franka_nn_node/e3_p1_m2_1.npy
+    parser = argparse.ArgumentParser(description="Convert recorded runs to CSV")
+    parser.add_argument("runs", nargs="+", help=".npy files written by TrajectoryRecorder")
+    args = parser.parse_args()
+
+    for path in args.runs:
+        print(path, "->", export_csv(path))
@@ -8,9 +8,12 @@ from nav_msgs.msg import Odometry
 from tf_transformations import euler_from_quaternion, quaternion_from_euler
 
 import onnx
-import onnxruntime as ort
 import numpy as np
 from matplotlib import pyplot as plt
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from policy_runtime import PolicyRuntime
 
 
 class RLNode(Node):
@@ -27,7 +30,7 @@ class RLNode(Node):
         #onnx_model = onnx.load("jetbot_norm.onnx")
         # Check that the model is well formed
         #onnx.checker.check_model(onnx_model)
-        self.ort_model = ort.InferenceSession("jetbot_bigradius3.onnx")
+        self.policy = PolicyRuntime("jetbot_bigradius3.onnx")
 
         self.position = None
         self.orientation = None
@@ -73,15 +76,16 @@ class RLNode(Node):
         # heading is calculated, it starts as None
         if self.heading:
             #print(len(msg.ranges), msg.angle_min, msg.angle_max)
-            observation = np.append(np.flip(np.array(msg.ranges)) - 0.1, (self.heading, self.goal_distance))
+            observation = self.policy.obs[0]
+            observation[:-2] = np.flip(np.array(msg.ranges)) - 0.1
+            observation[-2:] = (self.heading, self.goal_distance)
             #observation = np.append(np.array(msg.ranges), (self.heading, self.goal_distance))
 
             #self.polar_to_cartesian_coordinate(observation[:36], -np.pi, 0)
             #print(observation)
 
-            outputs = self.ort_model.run(None, {"obs": observation.astype(np.float32).reshape((1,74))})
-            mu = outputs[0].squeeze(1)
-            sigma = np.exp(outputs[1].squeeze(1))
+            mu = self.policy.act().squeeze(1)
+            sigma = np.exp(self.policy.log_std.squeeze(1))
             action = np.random.normal(mu, sigma)
             
             cmd.angular.z = action.item() * 0.3